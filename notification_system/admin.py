@@ -1,4 +1,8 @@
 from django.contrib import admin
+from django.db.models import Count
+from django.utils import timezone
+from project_manager.caching import bump_version, notification_scope
+from .counters import adjust_unread_counts
 from .models import Notification, NotificationPreference
 
 
@@ -32,22 +36,30 @@ class NotificationAdmin(admin.ModelAdmin):
     actions = ['mark_as_read', 'mark_as_unread']
     
     def mark_as_read(self, request, queryset):
-        updated = 0
-        for notification in queryset:
-            if not notification.is_read:
-                notification.mark_as_read()
-                updated += 1
+        deltas = self._unread_deltas(queryset.filter(is_read=False), -1)
+        updated = queryset.filter(is_read=False).update(is_read=True, read_at=timezone.now())
+        self._recipients_changed(deltas)
         self.message_user(request, f'{updated} notifications marked as read.')
     mark_as_read.short_description = "Mark selected notifications as read"
     
     def mark_as_unread(self, request, queryset):
-        updated = 0
-        for notification in queryset:
-            if notification.is_read:
-                notification.mark_as_unread()
-                updated += 1
+        deltas = self._unread_deltas(queryset.filter(is_read=True), 1)
+        updated = queryset.filter(is_read=True).update(is_read=False, read_at=None)
+        self._recipients_changed(deltas)
         self.message_user(request, f'{updated} notifications marked as unread.')
     mark_as_unread.short_description = "Mark selected notifications as unread"
+    
+    @staticmethod
+    def _unread_deltas(queryset, sign):
+        """Per-recipient counter changes for a bulk read/unread update"""
+        rows = queryset.order_by().values('recipient_id').annotate(count=Count('pk'))
+        return {row['recipient_id']: sign * row['count'] for row in rows}
+
+    @staticmethod
+    def _recipients_changed(deltas):
+        """Adjust the counters and cached notifications of the recipients of a bulk update"""
+        adjust_unread_counts(deltas)
+        bump_version(*(notification_scope(user_id) for user_id in deltas))
 
 
 @admin.register(NotificationPreference)
@@ -55,7 +67,7 @@ class NotificationPreferenceAdmin(admin.ModelAdmin):
     list_display = ['user', 'digest_frequency', 'created_at', 'updated_at']
     list_filter = ['digest_frequency', 'created_at']
     search_fields = ['user__username', 'user__email']
-    readonly_fields = ['created_at', 'updated_at']
+    readonly_fields = ['last_digest_at', 'created_at', 'updated_at']
     
     fieldsets = (
         ('User', {
@@ -80,7 +92,7 @@ class NotificationPreferenceAdmin(admin.ModelAdmin):
             )
         }),
         ('Settings', {
-            'fields': ('digest_frequency',)
+            'fields': ('digest_frequency', 'last_digest_at')
         }),
         ('Timestamps', {
             'fields': ('created_at', 'updated_at'),
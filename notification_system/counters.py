@@ -0,0 +1,72 @@
+"""
+Per-user unread notification counters kept in the cache.
+
+The counter is computed with a COUNT query on first use and then adjusted
+incrementally whenever notifications are created, read, unread or deleted.
+Entries expire after ``UNREAD_COUNT_TIMEOUT`` seconds (less with a
+process-local cache, see ``cache_timeout``), so every counter is
+periodically reconciled against the database even if an update was missed.
+"""
+from django.core.cache import cache
+
+from project_manager.caching import cache_timeout
+
+UNREAD_COUNT_TIMEOUT = 5 * 60
+
+
+def _cache_key(user_id):
+    return f'notifications:unread:{user_id}'
+
+
+def get_unread_count(user):
+    """Number of unread notifications of ``user``"""
+    from .models import Notification
+
+    key = _cache_key(user.pk)
+    count = cache.get(key)
+    if count is None:
+        count = Notification.objects.filter(recipient=user, is_read=False).count()
+        cache.set(key, count, cache_timeout(UNREAD_COUNT_TIMEOUT))
+    return count
+
+
+def adjust_unread_count(user_id, delta):
+    """Apply ``delta`` to a cached counter; missing counters are left to be recomputed"""
+    if not delta:
+        return
+    key = _cache_key(user_id)
+    try:
+        count = cache.incr(key, delta)
+    except ValueError:
+        return
+    if count < 0:
+        cache.delete(key)
+
+
+def adjust_unread_counts(deltas):
+    """Apply a {user_id: delta} mapping of counter changes"""
+    for user_id, delta in deltas.items():
+        adjust_unread_count(user_id, delta)
+
+
+def reset_unread_count(user_id):
+    """Force the counter of a user to be recomputed from the database"""
+    cache.delete(_cache_key(user_id))
+
+
+class LazyUnreadCount:
+    """
+    Template value that counts unread notifications only when rendered.
+
+    Django templates call callables when resolving variables, so pages that
+    never show the badge never touch the cache or the database.
+    """
+
+    def __init__(self, user):
+        self.user = user
+        self._count = None
+
+    def __call__(self):
+        if self._count is None:
+            self._count = get_unread_count(self.user)
+        return self._count
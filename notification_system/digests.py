@@ -0,0 +1,150 @@
+"""
+Daily and weekly digest emails of unread notifications.
+
+``send_digests`` (``manage.py send_digests``, e.g. hourly from cron) emails
+every user whose ``NotificationPreference.digest_frequency`` is daily or
+weekly and whose last digest is at least that old. Users without preferences
+get the defaults: daily, with all email flags on.
+
+The unread notifications of all those users are read with one query ordered
+by recipient and streamed, so the run holds one recipient's digest in memory
+at a time. Notification types whose ``email_*`` preference is off are left
+out. Each user gets one email listing up to ``DIGEST_MAX_ITEMS``
+notifications. Messages are sent in batches over a single connection of the
+configured email backend, then the ``last_digest_at`` watermark of the batch's
+users is set to the start of the run with one upsert, so the next runs only
+send newer notifications, and a run that fails halfway resumes after the
+last batch sent.
+"""
+from collections import Counter
+from datetime import timedelta
+from itertools import groupby
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import F, Q
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .models import Notification, NotificationPreference
+
+DIGEST_PERIODS = {'daily': timedelta(days=1), 'weekly': timedelta(days=7)}
+# Tolerance for runs starting a little earlier than the previous one did
+DIGEST_GRACE = timedelta(hours=1)
+DIGEST_MAX_ITEMS = 50
+DIGEST_BATCH_SIZE = 100
+DIGEST_CHUNK_SIZE = 2000
+
+PREFERENCE = 'recipient__notification_preferences'
+
+
+def _due_recipients(now):
+    """Filter of the notifications whose recipient is due a digest"""
+    no_preferences = Q(**{f'{PREFERENCE}__isnull': True})
+    due = no_preferences
+    for frequency, period in DIGEST_PERIODS.items():
+        due |= Q(**{f'{PREFERENCE}__digest_frequency': frequency}) & (
+            Q(**{f'{PREFERENCE}__last_digest_at__isnull': True})
+            | Q(**{f'{PREFERENCE}__last_digest_at__lte': now - period + DIGEST_GRACE})
+        )
+    since_watermark = (
+        Q(**{f'{PREFERENCE}__last_digest_at__isnull': True})
+        | Q(created_at__gt=F(f'{PREFERENCE}__last_digest_at'))
+    )
+    return due & since_watermark
+
+
+def digest_rows(now):
+    """Unread notifications to send in digests, ordered by recipient, as a stream of dicts"""
+    email_fields = sorted(set(NotificationPreference.EMAIL_PREFERENCE_FIELDS.values()))
+    return Notification.objects.filter(
+        _due_recipients(now),
+        is_read=False,
+        created_at__lte=now,
+        recipient__is_active=True,
+    ).order_by('recipient_id', 'created_at').values(
+        'recipient_id', 'recipient__email', 'recipient__username', 'recipient__first_name',
+        'title', 'message', 'notification_type', 'created_at', 'project__name',
+        frequency=F(f'{PREFERENCE}__digest_frequency'),
+        **{field: F(f'{PREFERENCE}__{field}') for field in email_fields},
+    ).iterator(chunk_size=DIGEST_CHUNK_SIZE)
+
+
+def _wants_email(row):
+    """Whether the recipient's email preferences allow a notification; no preferences means the defaults"""
+    field = NotificationPreference.EMAIL_PREFERENCE_FIELDS.get(row['notification_type'])
+    if field is None:
+        return True
+    if row[field] is None:
+        return NotificationPreference._meta.get_field(field).default
+    return row[field]
+
+
+def build_digest(rows):
+    """Digest email of one recipient's rows, or None if there is nothing to send them"""
+    first = None
+    items = []
+    count = 0
+    for row in rows:
+        first = first or row
+        if not _wants_email(row):
+            continue
+        count += 1
+        if len(items) < DIGEST_MAX_ITEMS:
+            items.append(row)
+    if not count or not first['recipient__email']:
+        return None
+    frequency = first['frequency'] or 'daily'
+    context = {
+        'name': first['recipient__first_name'] or first['recipient__username'],
+        'frequency': frequency,
+        'notifications': items,
+        'count': count,
+        'more': count - len(items),
+    }
+    return EmailMessage(
+        subject=f"Your {frequency} ProjectFlow digest: {count} unread notification{'s' if count != 1 else ''}",
+        body=render_to_string('notifications/digest_email.txt', context),
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[first['recipient__email']],
+    )
+
+
+def _set_watermarks(user_ids, now):
+    """Record a digest for users, creating default preferences for those without"""
+    NotificationPreference.objects.bulk_create(
+        [NotificationPreference(user_id=user_id, last_digest_at=now) for user_id in user_ids],
+        update_conflicts=True,
+        unique_fields=['user'],
+        update_fields=['last_digest_at'],
+    )
+
+
+def _send_batch(connection, messages, user_ids, now):
+    """Send a batch of digests and move the watermarks of its users; returns the emails sent"""
+    sent = connection.send_messages(messages) if messages else 0
+    _set_watermarks(user_ids, now)
+    return sent or 0
+
+
+def send_digests(now=None, batch_size=DIGEST_BATCH_SIZE):
+    """Email the digests due at ``now``; returns counts of emails sent and users skipped"""
+    now = now or timezone.now()
+    counts = Counter(sent=0, skipped=0)
+    messages = []
+    user_ids = []
+    with get_connection() as connection:
+        for user_id, rows in groupby(digest_rows(now), key=lambda row: row['recipient_id']):
+            message = build_digest(rows)
+            # Users with nothing to email also move their watermark past these notifications
+            user_ids.append(user_id)
+            if message is None:
+                counts['skipped'] += 1
+            else:
+                messages.append(message)
+            if len(user_ids) >= batch_size:
+                counts['sent'] += _send_batch(connection, messages, user_ids, now)
+                messages, user_ids = [], []
+        if user_ids:
+            counts['sent'] += _send_batch(connection, messages, user_ids, now)
+    return counts
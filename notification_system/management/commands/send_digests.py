@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from notification_system.digests import DIGEST_BATCH_SIZE, send_digests
+
+
+class Command(BaseCommand):
+    help = 'Email the daily and weekly digests of unread notifications that are due (run e.g. hourly)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DIGEST_BATCH_SIZE,
+            help=f'Emails sent per batch before recording the watermarks (default: {DIGEST_BATCH_SIZE})',
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1.')
+        counts = send_digests(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Sent {counts['sent']} digests ({counts['skipped']} users had nothing to email)"
+        ))
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from notification_system.reminders import (
+    DUE_SOON_HOURS, OVERDUE_LOOKBACK_DAYS, SWEEP_BATCH_SIZE, sweep_due_reminders,
+)
+
+
+class Command(BaseCommand):
+    help = 'Notify the assignees of open tasks that are due soon or overdue (run e.g. every 15 minutes)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--due-soon-hours',
+            type=int,
+            default=DUE_SOON_HOURS,
+            help=f'Remind of tasks due within this many hours (default: {DUE_SOON_HOURS})',
+        )
+        parser.add_argument(
+            '--overdue-days',
+            type=int,
+            default=OVERDUE_LOOKBACK_DAYS,
+            help=f'Skip tasks overdue for longer than this many days (default: {OVERDUE_LOOKBACK_DAYS})',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=SWEEP_BATCH_SIZE,
+            help=f'Tasks read and notified per chunk (default: {SWEEP_BATCH_SIZE})',
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1.')
+        counts = sweep_due_reminders(
+            due_soon_hours=options['due_soon_hours'],
+            overdue_days=options['overdue_days'],
+            batch_size=options['batch_size'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Swept {counts['tasks']} tasks: {counts['task_due_soon']} due soon "
+            f"and {counts['task_overdue']} overdue notifications"
+        ))
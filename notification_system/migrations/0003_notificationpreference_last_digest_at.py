@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notification_system', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notificationpreference',
+            name='last_digest_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -1,8 +1,13 @@
 import uuid
+from collections import Counter
 from django.db import models
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 
+from project_manager.caching import bump_version, notification_scope
+from .counters import adjust_unread_count, adjust_unread_counts
+from .realtime import broadcast, notification_message
+
 User = get_user_model()
 
 
@@ -58,6 +63,7 @@ class Notification(models.Model):
             self.is_read = True
             self.read_at = timezone.now()
             self.save(update_fields=['is_read', 'read_at'])
+            adjust_unread_count(self.recipient_id, -1)
     
     def mark_as_unread(self):
         """Mark notification as unread"""
@@ -65,6 +71,7 @@ class Notification(models.Model):
             self.is_read = False
             self.read_at = None
             self.save(update_fields=['is_read', 'read_at'])
+            adjust_unread_count(self.recipient_id, 1)
     
     @property
     def time_since_created(self):
@@ -97,6 +104,68 @@ class Notification(models.Model):
             extra_data=extra_data or {}
         )
     
+    @classmethod
+    def bulk_notify(cls, recipients, title, message, notification_type, sender=None, project=None, task=None, extra_data=None):
+        """
+        Create the same notification for many recipients at once.
+
+        ``recipients`` may contain users or user ids. Recipients who turned off
+        in-app notifications of this type are skipped; see ``bulk_deliver``.
+        """
+        recipient_ids = list(dict.fromkeys(getattr(recipient, 'pk', recipient) for recipient in recipients))
+        return cls.bulk_deliver([
+            cls(
+                recipient_id=user_id,
+                sender=sender,
+                title=title,
+                message=message,
+                notification_type=notification_type,
+                project=project,
+                task=task,
+                extra_data=extra_data or {},
+            )
+            for user_id in recipient_ids
+        ])
+    
+    @classmethod
+    def bulk_deliver(cls, notifications):
+        """
+        Save unsaved notifications of any types and recipients at once.
+
+        Notifications whose recipient turned off in-app notifications of that
+        type are dropped; preferences are read with a single query and all
+        rows are written with one bulk_create.
+        """
+        if not notifications:
+            return []
+
+        preference_fields = {
+            NotificationPreference.APP_PREFERENCE_FIELDS[notification.notification_type]
+            for notification in notifications
+            if notification.notification_type in NotificationPreference.APP_PREFERENCE_FIELDS
+        }
+        if preference_fields:
+            recipient_ids = {notification.recipient_id for notification in notifications}
+            preferences = {
+                row.pop('user_id'): row
+                for row in NotificationPreference.objects.filter(
+                    user_id__in=recipient_ids
+                ).values('user_id', *preference_fields)
+            }
+            notifications = [
+                notification for notification in notifications
+                if preferences.get(notification.recipient_id, {}).get(
+                    NotificationPreference.APP_PREFERENCE_FIELDS.get(notification.notification_type), True
+                )
+            ]
+
+        notifications = cls.objects.bulk_create(notifications)
+        unread = Counter(notification.recipient_id for notification in notifications)
+        adjust_unread_counts(unread)
+        bump_version(*(notification_scope(user_id) for user_id in unread))
+        broadcast(notification_message(notification) for notification in notifications)
+        return notifications
+    
     @classmethod
     def create_project_invitation(cls, recipient, project, sender):
         """Create project invitation notification"""
@@ -112,8 +181,23 @@ class Notification(models.Model):
     @classmethod
     def create_task_assignment(cls, recipient, task, sender):
         """Create task assignment notification"""
-        return cls.create_notification(
-            recipient=recipient,
+        notification = cls.build_task_assignment(getattr(recipient, 'pk', recipient), task, sender)
+        notification.save()
+        return notification
+    
+    @classmethod
+    def create_task_assignments(cls, recipients, task, sender):
+        """Create task assignment notifications for many recipients"""
+        return cls.bulk_deliver([
+            cls.build_task_assignment(recipient_id, task, sender)
+            for recipient_id in dict.fromkeys(getattr(recipient, 'pk', recipient) for recipient in recipients)
+        ])
+    
+    @classmethod
+    def build_task_assignment(cls, recipient_id, task, sender):
+        """Unsaved task assignment notification, see bulk_deliver"""
+        return cls(
+            recipient_id=recipient_id,
             sender=sender,
             title=f"New Task Assigned: {task.title}",
             message=f"You have been assigned to task '{task.title}' in project '{task.project.name}'.",
@@ -125,8 +209,23 @@ class Notification(models.Model):
     @classmethod
     def create_task_update(cls, recipient, task, sender, changes):
         """Create task update notification"""
-        return cls.create_notification(
-            recipient=recipient,
+        notification = cls.build_task_update(getattr(recipient, 'pk', recipient), task, sender, changes)
+        notification.save()
+        return notification
+    
+    @classmethod
+    def create_task_updates(cls, recipients, task, sender, changes):
+        """Create task update notifications for many recipients"""
+        return cls.bulk_deliver([
+            cls.build_task_update(recipient_id, task, sender, changes)
+            for recipient_id in dict.fromkeys(getattr(recipient, 'pk', recipient) for recipient in recipients)
+        ])
+    
+    @classmethod
+    def build_task_update(cls, recipient_id, task, sender, changes):
+        """Unsaved task update notification, see bulk_deliver"""
+        return cls(
+            recipient_id=recipient_id,
             sender=sender,
             title=f"Task Updated: {task.title}",
             message=f"Task '{task.title}' has been updated by {sender.get_full_name() or sender.username}.",
@@ -136,6 +235,19 @@ class Notification(models.Model):
             extra_data={'changes': changes}
         )
     
+    @classmethod
+    def build_task_status_update(cls, recipient_id, task, sender):
+        """Unsaved task status change notification, see bulk_deliver"""
+        return cls(
+            recipient_id=recipient_id,
+            sender=sender,
+            title='Task Status Updated',
+            message=f'Task "{task.title}" status changed to {task.status.replace("_", " ").title()}',
+            notification_type='task_updated',
+            project=task.project,
+            task=task
+        )
+    
     @classmethod
     def create_task_completion(cls, recipient, task, sender):
         """Create task completion notification"""
@@ -162,6 +274,20 @@ class Notification(models.Model):
             task=task,
             extra_data={'comment_id': str(comment.id)}
         )
+    
+    @classmethod
+    def create_comment_notifications(cls, recipients, task, sender, comment):
+        """Create comment notifications for many recipients"""
+        return cls.bulk_notify(
+            recipients,
+            sender=sender,
+            title=f"New Comment on {task.title}",
+            message=f"{sender.get_full_name() or sender.username} commented on task '{task.title}'.",
+            notification_type='comment_added',
+            project=task.project,
+            task=task,
+            extra_data={'comment_id': str(comment.id)}
+        )
 
 
 class NotificationPreference(models.Model):
@@ -193,10 +319,34 @@ class NotificationPreference(models.Model):
         ],
         default='daily'
     )
+    # Notifications created up to this moment were covered by a digest email
+    last_digest_at = models.DateTimeField(null=True, blank=True, editable=False)
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    # In-app preference flag that governs each notification type
+    APP_PREFERENCE_FIELDS = {
+        'project_invitation': 'app_project_invitations',
+        'task_assigned': 'app_task_assignments',
+        'task_updated': 'app_task_updates',
+        'task_completed': 'app_task_updates',
+        'comment_added': 'app_comments',
+        'task_due_soon': 'app_due_reminders',
+        'task_overdue': 'app_due_reminders',
+    }
+    
+    # Email preference flag that governs each notification type
+    EMAIL_PREFERENCE_FIELDS = {
+        'project_invitation': 'email_project_invitations',
+        'task_assigned': 'email_task_assignments',
+        'task_updated': 'email_task_updates',
+        'task_completed': 'email_task_updates',
+        'comment_added': 'email_comments',
+        'task_due_soon': 'email_due_reminders',
+        'task_overdue': 'email_due_reminders',
+    }
+    
     def __str__(self):
         return f"Notification preferences for {self.user.username}"
     
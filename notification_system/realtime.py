@@ -0,0 +1,99 @@
+"""
+Push of small change events to open pages over WebSockets.
+
+Pages subscribe through ``notifications.consumers.UpdatesConsumer`` to the
+group of the signed-in user and, on project pages, to the group of the
+project. Events carry only what changed (a task's new status, a new
+notification, a comment) so pages can patch themselves instead of reloading.
+
+Events are sent once the surrounding transaction commits. A missing or
+unreachable channel layer never fails the write: open pages then simply
+catch up on their next load.
+"""
+import logging
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+# Consumer method handling pushed events (``push.event`` -> ``push_event``)
+PUSH_MESSAGE_TYPE = 'push.event'
+
+
+def user_group(user_id):
+    """Group receiving the events of one user"""
+    return f'user.{user_id}'
+
+
+def project_group(project_id):
+    """Group receiving the events of one project"""
+    return f'project.{project_id}'
+
+
+def _isoformat(moment):
+    return moment.isoformat() if moment else None
+
+
+def _send(messages):
+    layer = get_channel_layer()
+    if layer is None:
+        return
+    group_send = async_to_sync(layer.group_send)
+    for group, event, data in messages:
+        try:
+            group_send(group, {'type': PUSH_MESSAGE_TYPE, 'event': event, 'data': data})
+        except Exception:
+            logger.warning('Could not push %s to %s', event, group, exc_info=True)
+
+
+def broadcast(messages):
+    """Send (group, event, data) messages after the current transaction commits"""
+    messages = list(messages)
+    if messages:
+        transaction.on_commit(lambda: _send(messages))
+
+
+def task_status_message(activity, project_id):
+    """Status change of a task, from its ``status_changed`` activity"""
+    return project_group(project_id), 'task.status', {
+        'task_id': str(activity.task_id),
+        'project_id': str(project_id),
+        'old_status': activity.old_value,
+        'status': activity.new_value,
+        'user_id': activity.user_id,
+        'changed_at': _isoformat(activity.created_at),
+    }
+
+
+def notification_message(notification):
+    """A new notification, for its recipient"""
+    return user_group(notification.recipient_id), 'notification.created', {
+        'id': str(notification.pk),
+        'title': notification.title,
+        'message': notification.message,
+        'notification_type': notification.notification_type,
+        'project_id': str(notification.project_id) if notification.project_id else None,
+        'task_id': str(notification.task_id) if notification.task_id else None,
+        'created_at': _isoformat(notification.created_at),
+    }
+
+
+def comment_message(comment, project_id, event):
+    """A comment created, updated or deleted"""
+    data = {'id': str(comment.pk), 'task_id': str(comment.task_id)}
+    if event != 'comment.deleted':
+        data.update({
+            'author_id': comment.author_id,
+            'author_name': comment.author.get_full_name() or comment.author.username,
+            'content': comment.content,
+            'created_at': _isoformat(comment.created_at),
+            'updated_at': _isoformat(comment.updated_at),
+        })
+    return project_group(project_id), event, data
+
+
+def membership_removed_message(user_id, project_id):
+    """Tells the user's open pages of a project to disconnect"""
+    return user_group(user_id), 'membership.removed', {'project_id': str(project_id)}
@@ -0,0 +1,107 @@
+"""
+Due-soon and overdue reminders for the assignees of open tasks.
+
+``sweep_due_reminders`` is meant to run periodically (``manage.py
+send_due_reminders``). It reads the open tasks due within a window around
+now with one range query on the indexed ``due_date``, streamed in chunks,
+and for every chunk:
+
+- reads the assignees of the chunk's tasks with one query
+- saves the notifications with ``Notification.bulk_deliver``, which drops
+  those of users who turned off ``app_due_reminders`` with one preference
+  query and writes the rest with one bulk_create
+- marks the tasks as reminded with one UPDATE
+
+The marks (``Task.due_soon_reminded_for`` and ``Task.overdue_reminded_for``)
+hold the due date that was reminded, so every task is reminded once per
+kind, and again if its due date is moved. Memory stays bounded by the chunk
+size whatever the number of open tasks.
+"""
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from task_management.models import Task
+from .models import Notification
+
+DUE_SOON_HOURS = 24
+# Tasks overdue for longer than this when first swept are not reminded
+OVERDUE_LOOKBACK_DAYS = 7
+SWEEP_BATCH_SIZE = 1000
+
+Assignment = Task.assigned_to.through
+
+
+def _due_reminder(recipient_id, task, overdue):
+    due = timezone.localtime(task['due_date']).strftime('%b %d, %Y %H:%M')
+    if overdue:
+        title = f"Task Overdue: {task['title']}"
+        message = f"Task '{task['title']}' in project '{task['project__name']}' was due {due}."
+    else:
+        title = f"Task Due Soon: {task['title']}"
+        message = f"Task '{task['title']}' in project '{task['project__name']}' is due {due}."
+    return Notification(
+        recipient_id=recipient_id,
+        title=title,
+        message=message,
+        notification_type='task_overdue' if overdue else 'task_due_soon',
+        project_id=task['project_id'],
+        task_id=task['id'],
+        extra_data={'due_date': task['due_date'].isoformat()},
+    )
+
+
+def _remind(tasks, now):
+    """Notify the assignees of a chunk of tasks and mark the tasks; returns the notifications saved"""
+    assignees = defaultdict(list)
+    for task_id, user_id in Assignment.objects.filter(
+        task_id__in=[task['id'] for task in tasks]
+    ).values_list('task_id', 'user_id'):
+        assignees[task_id].append(user_id)
+
+    notifications = []
+    marked = {'due_soon_reminded_for': [], 'overdue_reminded_for': []}
+    for task in tasks:
+        overdue = task['due_date'] <= now
+        marked['overdue_reminded_for' if overdue else 'due_soon_reminded_for'].append(task['id'])
+        notifications.extend(_due_reminder(user_id, task, overdue) for user_id in assignees[task['id']])
+
+    with transaction.atomic():
+        notifications = Notification.bulk_deliver(notifications)
+        for field, task_ids in marked.items():
+            if task_ids:
+                # update() leaves updated_at alone: the task itself did not change
+                Task.objects.filter(pk__in=task_ids).update(**{field: F('due_date')})
+    return notifications
+
+
+def sweep_due_reminders(now=None, due_soon_hours=DUE_SOON_HOURS, overdue_days=OVERDUE_LOOKBACK_DAYS,
+                        batch_size=SWEEP_BATCH_SIZE):
+    """Remind the assignees of open tasks due soon or overdue; returns counts of tasks and notifications by type"""
+    now = now or timezone.now()
+    not_reminded_soon = Q(due_soon_reminded_for__isnull=True) | ~Q(due_soon_reminded_for=F('due_date'))
+    not_reminded_overdue = Q(overdue_reminded_for__isnull=True) | ~Q(overdue_reminded_for=F('due_date'))
+    tasks = Task.objects.filter(
+        due_date__gte=now - timedelta(days=overdue_days),
+        due_date__lt=now + timedelta(hours=due_soon_hours),
+        project__pending_deletion=False,
+    ).exclude(status='completed').filter(
+        (Q(due_date__gt=now) & not_reminded_soon) | (Q(due_date__lte=now) & not_reminded_overdue)
+    ).order_by().values('id', 'title', 'due_date', 'project_id', 'project__name')
+
+    counts = Counter()
+    chunk = []
+    # Only the marks of tasks already read are written while iterating
+    for task in tasks.iterator(chunk_size=batch_size):
+        chunk.append(task)
+        if len(chunk) >= batch_size:
+            counts['tasks'] += len(chunk)
+            counts.update(notification.notification_type for notification in _remind(chunk, now))
+            chunk = []
+    if chunk:
+        counts['tasks'] += len(chunk)
+        counts.update(notification.notification_type for notification in _remind(chunk, now))
+    return counts
@@ -0,0 +1,27 @@
+"""
+Signal handlers keeping cached unread counters and cached queries in sync
+with notifications, and pushing new notifications to their recipients.
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from project_manager.caching import bump_version, notification_scope
+from .counters import adjust_unread_count
+from .models import Notification
+from .realtime import broadcast, notification_message
+
+
+@receiver(post_save, sender=Notification)
+def notification_saved(sender, instance, created, **kwargs):
+    if created and not instance.is_read:
+        adjust_unread_count(instance.recipient_id, 1)
+    if created:
+        broadcast([notification_message(instance)])
+    bump_version(notification_scope(instance.recipient_id))
+
+
+@receiver(post_delete, sender=Notification)
+def notification_deleted(sender, instance, **kwargs):
+    if not instance.is_read:
+        adjust_unread_count(instance.recipient_id, -1)
+    bump_version(notification_scope(instance.recipient_id))
@@ -1,3 +1,169 @@
+from datetime import timedelta
+
+from django.core import mail
 from django.test import TestCase
+from django.utils import timezone
+
+from accounts.models import User
+from projects.models import Project
+from task_management.models import Task
+from .digests import DIGEST_GRACE, send_digests
+from .models import Notification, NotificationPreference
+from .reminders import OVERDUE_LOOKBACK_DAYS, sweep_due_reminders
+
+
+class DueReminderTests(TestCase):
+    """``sweep_due_reminders``"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('alice', 'alice@example.com', 'password')
+        cls.assignee = User.objects.create_user('bob', 'bob@example.com', 'password')
+        cls.project = Project.objects.create(name='Launch', owner=cls.owner)
+
+    def setUp(self):
+        self.now = timezone.now()
+
+    def create(self, due_in, status='todo', project=None):
+        task = Task.objects.create(
+            project=project or self.project, title='Ship it', status=status,
+            created_by=self.owner, due_date=self.now + due_in,
+        )
+        task.assigned_to.add(self.assignee)
+        return task
+
+    def reminders(self, notification_type):
+        return Notification.objects.filter(recipient=self.assignee, notification_type=notification_type).count()
+
+    def test_one_reminder_per_kind(self):
+        self.create(timedelta(hours=2))
+        counts = sweep_due_reminders(now=self.now)
+        self.assertEqual(counts['tasks'], 1)
+        self.assertEqual(counts['task_due_soon'], 1)
+        self.assertEqual(sweep_due_reminders(now=self.now + timedelta(hours=1))['tasks'], 0)
+
+        counts = sweep_due_reminders(now=self.now + timedelta(hours=3))
+        self.assertEqual(counts['task_overdue'], 1)
+        self.assertEqual(sweep_due_reminders(now=self.now + timedelta(hours=4))['tasks'], 0)
+        self.assertEqual(self.reminders('task_due_soon'), 1)
+        self.assertEqual(self.reminders('task_overdue'), 1)
+
+    def test_moving_the_due_date_reminds_again(self):
+        task = self.create(timedelta(hours=2))
+        sweep_due_reminders(now=self.now)
+        task.due_date = self.now + timedelta(hours=5)
+        task.save()
+        self.assertEqual(sweep_due_reminders(now=self.now)['task_due_soon'], 1)
+        self.assertEqual(self.reminders('task_due_soon'), 2)
+
+    def test_tasks_due_later_are_not_reminded_yet(self):
+        self.create(timedelta(days=3))
+        self.assertEqual(sweep_due_reminders(now=self.now)['tasks'], 0)
+
+    def test_disabled_in_app_reminders_are_dropped_but_the_task_is_marked(self):
+        NotificationPreference.objects.create(user=self.assignee, app_due_reminders=False)
+        task = self.create(timedelta(hours=2))
+        counts = sweep_due_reminders(now=self.now)
+        self.assertEqual(counts['tasks'], 1)
+        self.assertEqual(self.reminders('task_due_soon'), 0)
+        task.refresh_from_db()
+        self.assertEqual(task.due_soon_reminded_for, task.due_date)
+
+    def test_overdue_lookback(self):
+        self.create(-timedelta(days=OVERDUE_LOOKBACK_DAYS, hours=1))
+        self.create(-timedelta(days=OVERDUE_LOOKBACK_DAYS - 1))
+        counts = sweep_due_reminders(now=self.now)
+        self.assertEqual(counts['tasks'], 1)
+        self.assertEqual(counts['task_overdue'], 1)
+
+    def test_completed_tasks_and_projects_pending_deletion_are_skipped(self):
+        self.create(timedelta(hours=2), status='completed')
+        hidden = Project.objects.create(name='Going away', owner=self.owner, pending_deletion=True)
+        self.create(timedelta(hours=2), project=hidden)
+        self.assertEqual(sweep_due_reminders(now=self.now)['tasks'], 0)
+
+
+class DigestTests(TestCase):
+    """``send_digests``, with the test runner's locmem email backend"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('bob', 'bob@example.com', 'password')
+
+    def setUp(self):
+        self.now = timezone.now()
+
+    def notify(self, title, ago=timedelta(hours=1), notification_type='task_assigned'):
+        notification = Notification.objects.create(
+            recipient=self.user, title=title, message='Details', notification_type=notification_type,
+        )
+        Notification.objects.filter(pk=notification.pk).update(created_at=self.now - ago)
+        return notification
+
+    def prefer(self, **preferences):
+        NotificationPreference.objects.update_or_create(user=self.user, defaults=preferences)
+
+    def sent_titles(self):
+        return [[line for line in message.body.splitlines() if line.startswith('- ')] for message in mail.outbox]
+
+    def test_users_without_preferences_get_a_daily_digest(self):
+        self.notify('Assigned: Ship it')
+        counts = send_digests(now=self.now)
+        self.assertEqual(counts['sent'], 1)
+        self.assertEqual(mail.outbox[0].to, ['bob@example.com'])
+        self.assertIn('daily', mail.outbox[0].subject)
+        self.assertEqual(self.sent_titles(), [['- Assigned: Ship it']])
+        preferences = NotificationPreference.objects.get(user=self.user)
+        self.assertEqual(preferences.last_digest_at, self.now)
+
+    def test_watermark_prevents_a_resend(self):
+        self.notify('Old news')
+        send_digests(now=self.now)
+        later = self.now + timedelta(days=1)
+        self.assertEqual(send_digests(now=later)['sent'], 0)
+
+        self.notify('Fresh news', ago=-timedelta(hours=12))
+        self.assertEqual(send_digests(now=later)['sent'], 1)
+        self.assertEqual(self.sent_titles()[-1], ['- Fresh news'])
+
+    def test_read_notifications_are_left_out(self):
+        self.notify('Already seen').mark_as_read()
+        self.assertEqual(send_digests(now=self.now)['sent'], 0)
+
+    def test_daily_digest_is_due_within_the_grace_window(self):
+        self.prefer(digest_frequency='daily', last_digest_at=self.now - timedelta(days=1) + DIGEST_GRACE / 2)
+        self.notify('Within grace', ago=timedelta(minutes=5))
+        self.assertEqual(send_digests(now=self.now)['sent'], 1)
+
+    def test_daily_digest_is_not_due_before_the_grace_window(self):
+        self.prefer(digest_frequency='daily', last_digest_at=self.now - timedelta(days=1) + DIGEST_GRACE * 2)
+        self.notify('Too early', ago=timedelta(minutes=5))
+        self.assertEqual(send_digests(now=self.now)['sent'], 0)
+
+    def test_weekly_digest(self):
+        self.prefer(digest_frequency='weekly', last_digest_at=self.now - timedelta(days=3))
+        self.notify('This week', ago=timedelta(days=1))
+        self.assertEqual(send_digests(now=self.now)['sent'], 0)
+        self.assertEqual(send_digests(now=self.now + timedelta(days=4))['sent'], 1)
+        self.assertIn('weekly', mail.outbox[0].subject)
+
+    def test_other_frequencies_get_no_digest(self):
+        self.prefer(digest_frequency='never')
+        self.notify('Never mind')
+        self.assertEqual(send_digests(now=self.now)['sent'], 0)
+
+    def test_email_flags_filter_items(self):
+        self.prefer(email_comments=False)
+        self.notify('New comment', notification_type='comment_added')
+        self.notify('Assigned: Ship it')
+        send_digests(now=self.now)
+        self.assertEqual(self.sent_titles(), [['- Assigned: Ship it']])
+        self.assertIn('1 unread notification', mail.outbox[0].subject)
 
-# Create your tests here.
+    def test_digest_with_only_filtered_items_is_skipped_but_moves_the_watermark(self):
+        # email_task_updates is off by default
+        self.notify('Status changed', notification_type='task_updated')
+        counts = send_digests(now=self.now)
+        self.assertEqual((counts['sent'], counts['skipped']), (0, 1))
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(NotificationPreference.objects.get(user=self.user).last_digest_at, self.now)
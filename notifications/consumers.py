@@ -0,0 +1,67 @@
+from channels.db import database_sync_to_async
+from django.contrib.auth import get_user_model
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+
+from notification_system.realtime import project_group, user_group
+from projects.permissions import get_project_roles
+
+# Close codes sent when a connection is refused or revoked
+UNAUTHENTICATED = 4401
+FORBIDDEN = 4403
+
+
+class UpdatesConsumer(AsyncJsonWebsocketConsumer):
+    """
+    Live change events for the signed-in user.
+
+    At ``ws/notifications/`` the socket receives the user's own events, such
+    as new notifications. At ``ws/project/<project_id>/`` it also receives the
+    task and comment events of that project, as long as the user has access
+    to it. Events are sent as ``{"event": ..., "data": {...}}``.
+    """
+
+    async def connect(self):
+        self.joined_groups = []
+        user = self.scope['user']
+        if not user.is_authenticated:
+            await self.close(code=UNAUTHENTICATED)
+            return
+
+        self.project_id = self.scope['url_route']['kwargs'].get('project_id')
+        groups = [user_group(user.pk)]
+        if self.project_id is not None:
+            if not await self._has_access(user.pk, self.project_id):
+                await self.close(code=FORBIDDEN)
+                return
+            groups.append(project_group(self.project_id))
+
+        for group in groups:
+            await self.channel_layer.group_add(group, self.channel_name)
+        self.joined_groups = groups
+        await self.accept()
+
+    async def disconnect(self, code):
+        for group in self.joined_groups:
+            await self.channel_layer.group_discard(group, self.channel_name)
+
+    async def receive_json(self, content, **kwargs):
+        # Clients only listen; answer pings so they can detect dead sockets
+        if content.get('type') == 'ping':
+            await self.send_json({'event': 'pong', 'data': {}})
+
+    async def push_event(self, message):
+        """Forward an event sent by ``notification_system.realtime``"""
+        event, data = message['event'], message['data']
+        if event == 'membership.removed':
+            # The user may still own the project or have been re-added
+            if self.project_id is not None and data['project_id'] == str(self.project_id):
+                if not await self._has_access(self.scope['user'].pk, self.project_id):
+                    await self.close(code=FORBIDDEN)
+            return
+        await self.send_json({'event': event, 'data': data})
+
+    @database_sync_to_async
+    def _has_access(self, user_id, project_id):
+        # A fresh user, since roles are memoized on the instance
+        user = get_user_model().objects.get(pk=user_id)
+        return project_id in get_project_roles(user)
@@ -0,0 +1,8 @@
+from django.urls import path
+
+from . import consumers
+
+websocket_urlpatterns = [
+    path('ws/notifications/', consumers.UpdatesConsumer.as_asgi()),
+    path('ws/project/<uuid:project_id>/', consumers.UpdatesConsumer.as_asgi()),
+]
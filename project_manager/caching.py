@@ -0,0 +1,117 @@
+"""
+Shared query caching with versioned, scope-based invalidation.
+
+Cached values are stored under keys that embed the current version of every
+scope they depend on (a project, a user, a user's notifications). Signal
+handlers bump the version of a scope when one of its rows is saved or
+deleted, so stale entries are never read again and simply expire. Bumps
+wait for the surrounding transaction to commit: bumped earlier, a concurrent
+request could still read the old rows and cache them under the new version. Views opt
+in with ``cached_query`` instead of inventing their own keys::
+
+    members = cached_query(
+        'project_members', lambda: load_members(project),
+        scopes=[project_scope(project.pk)], args=[project.pk],
+    )
+
+A process-local cache (``CACHE_BACKEND = 'locmem'``) never sees the version
+bumps of other processes, so there every timeout, versions included, is cut
+to ``LOCAL_CACHE_TIMEOUT`` by ``cache_timeout``.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+
+DEFAULT_TIMEOUT = 5 * 60
+DEFAULT_LOCAL_TIMEOUT = 30
+
+_VERSION_PREFIX = 'cachever'
+
+
+def project_scope(project_id):
+    """Scope of everything derived from a project, its tasks and its members"""
+    return f'project:{project_id}'
+
+
+def user_scope(user_id):
+    """Scope of everything derived from a user's memberships"""
+    return f'user:{user_id}'
+
+
+def notification_scope(user_id):
+    """Scope of everything derived from a user's notifications"""
+    return f'notifications:{user_id}'
+
+
+def cache_timeout(timeout, backend=None):
+    """``timeout`` (None: forever) capped to LOCAL_CACHE_TIMEOUT when ``backend``
+    (the default cache unless given) is process-local"""
+    if not isinstance(backend or caches['default'], LocMemCache):
+        return timeout
+    local = getattr(settings, 'LOCAL_CACHE_TIMEOUT', DEFAULT_LOCAL_TIMEOUT)
+    return local if timeout is None else min(timeout, local)
+
+
+def _version_key(scope):
+    return f'{_VERSION_PREFIX}:{scope}'
+
+
+def _new_version():
+    # Time based, so a version lost to eviction never revives old entries
+    return int(time.time() * 1000)
+
+
+def get_versions(scopes):
+    """Current version of each scope, creating missing ones, in one round trip"""
+    keys = {scope: _version_key(scope) for scope in scopes}
+    found = cache.get_many(keys.values())
+    versions = {}
+    for scope, key in keys.items():
+        version = found.get(key)
+        if version is None:
+            version = _new_version()
+            if not cache.add(key, version, cache_timeout(None)):
+                version = cache.get(key, version)
+        versions[scope] = version
+    return versions
+
+
+def bump_version(*scopes):
+    """Invalidate every cached value that depends on any of ``scopes`` once the transaction commits"""
+    # Materialized now: callers may pass a generator over rows changed later
+    scopes = list(scopes)
+    transaction.on_commit(lambda: _bump_versions(scopes))
+
+
+def _bump_versions(scopes):
+    for scope in scopes:
+        key = _version_key(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _new_version(), cache_timeout(None))
+
+
+def make_key(name, scopes=(), args=()):
+    """Cache key for ``name`` called with ``args`` under the current scope versions"""
+    versions = get_versions(scopes)
+    parts = [name, *map(str, args), *(f'{scope}@{versions[scope]}' for scope in scopes)]
+    return 'q:' + ':'.join(parts)
+
+
+def cached_query(name, compute, scopes=(), args=(), timeout=DEFAULT_TIMEOUT):
+    """
+    Return the cached result of ``compute()``, computing and storing it on a miss.
+
+    ``name`` and ``args`` identify the query, ``scopes`` list what it depends on
+    and ``timeout`` bounds how long a result may be served.
+    """
+    key = make_key(name, scopes, args)
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        cache.set(key, value, cache_timeout(timeout))
+    return value
@@ -0,0 +1,110 @@
+"""
+Conditional GET support driven by the cache scope versions.
+
+Every write that can change what a project page shows already bumps the
+version of the project's cache scope (see ``project_manager.caching``), so
+the versions of the scopes a response depends on make a cheap fingerprint:
+a single ``get_many`` on the cache, no queries. The fingerprint is hashed
+together with the viewer and the requested URL into a weak ETag, and a
+request whose ``If-None-Match`` still matches is answered with a 304 before
+the view touches the database or renders anything::
+
+    @login_required
+    @conditional_on_scopes(lambda request, project_id: [project_scope(project_id)])
+    def project_board(request, project_id):
+        ...
+"""
+import hashlib
+from functools import wraps
+
+from django.contrib import messages
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.views.decorators.http import condition
+
+from .caching import get_versions, notification_scope, user_scope
+
+
+def scope_etag(request, scopes):
+    """Weak ETag of the response to ``request`` given the scopes it depends on"""
+    user = request.user
+    scopes = [*scopes, user_scope(user.pk)]
+    versions = get_versions(scopes)
+    parts = [
+        str(user.pk), user.get_username(), user.get_full_name(),
+        # Rendered forms embed the CSRF token, which changes on login
+        request.META.get('CSRF_COOKIE') or '',
+        request.get_full_path(),
+        *(f'{scope}@{versions[scope]}' for scope in sorted(set(scopes))),
+    ]
+    digest = hashlib.md5('\n'.join(parts).encode(), usedforsecurity=False).hexdigest()
+    return f'W/"{digest}"'
+
+
+def _has_pending_messages(request):
+    # A 304 would leave flash messages queued for a later page
+    return len(messages.get_messages(request)) > 0
+
+
+def conditional_on_scopes(scopes_func):
+    """
+    Make a function view answer unchanged GETs with 304.
+
+    ``scopes_func`` is called with the view's arguments and returns the cache
+    scopes the page depends on, or None to skip the check (e.g. when the
+    object does not exist). Pages also depend on the viewer's notifications,
+    whose unread count is shown in the navigation bar.
+    """
+    def etag_func(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD') or not request.user.is_authenticated:
+            return None
+        if _has_pending_messages(request):
+            return None
+        scopes = scopes_func(request, *args, **kwargs)
+        if scopes is None:
+            return None
+        return scope_etag(request, [*scopes, notification_scope(request.user.pk)])
+
+    def decorator(view_func):
+        conditional_view = condition(etag_func=etag_func)(view_func)
+
+        @wraps(view_func)
+        def inner(request, *args, **kwargs):
+            response = conditional_view(request, *args, **kwargs)
+            if not (200 <= response.status_code < 300 or response.status_code == 304):
+                # Redirects and errors are not revalidated
+                del response['ETag']
+            elif response.has_header('ETag'):
+                # Browsers must revalidate instead of reusing the page as is
+                patch_cache_control(response, private=True, no_cache=True)
+            return response
+        return inner
+    return decorator
+
+
+class ConditionalGetMixin:
+    """
+    ViewSet mixin answering unchanged ``list`` and ``retrieve`` calls with 304.
+
+    Subclasses implement ``get_etag_scopes()``, returning the cache scopes the
+    response depends on or None to skip the check.
+    """
+
+    def get_etag_scopes(self):
+        return None
+
+    def _conditional(self, request, respond):
+        scopes = self.get_etag_scopes()
+        etag = scope_etag(request, scopes) if scopes is not None else None
+        response = get_conditional_response(request, etag=etag) if etag else None
+        if response is None:
+            response = respond()
+            if etag and 200 <= response.status_code < 300:
+                response['ETag'] = etag
+                patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self._conditional(request, lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._conditional(request, lambda: super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs))
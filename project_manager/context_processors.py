@@ -5,15 +5,13 @@ Context processors for global template variables
 def notification_count(request):
     """
     Add unread notification count to template context
+    
+    The count is evaluated lazily, only when a template reads it.
     """
     if request.user.is_authenticated:
         try:
-            from notification_system.models import Notification
-            unread_count = Notification.objects.filter(
-                recipient=request.user,
-                is_read=False
-            ).count()
-            return {'unread_notifications_count': unread_count}
+            from notification_system.counters import LazyUnreadCount
+            return {'unread_notifications_count': LazyUnreadCount(request.user)}
         except Exception:
             # Handle case where notification_system might not be available
             return {'unread_notifications_count': 0}
@@ -0,0 +1,206 @@
+"""
+Per-request instrumentation: SQL queries, template rendering and latency.
+
+``RequestMetricsMiddleware`` measures every request and tags it with the
+resolved URL name (``projects:project_list``, ``tasks:task_detail``...):
+
+- the number of SQL queries and the time spent in them, through a database
+  execute wrapper, so it works without ``DEBUG``
+- the time spent rendering templates, through ``TimedDjangoTemplates``
+- the total time spent in the middleware stack below it
+
+The measures are sent back in a ``Server-Timing`` header, which browser dev
+tools display next to the request, and the last ``REQUEST_METRICS_WINDOW``
+requests of every URL name are kept in memory for rolling percentiles (see
+``metrics_snapshot`` and the staff-only ``/metrics/requests/`` page). Each
+process keeps its own window.
+
+Views declare the most queries they should need with ``query_budget``;
+requests going over budget are logged, and ``project_manager.testing``
+asserts the budgets in tests.
+"""
+import logging
+import math
+import threading
+import time
+from collections import deque
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from django.template.backends.django import DjangoTemplates
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WINDOW = 500
+PERCENTILES = (50, 95, 99)
+
+_current = ContextVar('request_metrics', default=None)
+_lock = threading.Lock()
+_samples = {}
+
+
+class RequestMetrics:
+    """Measures of one request, in seconds"""
+    __slots__ = ('queries', 'sql_time', 'template_time', 'total_time')
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.total_time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        # Database execute wrapper
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.sql_time += time.perf_counter() - start
+
+
+def current_metrics():
+    """Measures of the request being handled, or None outside of one"""
+    return _current.get()
+
+
+def query_budget(limit):
+    """Declare the most queries a view should run; see ``view_query_budget``"""
+    def decorator(view_func):
+        view_func.query_budget = limit
+        return view_func
+    return decorator
+
+
+def view_query_budget(view_func):
+    """Query budget of a resolved view function, or None"""
+    return getattr(view_func, 'query_budget', None)
+
+
+def server_timing(metrics):
+    """``Server-Timing`` header value of a request's measures"""
+    return ', '.join([
+        f'sql;dur={metrics.sql_time * 1000:.1f};desc="{metrics.queries} queries"',
+        f'tpl;dur={metrics.template_time * 1000:.1f};desc="Templates"',
+        f'total;dur={metrics.total_time * 1000:.1f}',
+    ])
+
+
+def record(view_name, metrics):
+    """Add a request's measures to the rolling window of its URL name"""
+    window = getattr(settings, 'REQUEST_METRICS_WINDOW', DEFAULT_WINDOW)
+    sample = (metrics.total_time, metrics.sql_time, metrics.template_time, metrics.queries)
+    with _lock:
+        samples = _samples.get(view_name)
+        if samples is None or samples.maxlen != window:
+            samples = _samples[view_name] = deque(samples or (), maxlen=window)
+        samples.append(sample)
+
+
+def reset_metrics():
+    with _lock:
+        _samples.clear()
+
+
+def percentiles(values):
+    """p50/p95/p99 and max of a sequence of numbers (nearest rank)"""
+    values = sorted(values)
+    summary = {
+        f'p{percentile}': values[max(0, math.ceil(len(values) * percentile / 100) - 1)]
+        for percentile in PERCENTILES
+    }
+    summary['max'] = values[-1]
+    return summary
+
+
+def metrics_snapshot():
+    """
+    Rolling percentiles per URL name, slowest p95 first.
+
+    Times are in milliseconds: ``{view_name: {'count', 'total_ms', 'sql_ms',
+    'template_ms', 'queries'}}``, each measure with p50/p95/p99/max.
+    """
+    with _lock:
+        windows = {view_name: list(samples) for view_name, samples in _samples.items()}
+    snapshot = {}
+    for view_name, samples in windows.items():
+        total, sql, template, queries = zip(*samples)
+        snapshot[view_name] = {
+            'count': len(samples),
+            'total_ms': percentiles(round(value * 1000, 2) for value in total),
+            'sql_ms': percentiles(round(value * 1000, 2) for value in sql),
+            'template_ms': percentiles(round(value * 1000, 2) for value in template),
+            'queries': percentiles(queries),
+        }
+    return dict(sorted(snapshot.items(), key=lambda item: item[1]['total_ms']['p95'], reverse=True))
+
+
+class RequestMetricsMiddleware:
+    """Measure requests; keep it first in MIDDLEWARE so the total covers the others"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(metrics))
+                response = self.get_response(request)
+        finally:
+            metrics.total_time = time.perf_counter() - start
+            _current.reset(token)
+
+        if getattr(settings, 'REQUEST_METRICS_SERVER_TIMING', True):
+            response['Server-Timing'] = server_timing(metrics)
+        match = request.resolver_match
+        if match is not None:
+            record(match.view_name, metrics)
+            budget = view_query_budget(match.func)
+            if budget is not None and metrics.queries > budget:
+                logger.warning(
+                    '%s ran %d queries, over its budget of %d (%s)',
+                    match.view_name, metrics.queries, budget, request.path,
+                )
+        return response
+
+
+class _TimedTemplate:
+    """Template wrapper adding its render time to the current request's measures"""
+
+    def __init__(self, template):
+        self.template = template
+
+    def __getattr__(self, name):
+        return getattr(self.template, name)
+
+    def render(self, context=None, request=None):
+        metrics = _current.get()
+        if metrics is None:
+            return self.template.render(context, request)
+        start = time.perf_counter()
+        try:
+            return self.template.render(context, request)
+        finally:
+            metrics.template_time += time.perf_counter() - start
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """
+    Django template backend timing top-level renders.
+
+    Included and extended templates render inside their parent, so each
+    page is timed once. Queries run by lazy querysets while rendering count
+    both as SQL and as template time.
+    """
+
+    def from_string(self, template_code):
+        return _TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return _TimedTemplate(super().get_template(template_name))
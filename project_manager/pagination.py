@@ -0,0 +1,17 @@
+"""
+Pagination classes shared by the REST API.
+"""
+from rest_framework.pagination import CursorPagination
+
+
+class CreatedAtCursorPagination(CursorPagination):
+    """
+    Newest first keyset pagination on (created_at, id).
+
+    Every page is fetched with ``WHERE created_at < <cursor>`` instead of an
+    OFFSET, so deep pages cost the same as the first one.
+    """
+    ordering = ('-created_at', '-id')
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
@@ -0,0 +1,261 @@
+"""
+Opt-in request profiling, for finding out where slow pages spend their time.
+
+With ``REQUEST_PROFILING = True``, ``RequestProfilingMiddleware`` profiles:
+
+- a random ``REQUEST_PROFILING_SAMPLE_RATE`` share of the requests, under
+  cProfile (deterministic, every Python call, noticeable overhead)
+- any other request slower than ``REQUEST_PROFILING_SLOW_MS``: all requests
+  are watched by a stack sampler thread, which records where they are every
+  ``REQUEST_PROFILING_INTERVAL_MS``, and the samples are kept only for the
+  requests that turned out slow
+
+Both record the SQL statements run with their timings. Profiles are written
+as JSON (plus the cProfile ``.prof`` dump) under ``REQUEST_PROFILING_DIR``,
+one directory per URL name, keeping the ``REQUEST_PROFILING_KEEP`` slowest
+of each. Staff users browse them at ``/metrics/profiles/``.
+"""
+import cProfile
+import json
+import logging
+import os
+import random
+import re
+import secrets
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack
+from functools import lru_cache
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SLOW_MS = 1000
+DEFAULT_KEEP = 20
+DEFAULT_INTERVAL_MS = 5
+
+# Statements recorded per profile; the rest are only counted
+MAX_STATEMENTS = 500
+# Distinct stacks written per profile, most sampled first
+MAX_STACKS = 300
+
+# Directory and file names of stored profiles; no '..'
+NAME_RE = re.compile(r'^\w[\w.-]*$')
+
+# cProfile can only profile one thread at a time on Python 3.12+
+_cprofile_lock = threading.Lock()
+
+
+def profiles_dir():
+    return Path(getattr(settings, 'REQUEST_PROFILING_DIR', Path(settings.BASE_DIR) / 'profiles'))
+
+
+class SQLRecorder:
+    """Database execute wrapper recording statements and their durations"""
+
+    def __init__(self):
+        self.statements = []
+        self.count = 0
+        self.time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.count += 1
+            self.time += duration
+            if len(self.statements) < MAX_STATEMENTS:
+                self.statements.append((sql, duration))
+
+
+@lru_cache(maxsize=4096)
+def _short_filename(filename):
+    """``filename`` relative to the project or to the import path it was found on"""
+    for root in sorted({str(settings.BASE_DIR), *sys.path}, key=len, reverse=True):
+        if root and filename.startswith(root + os.sep):
+            return filename[len(root) + 1:]
+    return filename
+
+
+def _collapsed_stack(frame):
+    """Frames from the thread's entry point down to ``frame``, joined with ';'"""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f'{_short_filename(code.co_filename)}:{code.co_qualname}')
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+class StackSampler:
+    """
+    Daemon thread sampling the stacks of the threads it watches.
+
+    Samples are counted per collapsed stack, the format flame graph tools
+    read. The thread idles while nothing is watched.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._watched = {}
+        self._active = threading.Event()
+        self._thread = None
+
+    def watch(self, thread_id):
+        """Start sampling a thread; returns the Counter its samples go to"""
+        samples = Counter()
+        with self._lock:
+            self._watched[thread_id] = samples
+            self._active.set()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+                self._thread.start()
+        return samples
+
+    def unwatch(self, thread_id):
+        with self._lock:
+            self._watched.pop(thread_id, None)
+            if not self._watched:
+                self._active.clear()
+
+    def _run(self):
+        while True:
+            self._active.wait()
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            with self._lock:
+                for thread_id, samples in self._watched.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        samples[_collapsed_stack(frame)] += 1
+            del frames
+
+
+def save_profile(view_name, profile, profiler=None):
+    """Write a profile to the directory of its URL name and prune that directory"""
+    directory = profiles_dir() / view_name.replace(':', '__')
+    directory.mkdir(parents=True, exist_ok=True)
+    # Names sort by duration, so the slowest profiles are listed first
+    name = f'{profile["duration_ms"]:08d}-{timezone.now():%Y%m%d%H%M%S}-{secrets.token_hex(3)}'
+    if profiler is not None:
+        profiler.dump_stats(directory / f'{name}.prof')
+    with open(directory / f'{name}.json', 'w') as f:
+        json.dump(profile, f)
+    prune_profiles(directory)
+    return name
+
+
+def prune_profiles(directory):
+    """Delete all but the slowest ``REQUEST_PROFILING_KEEP`` profiles of a directory"""
+    keep = getattr(settings, 'REQUEST_PROFILING_KEEP', DEFAULT_KEEP)
+    names = sorted((path.stem for path in directory.glob('*.json')), reverse=True)
+    for name in names[keep:]:
+        for suffix in ('.json', '.prof'):
+            (directory / f'{name}{suffix}').unlink(missing_ok=True)
+
+
+def list_profiles():
+    """Summaries of the stored profiles per URL name, slowest first"""
+    root = profiles_dir()
+    if not root.is_dir():
+        return {}
+    listing = {}
+    for directory in sorted(root.iterdir()):
+        if not directory.is_dir():
+            continue
+        summaries = []
+        for path in sorted(directory.glob('*.json'), reverse=True):
+            try:
+                with open(path) as f:
+                    profile = json.load(f)
+            except (OSError, ValueError):
+                continue
+            profile.pop('sql', None)
+            profile.pop('stacks', None)
+            profile['name'] = path.stem
+            summaries.append(profile)
+        if summaries:
+            listing[directory.name] = summaries
+    return dict(sorted(listing.items(), key=lambda item: item[1][0]['duration_ms'], reverse=True))
+
+
+def profile_path(directory, name, suffix):
+    """Path of a stored profile file, or None for names that could escape the directory"""
+    if not (NAME_RE.match(directory) and NAME_RE.match(name)):
+        return None
+    return profiles_dir() / directory / f'{name}{suffix}'
+
+
+class RequestProfilingMiddleware:
+    """Profile sampled and slow requests; disabled unless REQUEST_PROFILING is set"""
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'REQUEST_PROFILING', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, 'REQUEST_PROFILING_SAMPLE_RATE', 0)
+        self.slow_ms = getattr(settings, 'REQUEST_PROFILING_SLOW_MS', DEFAULT_SLOW_MS)
+        interval = getattr(settings, 'REQUEST_PROFILING_INTERVAL_MS', DEFAULT_INTERVAL_MS)
+        self.sampler = StackSampler(interval / 1000) if self.slow_ms is not None else None
+
+    def __call__(self, request):
+        profiler = None
+        if random.random() < self.sample_rate and _cprofile_lock.acquire(blocking=False):
+            profiler = cProfile.Profile()
+        elif self.sampler is None:
+            return self.get_response(request)
+
+        thread_id = threading.get_ident()
+        recorder = SQLRecorder()
+        samples = None
+        started_at = timezone.now()
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(recorder))
+                if profiler is not None:
+                    profiler.enable()
+                else:
+                    samples = self.sampler.watch(thread_id)
+                response = self.get_response(request)
+        finally:
+            duration_ms = round((time.perf_counter() - start) * 1000)
+            if profiler is not None:
+                profiler.disable()
+                _cprofile_lock.release()
+            else:
+                self.sampler.unwatch(thread_id)
+
+        match = request.resolver_match
+        if match is None or (profiler is None and duration_ms < self.slow_ms):
+            return response
+        profile = {
+            'view_name': match.view_name,
+            'method': request.method,
+            'path': request.get_full_path(),
+            'status': response.status_code,
+            'started_at': started_at.isoformat(),
+            'duration_ms': duration_ms,
+            'mode': 'cprofile' if profiler is not None else 'sampling',
+            'queries': recorder.count,
+            'sql_ms': round(recorder.time * 1000, 2),
+            'sql': [(sql, round(duration * 1000, 2)) for sql, duration in recorder.statements],
+            'samples': sum(samples.values()) if samples is not None else None,
+            'stacks': samples.most_common(MAX_STACKS) if samples is not None else [],
+        }
+        try:
+            save_profile(match.view_name, profile, profiler)
+        except OSError:
+            logger.exception('Could not save the profile of %s', request.path)
+        return response
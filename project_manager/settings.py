@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -48,6 +49,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so its timings cover the rest of the stack
+    'project_manager.metrics.RequestMetricsMiddleware',
+    # Inactive unless REQUEST_PROFILING is set
+    'project_manager.profiling.RequestProfilingMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -62,7 +67,9 @@ ROOT_URLCONF = 'project_manager.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates, timing renders for the request metrics
+        'BACKEND': 'project_manager.metrics.TimedDjangoTemplates',
+        'NAME': 'django',
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -81,14 +88,98 @@ WSGI_APPLICATION = 'project_manager.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
+#
+# The database profile is chosen with environment variables. DB_ENGINE=sqlite
+# (default) tunes SQLite for concurrent writers: WAL journal, relaxed fsync,
+# a busy timeout instead of immediate "database is locked" errors, memory
+# mapped reads, IMMEDIATE write transactions and persistent connections.
+# DB_ENGINE=postgresql switches to PostgreSQL with psycopg's connection pool.
+
+DB_ENGINE = os.environ.get('DB_ENGINE', 'sqlite')
+
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 20000)),
+    'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', 128 * 1024 * 1024)),
+}
+
+if DB_ENGINE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DB_NAME', 'project_manager'),
+            'USER': os.environ.get('DB_USER', ''),
+            'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+            'HOST': os.environ.get('DB_HOST', 'localhost'),
+            'PORT': os.environ.get('DB_PORT', '5432'),
+            # Connections are reused through the pool, not CONN_MAX_AGE
+            'CONN_MAX_AGE': 0,
+            'OPTIONS': {
+                'pool': {
+                    'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+                    'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', 10)),
+                    'timeout': int(os.environ.get('DB_POOL_TIMEOUT', 10)),
+                },
+            },
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DB_NAME', BASE_DIR / 'db.sqlite3'),
+            'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 600)),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'timeout': SQLITE_PRAGMAS['busy_timeout'] / 1000,
+                'transaction_mode': 'IMMEDIATE',
+                'init_command': ';'.join(
+                    f'PRAGMA {name}={value}' for name, value in SQLITE_PRAGMAS.items()
+                ),
+            },
+        }
+    }
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+#
+# CACHE_BACKEND selects the shared cache tier: 'locmem' (default, per
+# process), 'file' (shared by the processes of one host) or 'redis'.
+
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'locmem')
+
+CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'project-manager',
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('CACHE_LOCATION', BASE_DIR / '.cache'),
+    },
+    'redis': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ.get('REDIS_URL', 'redis://127.0.0.1:6379/1'),
+    },
+}
 
-DATABASES = {
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        **CACHE_BACKENDS[CACHE_BACKEND],
+        'TIMEOUT': int(os.environ.get('CACHE_TIMEOUT', 300)),
+        'KEY_PREFIX': 'project-manager',
+        'OPTIONS': {'MAX_ENTRIES': 10000} if CACHE_BACKEND != 'redis' else {},
     }
 }
 
+# With 'locmem', invalidations (role maps, cache scope versions, counters)
+# only reach the process that made them, so entries there are served for at
+# most LOCAL_CACHE_TIMEOUT seconds. Use 'file' or 'redis' as soon as more than
+# one process serves requests.
+LOCAL_CACHE_TIMEOUT = int(os.environ.get('LOCAL_CACHE_TIMEOUT', 30))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -162,22 +253,65 @@ CORS_ALLOW_ALL_ORIGINS = True  # Only for development
 # Channels configuration for WebSockets
 ASGI_APPLICATION = 'project_manager.asgi.application'
 
-CHANNEL_LAYERS = {
-    'default': {
+# CHANNEL_LAYER selects how WebSocket events reach consumers: 'memory'
+# (default, single process; also used by tests) or 'redis' (REDIS_URL,
+# required as soon as more than one process serves requests).
+
+CHANNEL_LAYER = os.environ.get('CHANNEL_LAYER', 'memory')
+
+CHANNEL_LAYER_BACKENDS = {
+    'memory': {
+        'BACKEND': 'channels.layers.InMemoryChannelLayer',
+    },
+    'redis': {
         'BACKEND': 'channels_redis.core.RedisChannelLayer',
         'CONFIG': {
-            "hosts": [('127.0.0.1', 6379)],
+            'hosts': [os.environ.get('REDIS_URL', 'redis://127.0.0.1:6379/2')],
         },
     },
 }
 
+CHANNEL_LAYERS = {
+    'default': CHANNEL_LAYER_BACKENDS[CHANNEL_LAYER],
+}
+
 # Authentication
 LOGIN_URL = '/accounts/login/'
 LOGIN_REDIRECT_URL = '/'
 LOGOUT_REDIRECT_URL = '/accounts/login/'
 
+# Background project deletion: 'thread' runs jobs on an in-process thread
+# pool, 'command' leaves them for `manage.py run_deletion_jobs`, 'sync' runs
+# them inline (useful in tests)
+PROJECT_DELETION_WORKER = 'thread'
+# Seconds after which `run_deletion_jobs` takes over a running job whose
+# worker died (e.g. a thread pool lost to a restart)
+PROJECT_DELETION_TIMEOUT = 60 * 60
+
+# Respacing of board columns whose position gaps ran out: 'thread' runs it on
+# an in-process thread after the move commits, 'sync' runs it inline (tests)
+TASK_REBALANCE_WORKER = 'thread'
+
+# Request metrics (project_manager.metrics): requests kept per URL name for
+# the rolling percentiles, and whether responses carry a Server-Timing header
+REQUEST_METRICS_WINDOW = 500
+REQUEST_METRICS_SERVER_TIMING = True
+
+# Request profiling (project_manager.profiling), off by default: the share of
+# requests profiled with cProfile, the duration (ms) above which other
+# requests keep their stack samples (None disables the sampler), the sampling
+# interval (ms), and where the slowest REQUEST_PROFILING_KEEP profiles of
+# each URL name are stored
+REQUEST_PROFILING = False
+REQUEST_PROFILING_SAMPLE_RATE = 0.01
+REQUEST_PROFILING_SLOW_MS = 1000
+REQUEST_PROFILING_INTERVAL_MS = 5
+REQUEST_PROFILING_DIR = BASE_DIR / 'profiles'
+REQUEST_PROFILING_KEEP = 20
+
 # Email configuration (for development)
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+DEFAULT_FROM_EMAIL = 'ProjectFlow <noreply@projectflow.local>'
 
 # Custom User Model
 AUTH_USER_MODEL = 'accounts.User'
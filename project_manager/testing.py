@@ -0,0 +1,52 @@
+"""
+Test helpers enforcing the query budgets declared with
+``project_manager.metrics.query_budget``::
+
+    class PageBudgetTests(QueryBudgetMixin, TestCase):
+        def test_project_list(self):
+            self.client.force_login(self.user)
+            self.assertWithinQueryBudget(reverse('projects:project_list'))
+
+Budgets hold regardless of the amount of data, so seed enough rows (see
+``manage.py seed_bench``) for an N+1 query to show.
+"""
+from urllib.parse import urlsplit
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, get_resolver, resolve
+
+from .metrics import view_query_budget
+
+
+def budgeted_views(resolver=None, namespace=None):
+    """``{url name: budget}`` of every routed view declaring a query budget"""
+    resolver = resolver or get_resolver()
+    budgets = {}
+    for pattern in resolver.url_patterns:
+        if isinstance(pattern, URLResolver):
+            nested = ':'.join(filter(None, [namespace, pattern.namespace])) or None
+            budgets.update(budgeted_views(pattern, nested))
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            budget = view_query_budget(pattern.callback)
+            if budget is not None:
+                budgets[':'.join(filter(None, [namespace, pattern.name]))] = budget
+    return budgets
+
+
+class QueryBudgetMixin:
+    """TestCase mixin checking requests against their view's query budget"""
+
+    def assertWithinQueryBudget(self, url, client=None, method='get', **kwargs):
+        """Request ``url`` and fail if it ran more queries than its view allows"""
+        match = resolve(urlsplit(url).path)
+        budget = view_query_budget(match.func)
+        if budget is None:
+            self.fail(f'{match.view_name} declares no query budget')
+        client = client or self.client
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(client, method)(url, **kwargs)
+        if len(queries) > budget:
+            statements = '\n'.join(query['sql'] for query in queries.captured_queries)
+            self.fail(f'{match.view_name} ran {len(queries)} queries, over its budget of {budget}:\n{statements}')
+        return response
@@ -20,6 +20,8 @@ from django.conf import settings
 from django.conf.urls.static import static
 from django.views.generic import RedirectView
 
+from .views import profile_detail, profile_download, profile_list, request_metrics
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', RedirectView.as_view(url='/dashboard/', permanent=False)),
@@ -27,9 +29,13 @@ urlpatterns = [
     path('accounts/', include('accounts.urls')),
     path('tasks/', include('task_management.urls')),
     path('reports/', include('project_reports.urls')),
+    path('api/projects/', include('projects.api_urls')),
+    path('api/tasks/', include('task_management.api_urls')),
+    path('metrics/requests/', request_metrics, name='request_metrics'),
+    path('metrics/profiles/', profile_list, name='profile_list'),
+    path('metrics/profiles/<str:directory>/<str:name>/', profile_detail, name='profile_detail'),
+    path('metrics/profiles/<str:directory>/<str:name>/download/', profile_download, name='profile_download'),
     # API URLs will be added later after completing the setup
-    # path('api/projects/', include('projects.api_urls')),
-    # path('api/tasks/', include('task_management.api_urls')),
     # path('api/notifications/', include('notification_system.api_urls')),
 ]
 
@@ -0,0 +1,82 @@
+import io
+import json
+import pstats
+from collections import Counter
+
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse
+from django.shortcuts import render
+
+from .metrics import metrics_snapshot
+from .profiling import list_profiles, profile_path
+
+PSTATS_LINES = 60
+TOP_FUNCTIONS = 40
+
+
+@staff_member_required
+def request_metrics(request):
+    """Rolling request percentiles of this process, per URL name"""
+    return JsonResponse({'views': metrics_snapshot()})
+
+
+@staff_member_required
+def profile_list(request):
+    """Stored request profiles, slowest URL names first"""
+    return render(request, 'metrics/profile_list.html', {'profiles': list_profiles()})
+
+
+def _load_profile(directory, name):
+    path = profile_path(directory, name, '.json')
+    if path is None or not path.is_file():
+        raise Http404('No such profile')
+    with open(path) as f:
+        return json.load(f)
+
+
+def _function_counts(stacks):
+    """Samples per function: where they were running (self) and anywhere on the stack (total)"""
+    own = Counter()
+    total = Counter()
+    for stack, count in stacks:
+        frames = stack.split(';')
+        own[frames[-1]] += count
+        for frame in set(frames):
+            total[frame] += count
+    return [
+        {'function': function, 'total': count, 'self': own[function]}
+        for function, count in total.most_common(TOP_FUNCTIONS)
+    ]
+
+
+@staff_member_required
+def profile_detail(request, directory, name):
+    """One request profile: its SQL statements and where its Python time went"""
+    profile = _load_profile(directory, name)
+    context = {'profile': profile, 'directory': directory, 'name': name}
+    if profile['mode'] == 'cprofile':
+        path = profile_path(directory, name, '.prof')
+        if path.is_file():
+            stream = io.StringIO()
+            pstats.Stats(str(path), stream=stream).strip_dirs().sort_stats('cumulative').print_stats(PSTATS_LINES)
+            context['pstats'] = stream.getvalue()
+    else:
+        context['functions'] = _function_counts(profile['stacks'])
+    context['slowest_sql'] = sorted(profile['sql'], key=lambda statement: statement[1], reverse=True)[:10]
+    return render(request, 'metrics/profile_detail.html', context)
+
+
+@staff_member_required
+def profile_download(request, directory, name):
+    """cProfile dump (for snakeviz, pstats...) or collapsed stacks (for flame graphs) of a profile"""
+    profile = _load_profile(directory, name)
+    if profile['mode'] == 'cprofile':
+        path = profile_path(directory, name, '.prof')
+        if not path.is_file():
+            raise Http404('No such profile')
+        return FileResponse(open(path, 'rb'), as_attachment=True, filename=f'{directory}-{name}.prof')
+    response = HttpResponse(
+        ''.join(f'{stack} {count}\n' for stack, count in profile['stacks']), content_type='text/plain'
+    )
+    response['Content-Disposition'] = f'attachment; filename="{directory}-{name}.folded"'
+    return response
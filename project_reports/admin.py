@@ -1,3 +1,9 @@
 from django.contrib import admin
+from .models import ReportSnapshot
 
-# Register your models here.
+
+@admin.register(ReportSnapshot)
+class ReportSnapshotAdmin(admin.ModelAdmin):
+    list_display = ['user', 'computed_at']
+    search_fields = ['user__username', 'user__email']
+    readonly_fields = ['computed_at']
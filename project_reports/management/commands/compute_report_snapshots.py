@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from project_reports.snapshots import SNAPSHOT_BATCH_SIZE, compute_snapshots
+
+
+class Command(BaseCommand):
+    help = 'Precompute the reports dashboard snapshots of all active users (schedule hourly or daily)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            action='append',
+            dest='users',
+            type=int,
+            help='Only compute the snapshot of this user id (can be given several times)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=SNAPSHOT_BATCH_SIZE,
+            help=f'Snapshots written per upsert statement (default: {SNAPSHOT_BATCH_SIZE})',
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        written = compute_snapshots(options['users'], batch_size=options['batch_size'])
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(f'Computed {written} report snapshots in {elapsed:.2f}s'))
@@ -1,3 +1,21 @@
 from django.db import models
+from django.conf import settings
 
-# Create your models here.
+
+class ReportSnapshot(models.Model):
+    """Precomputed reports dashboard metrics of a user"""
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='report_snapshot'
+    )
+    metrics = models.JSONField(default=dict, help_text="Context served by the reports dashboard")
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['computed_at']),
+        ]
+
+    def __str__(self):
+        return f"Report snapshot for {self.user} ({self.computed_at:%Y-%m-%d %H:%M})"
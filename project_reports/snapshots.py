@@ -0,0 +1,165 @@
+"""
+Precomputed reports dashboard metrics.
+
+Snapshots are computed for all users at once. Each grouped query aggregates
+one relation for every user in a single statement - owned projects, project
+memberships, created tasks, task assignments, plus the overlap of each pair -
+and the per-user figures are combined by inclusion-exclusion, so a project or
+task reached through both relations is counted once. The dashboard serves the
+stored snapshot and recomputes the current user's on request.
+"""
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from projects.models import Project, ProjectMembership
+from task_management.models import Task
+
+from .models import ReportSnapshot
+
+SNAPSHOT_BATCH_SIZE = 500
+RECENT_DAYS = 30
+
+# Task statuses counted as overdue once past their due date
+OPEN_STATUSES = ['todo', 'in_progress']
+
+PROJECT_STATUSES = [status for status, _ in Project.STATUS_CHOICES]
+TASK_STATUSES = [status for status, _ in Task.STATUS_CHOICES]
+TASK_PRIORITIES = [priority for priority, _ in Task.PRIORITY_CHOICES]
+
+
+def _project_counts(prefix, since):
+    """Conditional counts over projects reached through ``prefix``"""
+    counts = {
+        'projects': Count('pk'),
+        'recent_projects': Count('pk', filter=Q(**{f'{prefix}created_at__gte': since})),
+    }
+    for status in PROJECT_STATUSES:
+        counts[f'project_{status}'] = Count('pk', filter=Q(**{f'{prefix}status': status}))
+    return counts
+
+
+def _task_counts(prefix, now, since):
+    """Conditional counts over tasks reached through ``prefix``"""
+    counts = {
+        'tasks': Count('pk'),
+        'recent_tasks': Count('pk', filter=Q(**{f'{prefix}created_at__gte': since})),
+        'overdue_tasks': Count('pk', filter=Q(**{
+            f'{prefix}due_date__lt': now,
+            f'{prefix}status__in': OPEN_STATUSES,
+        })),
+    }
+    for status in TASK_STATUSES:
+        counts[f'task_{status}'] = Count('pk', filter=Q(**{f'{prefix}status': status}))
+    for priority in TASK_PRIORITIES:
+        counts[f'priority_{priority}'] = Count('pk', filter=Q(**{f'{prefix}priority': priority}))
+    return counts
+
+
+def _relations(now):
+    """(sign, queryset, user field, counts) of every relation that is aggregated"""
+    since = now - timedelta(days=RECENT_DAYS)
+    projects = Project.objects.filter(pending_deletion=False)
+    memberships = ProjectMembership.objects.filter(project__pending_deletion=False)
+    tasks = Task.objects.filter(project__pending_deletion=False)
+    assignments = Task.assigned_to.through.objects.filter(task__project__pending_deletion=False)
+    return [
+        (1, projects, 'owner_id', _project_counts('', since)),
+        (1, memberships, 'user_id', _project_counts('project__', since)),
+        (-1, memberships.filter(project__owner_id=F('user_id')), 'user_id', _project_counts('project__', since)),
+        (1, tasks, 'created_by_id', _task_counts('', now, since)),
+        (1, assignments, 'user_id', _task_counts('task__', now, since)),
+        (-1, assignments.filter(task__created_by_id=F('user_id')), 'user_id', _task_counts('task__', now, since)),
+    ]
+
+
+def collect_counts(user_ids=None, now=None):
+    """Return {user_id: Counter} of raw metric counts in one query per relation"""
+    now = now or timezone.now()
+    totals = defaultdict(Counter)
+    for sign, queryset, user_field, counts in _relations(now):
+        if user_ids is not None:
+            queryset = queryset.filter(**{f'{user_field}__in': user_ids})
+        rows = queryset.order_by().values(user_field).annotate(**counts)
+        for row in rows.iterator():
+            user_totals = totals[row.pop(user_field)]
+            for key, value in row.items():
+                user_totals[key] += sign * value
+    return totals
+
+
+def _rate(part, whole):
+    return (part / whole * 100) if whole > 0 else 0
+
+
+def build_metrics(counts):
+    """Dashboard context of one user from its raw counts"""
+    stats = {
+        'total_projects': counts['projects'],
+        'active_projects': counts['project_active'],
+        'completed_projects': counts['project_completed'],
+        'total_tasks': counts['tasks'],
+        'completed_tasks': counts['task_completed'],
+        'overdue_tasks': counts['overdue_tasks'],
+    }
+    stats['project_completion_rate'] = _rate(stats['completed_projects'], stats['total_projects'])
+    stats['task_completion_rate'] = _rate(stats['completed_tasks'], stats['total_tasks'])
+    return {
+        'stats': stats,
+        'recent_projects': counts['recent_projects'],
+        'recent_tasks': counts['recent_tasks'],
+        'project_status_data': [
+            {'status': status, 'count': counts[f'project_{status}']}
+            for status in PROJECT_STATUSES if counts[f'project_{status}']
+        ],
+        'task_priority_data': [
+            {'priority': priority, 'count': counts[f'priority_{priority}']}
+            for priority in TASK_PRIORITIES if counts[f'priority_{priority}']
+        ],
+    }
+
+
+def compute_snapshots(user_ids=None, batch_size=SNAPSHOT_BATCH_SIZE):
+    """
+    Compute and store the snapshots of ``user_ids`` (all active users when None).
+
+    Returns the number of snapshots written.
+    """
+    now = timezone.now()
+    totals = collect_counts(user_ids, now)
+
+    users = get_user_model().objects.order_by()
+    users = users.filter(pk__in=user_ids) if user_ids is not None else users.filter(is_active=True)
+
+    written = 0
+    batch = []
+    for user_id in users.values_list('pk', flat=True).iterator(chunk_size=batch_size):
+        batch.append(ReportSnapshot(user_id=user_id, metrics=build_metrics(totals[user_id]), computed_at=now))
+        if len(batch) >= batch_size:
+            written += _upsert(batch)
+            batch = []
+    if batch:
+        written += _upsert(batch)
+    return written
+
+
+def _upsert(batch):
+    ReportSnapshot.objects.bulk_create(
+        batch,
+        update_conflicts=True,
+        unique_fields=['user'],
+        update_fields=['metrics', 'computed_at'],
+    )
+    return len(batch)
+
+
+def get_snapshot(user, refresh=False):
+    """Stored snapshot of ``user``, computed live when missing or on ``refresh``"""
+    snapshot = ReportSnapshot.objects.filter(user=user).first()
+    if snapshot is None or refresh:
+        compute_snapshots([user.pk])
+        snapshot = ReportSnapshot.objects.get(user=user)
+    return snapshot
@@ -0,0 +1,215 @@
+"""
+Burndown, cumulative flow and cycle time reports built from task history.
+
+Task creations and ``status_changed`` activities of a project are streamed in
+``created_at`` order with ``.iterator()`` and folded into daily buckets of
+per-status deltas, completions and cycle times, so no table is ever loaded
+whole. The fold state is cached per project together with a watermark: later
+requests only stream the history recorded since. Folding only adds history,
+so deleting a task, or moving it to another project, drops the state of the
+projects involved (``reset_flow_state``) and the next request refolds from
+scratch. A requested day range is cut from the buckets in memory and cached
+under the project's cache scope.
+"""
+import heapq
+from collections import Counter
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db.models import CharField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from project_manager.caching import cache_timeout, cached_query, project_scope
+from task_management.models import Task, TaskActivity
+
+FLOW_STATE_VERSION = 1
+FLOW_STATE_TIMEOUT = 24 * 60 * 60
+STREAM_CHUNK_SIZE = 2000
+
+# History is re-read this far behind the watermark, so rows committed late
+# with an earlier created_at are still folded (exactly once)
+SETTLE_WINDOW = timedelta(minutes=1)
+
+DEFAULT_RANGE_DAYS = 30
+MAX_RANGE_DAYS = 366
+
+STATUSES = [status for status, _ in Task.STATUS_CHOICES]
+STARTED_STATUS = 'in_progress'
+DONE_STATUS = 'completed'
+
+# Event kinds, in the order they are applied when timestamps tie
+CREATED, STATUS_CHANGED = 0, 1
+
+
+def _state_key(project_id):
+    return f'reports:flow:{project_id}'
+
+
+def _empty_state():
+    return {
+        'version': FLOW_STATE_VERSION,
+        # created_at of the newest folded event, and the events folded
+        # within SETTLE_WINDOW of it
+        'watermark': None,
+        'seen': {},
+        # {date: {'flow': Counter, 'completed': n, 'cycle_hours': h, 'cycle_count': n}}
+        'days': {},
+        # {task_id: [start timestamp, whether work was started]}
+        'started': {},
+    }
+
+
+def _task_events(project_id, since):
+    """Task creations with the status each task was created in"""
+    first_change = TaskActivity.objects.filter(
+        task=OuterRef('pk'), activity_type='status_changed'
+    ).order_by('created_at').values('old_value')[:1]
+    tasks = Task.objects.filter(project_id=project_id)
+    if since is not None:
+        tasks = tasks.filter(created_at__gte=since)
+    rows = tasks.annotate(
+        initial_status=Coalesce(Subquery(first_change), 'status', output_field=CharField())
+    ).order_by('created_at').values_list('created_at', 'id', 'initial_status')
+    for created_at, task_id, status in rows.iterator(chunk_size=STREAM_CHUNK_SIZE):
+        yield created_at, CREATED, f'task:{task_id}', str(task_id), None, status
+
+
+def _status_events(project_id, since):
+    """Status transitions recorded in the activity log"""
+    activities = TaskActivity.objects.filter(task__project_id=project_id, activity_type='status_changed')
+    if since is not None:
+        activities = activities.filter(created_at__gte=since)
+    rows = activities.order_by('created_at').values_list(
+        'created_at', 'id', 'task_id', 'old_value', 'new_value'
+    )
+    for created_at, activity_id, task_id, old_status, new_status in rows.iterator(chunk_size=STREAM_CHUNK_SIZE):
+        yield created_at, STATUS_CHANGED, f'activity:{activity_id}', str(task_id), old_status, new_status
+
+
+def _bucket(state, moment):
+    day = timezone.localtime(moment).date()
+    bucket = state['days'].get(day)
+    if bucket is None:
+        bucket = state['days'][day] = {'flow': Counter(), 'completed': 0, 'cycle_hours': 0.0, 'cycle_count': 0}
+    return bucket
+
+
+def _fold(state, events):
+    """Apply a time ordered stream of events to the fold state"""
+    started = state['started']
+    seen = state['seen']
+    for moment, kind, key, task_id, old_status, new_status in events:
+        if key in seen:
+            continue
+        seen[key] = moment
+        if state['watermark'] is None or moment > state['watermark']:
+            state['watermark'] = moment
+
+        bucket = _bucket(state, moment)
+        timestamp = moment.timestamp()
+        if old_status:
+            bucket['flow'][old_status] -= 1
+        bucket['flow'][new_status] += 1
+
+        if kind == CREATED:
+            started[task_id] = [timestamp, new_status == STARTED_STATUS]
+            continue
+
+        start = started.get(task_id)
+        if new_status == STARTED_STATUS and start and not start[1]:
+            start[:] = [timestamp, True]
+        if new_status == DONE_STATUS and old_status != DONE_STATUS:
+            bucket['completed'] += 1
+            if start:
+                bucket['cycle_hours'] += (timestamp - start[0]) / 3600
+                bucket['cycle_count'] += 1
+
+
+def reset_flow_state(*project_ids):
+    """Drop the fold state of projects whose history lost tasks"""
+    cache.delete_many([_state_key(project_id) for project_id in project_ids])
+
+
+def update_flow_state(project_id):
+    """Fold the history recorded since the cached watermark and return the state"""
+    key = _state_key(project_id)
+    state = cache.get(key)
+    if state is None or state.get('version') != FLOW_STATE_VERSION:
+        state = _empty_state()
+
+    since = state['watermark'] - SETTLE_WINDOW if state['watermark'] else None
+    events = heapq.merge(
+        _task_events(project_id, since),
+        _status_events(project_id, since),
+        key=lambda event: event[:2],
+    )
+    _fold(state, events)
+    if state['watermark']:
+        settled = state['watermark'] - SETTLE_WINDOW
+        state['seen'] = {key: moment for key, moment in state['seen'].items() if moment >= settled}
+    cache.set(key, state, cache_timeout(FLOW_STATE_TIMEOUT))
+    return state
+
+
+def _series(state, start, end):
+    """Cut the daily series between ``start`` and ``end`` out of the fold state"""
+    running = Counter()
+    for day, bucket in state['days'].items():
+        if day < start:
+            running.update(bucket['flow'])
+
+    report = {
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'days': [],
+        'cumulative_flow': {status: [] for status in STATUSES},
+        'burndown': {'remaining': [], 'completed': []},
+        'throughput': [],
+        'cycle_time_hours': [],
+    }
+    cycle_hours = 0.0
+    cycle_count = 0
+    day = start
+    while day <= end:
+        bucket = state['days'].get(day)
+        if bucket:
+            running.update(bucket['flow'])
+        report['days'].append(day.isoformat())
+        for status in STATUSES:
+            report['cumulative_flow'][status].append(running[status])
+        done = running[DONE_STATUS]
+        report['burndown']['completed'].append(done)
+        report['burndown']['remaining'].append(sum(running[status] for status in STATUSES) - done)
+        report['throughput'].append(bucket['completed'] if bucket else 0)
+        if bucket and bucket['cycle_count']:
+            report['cycle_time_hours'].append(round(bucket['cycle_hours'] / bucket['cycle_count'], 1))
+            cycle_hours += bucket['cycle_hours']
+            cycle_count += bucket['cycle_count']
+        else:
+            report['cycle_time_hours'].append(None)
+        day += timedelta(days=1)
+
+    report['average_cycle_time_hours'] = round(cycle_hours / cycle_count, 1) if cycle_count else None
+    report['completed_in_range'] = sum(report['throughput'])
+    return report
+
+
+def report_range(days=None, start=None, end=None):
+    """Normalize a requested range to (start, end) dates of at most MAX_RANGE_DAYS"""
+    end = end or timezone.localdate()
+    if start is None:
+        days = min(max(days or DEFAULT_RANGE_DAYS, 1), MAX_RANGE_DAYS)
+        start = end - timedelta(days=days - 1)
+    start = min(max(start, end - timedelta(days=MAX_RANGE_DAYS - 1)), end)
+    return start, end
+
+
+def project_flow_report(project_id, start, end):
+    """Burndown, cumulative flow, throughput and cycle time of a project"""
+    return cached_query(
+        'project_flow_report',
+        lambda: _series(update_flow_state(project_id), start, end),
+        scopes=[project_scope(project_id)],
+        args=[project_id, start.isoformat(), end.isoformat()],
+    )
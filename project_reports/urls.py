@@ -5,4 +5,5 @@ app_name = 'reports'
 
 urlpatterns = [
     path('', views.reports_dashboard, name='dashboard'),
+    path('projects/<uuid:project_id>/flow/', views.project_flow, name='project_flow'),
 ]
@@ -1,64 +1,78 @@
-from django.shortcuts import render
+from django.shortcuts import render, redirect, get_object_or_404
+from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.db.models import Count, Q
+from django.http import JsonResponse
+from django.utils.dateparse import parse_date
 from projects.models import Project
-from task_management.models import Task
-from django.utils import timezone
-from datetime import timedelta
+from projects.permissions import get_project_ids
+from project_manager.metrics import query_budget
+from projects.rollup import load_project_stats
+from .snapshots import get_snapshot
+from .timeseries import DEFAULT_RANGE_DAYS, project_flow_report, report_range
 
 
+@query_budget(17)
 @login_required
 def reports_dashboard(request):
     """Main reports dashboard view"""
-    # Get user's projects and tasks
-    user_projects = Project.objects.filter(
-        Q(owner=request.user) | Q(members=request.user)
-    ).distinct()
+    # Serve the precomputed snapshot; ?refresh=1 recomputes it live
+    snapshot = get_snapshot(request.user, refresh=bool(request.GET.get('refresh')))
     
-    user_tasks = Task.objects.filter(
-        Q(created_by=request.user) | Q(assigned_to=request.user)
-    ).distinct()
-    
-    # Calculate statistics
-    stats = {
-        'total_projects': user_projects.count(),
-        'active_projects': user_projects.filter(status='active').count(),
-        'completed_projects': user_projects.filter(status='completed').count(),
-        'total_tasks': user_tasks.count(),
-        'completed_tasks': user_tasks.filter(status='completed').count(),
-        'overdue_tasks': user_tasks.filter(
-            due_date__lt=timezone.now().date(),
-            status__in=['todo', 'in_progress']
-        ).count(),
+    # Workload across the user's projects, summed from the task rollup
+    project_stats = load_project_stats(get_project_ids(request.user)).values()
+    workload = {
+        field: sum(getattr(row, field) for row in project_stats)
+        for field in ('total_tasks', 'completed_tasks', 'overdue_tasks', 'estimated_hours', 'actual_hours')
     }
-    
-    # Calculate completion rates
-    stats['project_completion_rate'] = (
-        (stats['completed_projects'] / stats['total_projects'] * 100) 
-        if stats['total_projects'] > 0 else 0
+    workload['completion_rate'] = (
+        (workload['completed_tasks'] / workload['total_tasks'] * 100)
+        if workload['total_tasks'] > 0 else 0
     )
-    stats['task_completion_rate'] = (
-        (stats['completed_tasks'] / stats['total_tasks'] * 100) 
-        if stats['total_tasks'] > 0 else 0
-    )
-    
-    # Recent activity (last 30 days)
-    thirty_days_ago = timezone.now() - timedelta(days=30)
-    recent_projects = user_projects.filter(created_at__gte=thirty_days_ago).count()
-    recent_tasks = user_tasks.filter(created_at__gte=thirty_days_ago).count()
-    
-    # Project status distribution
-    project_status_data = list(user_projects.values('status').annotate(count=Count('status')))
-    
-    # Task priority distribution
-    task_priority_data = list(user_tasks.values('priority').annotate(count=Count('priority')))
     
     context = {
-        'stats': stats,
-        'recent_projects': recent_projects,
-        'recent_tasks': recent_tasks,
-        'project_status_data': project_status_data,
-        'task_priority_data': task_priority_data,
+        **snapshot.metrics,
+        'workload': workload,
+        'computed_at': snapshot.computed_at,
     }
     
     return render(request, 'project_reports/dashboard.html', context)
+
+
+def _parse_day(value):
+    """Parse an ISO date query parameter, ignoring invalid values"""
+    try:
+        return parse_date(value or '')
+    except ValueError:
+        return None
+
+
+@query_budget(7)
+@login_required
+def project_flow(request, project_id):
+    """Burndown, cumulative flow and cycle time report of a project"""
+    project = get_object_or_404(Project, id=project_id)
+    
+    # Check if user has access
+    if not project.is_member(request.user):
+        messages.error(request, "You don't have access to this project.")
+        return redirect('projects:project_list')
+    
+    try:
+        days = int(request.GET.get('days', DEFAULT_RANGE_DAYS))
+    except ValueError:
+        days = DEFAULT_RANGE_DAYS
+    start, end = report_range(
+        days=days,
+        start=_parse_day(request.GET.get('start')),
+        end=_parse_day(request.GET.get('end')),
+    )
+    report = project_flow_report(project.pk, start, end)
+    
+    if request.GET.get('format') == 'json':
+        return JsonResponse({'success': True, 'report': report})
+    
+    return render(request, 'project_reports/project_flow.html', {
+        'project': project,
+        'report': report,
+        'days': days,
+    })
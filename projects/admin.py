@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Project, ProjectMembership
+from .models import Project, ProjectDeletionJob, ProjectMembership, ProjectStats
 
 
 @admin.register(Project)
@@ -29,3 +29,18 @@ class ProjectMembershipAdmin(admin.ModelAdmin):
     list_filter = ['role', 'joined_at']
     search_fields = ['project__name', 'user__username', 'user__email']
     readonly_fields = ['joined_at']
+
+
+@admin.register(ProjectDeletionJob)
+class ProjectDeletionJobAdmin(admin.ModelAdmin):
+    list_display = ['project_name', 'requested_by', 'status', 'deleted_tasks', 'total_tasks', 'created_at', 'finished_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['project_name', 'requested_by__username']
+    readonly_fields = ['created_at', 'started_at', 'finished_at']
+
+
+@admin.register(ProjectStats)
+class ProjectStatsAdmin(admin.ModelAdmin):
+    list_display = ['project', 'total_tasks', 'completed_tasks', 'overdue_tasks', 'last_activity_at', 'updated_at']
+    search_fields = ['project__name']
+    readonly_fields = ['updated_at']
@@ -3,8 +3,8 @@ from rest_framework.routers import DefaultRouter
 from . import api_views
 
 router = DefaultRouter()
-router.register(r'projects', api_views.ProjectViewSet)
-router.register(r'memberships', api_views.ProjectMembershipViewSet)
+router.register(r'projects', api_views.ProjectViewSet, basename='project')
+router.register(r'memberships', api_views.ProjectMembershipViewSet, basename='membership')
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -1,10 +1,150 @@
-from rest_framework import viewsets
+import uuid
+
+from django.db import transaction
+from django.db.models import Prefetch
+from django.urls import reverse
+from rest_framework import permissions, status, viewsets
+from rest_framework.exceptions import PermissionDenied
 from rest_framework.response import Response
 
-class ProjectViewSet(viewsets.ModelViewSet):
-    def list(self, request):
-        return Response({"message": "API Coming Soon!"})
+from project_manager.caching import project_scope
+from project_manager.conditional import ConditionalGetMixin
+from project_manager.pagination import CreatedAtCursorPagination
+from .deletion import schedule_project_deletion
+from .models import Project, ProjectMembership
+from .permissions import can_delete_project, can_edit_project, get_project_ids
+from .serializers import ProjectListSerializer, ProjectMembershipSerializer, ProjectSerializer
+
+# Columns of the related user that UserSummarySerializer reads
+USER_FIELDS = ['id', 'username', 'first_name', 'last_name']
+
+# Columns the list serializer reads, loaded with only()
+PROJECT_LIST_FIELDS = [
+    'id', 'name', 'status', 'priority', 'end_date', 'color', 'created_at', 'updated_at',
+    *(f'owner__{field}' for field in USER_FIELDS),
+]
+
+
+def _members_prefetch():
+    """Prefetch memberships with their users in one extra query"""
+    return Prefetch(
+        'projectmembership_set',
+        queryset=ProjectMembership.objects.select_related('user').only(
+            'project_id', 'role', 'joined_at', *(f'user__{field}' for field in USER_FIELDS)
+        ).order_by('joined_at'),
+    )
+
+
+class MembershipCursorPagination(CreatedAtCursorPagination):
+    """Newest first keyset pagination on (joined_at, id)"""
+    ordering = ('-joined_at', '-id')
+
+
+class ProjectPermission(permissions.BasePermission):
+    """Members can read, editors can update and only the owner can delete"""
+
+    def has_object_permission(self, request, view, obj):
+        if request.method in permissions.SAFE_METHODS:
+            return True
+        if view.action == 'destroy':
+            return can_delete_project(request.user, obj)
+        return can_edit_project(request.user, obj)
+
+
+def _project_scopes(request, project_id=None):
+    """Cache scopes of one or all of the user's projects, None without access"""
+    project_ids = get_project_ids(request.user)
+    if project_id is None:
+        return [project_scope(pk) for pk in project_ids]
+    try:
+        project_id = uuid.UUID(str(project_id))
+    except ValueError:
+        return None
+    if project_id not in project_ids:
+        return None
+    return [project_scope(project_id)]
+
+
+class ProjectViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
+    """Projects the user owns or is a member of"""
+    serializer_class = ProjectSerializer
+    permission_classes = [permissions.IsAuthenticated, ProjectPermission]
+    pagination_class = CreatedAtCursorPagination
+
+    def get_queryset(self):
+        projects = Project.objects.filter(
+            id__in=get_project_ids(self.request.user)
+        ).select_related('owner').with_stats().prefetch_related(_members_prefetch())
+
+        status_filter = self.request.query_params.get('status')
+        if status_filter:
+            projects = projects.filter(status=status_filter)
+        if self.action == 'list':
+            projects = projects.only(*PROJECT_LIST_FIELDS)
+        return projects
+
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return ProjectListSerializer
+        return ProjectSerializer
+
+    def get_etag_scopes(self):
+        return _project_scopes(self.request, self.kwargs.get('pk'))
+
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            project = serializer.save(owner=self.request.user)
+            # Add the owner as a project member with admin role
+            ProjectMembership.objects.create(project=project, user=self.request.user, role='admin')
+
+    def destroy(self, request, *args, **kwargs):
+        """Hide the project and delete it in the background"""
+        project = self.get_object()
+        job = schedule_project_deletion(project, request.user)
+        return Response({
+            'job_id': job.id,
+            'status': job.status,
+            'status_url': reverse('projects:deletion_status', args=[job.id]),
+        }, status=status.HTTP_202_ACCEPTED)
+
+
+class ProjectMembershipViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
+    """Memberships of the projects the user belongs to; editors manage them"""
+    serializer_class = ProjectMembershipSerializer
+    pagination_class = MembershipCursorPagination
+
+    def get_queryset(self):
+        memberships = ProjectMembership.objects.filter(
+            project_id__in=get_project_ids(self.request.user)
+        ).select_related('user').only(
+            'id', 'project_id', 'role', 'joined_at', 'is_active',
+            *(f'user__{field}' for field in USER_FIELDS),
+        )
+        project_id = self.request.query_params.get('project')
+        if project_id:
+            try:
+                memberships = memberships.filter(project_id=uuid.UUID(project_id))
+            except ValueError:
+                return memberships.none()
+        return memberships
+
+    def get_etag_scopes(self):
+        if self.action == 'retrieve':
+            return None
+        return _project_scopes(self.request, self.request.query_params.get('project') or None)
+
+    def _check_can_manage(self, project):
+        if not can_edit_project(self.request.user, project):
+            raise PermissionDenied("You don't have permission to manage this project's members.")
+
+    def perform_create(self, serializer):
+        self._check_can_manage(serializer.validated_data['project'])
+        serializer.save()
+
+    def perform_update(self, serializer):
+        self._check_can_manage(serializer.instance.project_id)
+        serializer.save()
 
-class ProjectMembershipViewSet(viewsets.ModelViewSet):
-    def list(self, request):
-        return Response({"message": "API Coming Soon!"})
+    def perform_destroy(self, instance):
+        self._check_can_manage(instance.project_id)
+        instance.delete()
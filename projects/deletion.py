@@ -0,0 +1,148 @@
+"""
+Background project deletion.
+
+Deleting a project only flags it as ``pending_deletion`` (which hides it from
+every list, board and access check) and records a ProjectDeletionJob row. The
+actual purge runs outside the request, either on an in-process thread pool
+or in the ``run_deletion_jobs`` management command, depending on the
+``PROJECT_DELETION_WORKER`` setting:
+
+* ``'thread'`` (default) - submit the job to a small in-process thread pool
+* ``'command'`` - leave the job for ``manage.py run_deletion_jobs``
+* ``'sync'`` - run the job inline, e.g. in tests
+
+A job whose worker died (a restart loses the thread pool) stays ``running``.
+``run_deletion_jobs`` puts jobs running for longer than
+``PROJECT_DELETION_TIMEOUT`` seconds back in the queue before claiming any,
+so run it periodically even with the thread worker. The purge is safe to
+repeat, so a job taken over from a worker that was merely slow does no harm.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .models import Project, ProjectDeletionJob
+from .permissions import invalidate_project_roles
+from .safe_delete import count_project_tasks, safe_delete_project
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JOB_TIMEOUT = 60 * 60
+
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='project-deletion')
+    return _executor
+
+
+def schedule_project_deletion(project, user):
+    """Hide ``project`` at once and queue its deletion; returns the job"""
+    with transaction.atomic():
+        Project.objects.filter(pk=project.pk).update(pending_deletion=True)
+        job = ProjectDeletionJob.objects.create(
+            project_id=project.pk,
+            project_name=project.name,
+            requested_by=user,
+            total_tasks=count_project_tasks(project),
+        )
+        member_ids = list(project.projectmembership_set.values_list('user_id', flat=True))
+        transaction.on_commit(lambda: invalidate_project_roles(project.owner_id, *member_ids))
+
+        worker = getattr(settings, 'PROJECT_DELETION_WORKER', 'thread')
+        if worker == 'thread':
+            transaction.on_commit(lambda: _get_executor().submit(_run_in_thread, job.pk))
+        elif worker == 'sync':
+            transaction.on_commit(lambda: run_deletion_job(job.pk))
+    return job
+
+
+def _run_in_thread(job_id):
+    """Thread pool entry point; worker threads manage their own connections"""
+    close_old_connections()
+    try:
+        run_deletion_job(job_id)
+    finally:
+        close_old_connections()
+
+
+def requeue_stale_jobs(now=None):
+    """Put back in the queue the jobs running for longer than PROJECT_DELETION_TIMEOUT; returns them"""
+    now = now or timezone.now()
+    timeout = getattr(settings, 'PROJECT_DELETION_TIMEOUT', DEFAULT_JOB_TIMEOUT)
+    requeued = []
+    for job in ProjectDeletionJob.objects.filter(status='running', started_at__lt=now - timedelta(seconds=timeout)):
+        # Only if no other worker requeued or finished it meanwhile
+        if ProjectDeletionJob.objects.filter(pk=job.pk, status='running', started_at=job.started_at).update(
+            status='pending'
+        ):
+            logger.warning('Deletion job %s of "%s" running since %s, requeued', job.pk, job.project_name, job.started_at)
+            requeued.append(job)
+    return requeued
+
+
+def claim_next_job():
+    """Atomically mark the oldest pending job as running and return it"""
+    for job in ProjectDeletionJob.objects.filter(status='pending').order_by('created_at')[:10]:
+        claimed = ProjectDeletionJob.objects.filter(pk=job.pk, status='pending').update(
+            status='running', started_at=timezone.now()
+        )
+        if claimed:
+            job.refresh_from_db()
+            return job
+    return None
+
+
+def run_deletion_job(job_id):
+    """Claim a pending job and run it; jobs claimed elsewhere are left alone"""
+    claimed = ProjectDeletionJob.objects.filter(pk=job_id, status='pending').update(
+        status='running', started_at=timezone.now()
+    )
+    job = ProjectDeletionJob.objects.get(pk=job_id)
+    if claimed:
+        execute_deletion_job(job)
+    return job
+
+
+def execute_deletion_job(job):
+    """Purge the project of a claimed job, recording progress on the job row"""
+    project = Project.objects.filter(pk=job.project_id).first()
+    if project is None:
+        job.status = 'completed'
+        job.message = 'Project was already deleted'
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'message', 'finished_at'])
+        return job
+
+    # Events count per task table: the legacy table is purged before the current one.
+    # A requeued job goes on from the tasks its previous worker deleted.
+    deleted_before = job.deleted_tasks
+    deleted_per_table = {}
+
+    def record_progress(event):
+        if event.get('stage') == 'tasks':
+            deleted_per_table[event['table']] = event['deleted']
+            ProjectDeletionJob.objects.filter(pk=job.pk).update(
+                deleted_tasks=deleted_before + sum(deleted_per_table.values())
+            )
+
+    success, message = safe_delete_project(project, progress=record_progress)
+    job.refresh_from_db()
+    job.status = 'completed' if success else 'failed'
+    job.message = message
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'message', 'finished_at'])
+
+    if not success:
+        # Make the project visible again so the owner can retry
+        Project.objects.filter(pk=project.pk).update(pending_deletion=False)
+        invalidate_project_roles(project.owner_id, *project.projectmembership_set.values_list('user_id', flat=True))
+        logger.error('Deletion job %s failed: %s', job.pk, message)
+    return job
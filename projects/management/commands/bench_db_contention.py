@@ -0,0 +1,100 @@
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Benchmark concurrent SQLite writes with the default and the tuned database profile'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8, help='Concurrent writers (default: 8)')
+        parser.add_argument('--writes', type=int, default=200, help='Transactions per writer (default: 200)')
+        parser.add_argument('--rows', type=int, default=1000, help='Tasks in the benchmark table (default: 1000)')
+
+    def handle(self, *args, **options):
+        profiles = {
+            # Django's SQLite defaults: rollback journal, 5s timeout, deferred BEGIN
+            'default': {'pragmas': {}, 'timeout': 5.0, 'begin': 'BEGIN'},
+            'tuned': {
+                'pragmas': settings.SQLITE_PRAGMAS,
+                'timeout': settings.SQLITE_PRAGMAS['busy_timeout'] / 1000,
+                'begin': 'BEGIN IMMEDIATE',
+            },
+        }
+        results = {
+            name: self.run_profile(profile, options['threads'], options['writes'], options['rows'])
+            for name, profile in profiles.items()
+        }
+        self.stdout.write(json.dumps(results, indent=2))
+
+    def run_profile(self, profile, threads, writes, rows):
+        """Run the Kanban-move workload against a fresh database file"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'bench.sqlite3')
+            setup = self.connect(path, profile)
+            setup.execute('CREATE TABLE task (id INTEGER PRIMARY KEY, status TEXT, position INTEGER)')
+            setup.executemany(
+                'INSERT INTO task (id, status, position) VALUES (?, ?, ?)',
+                [(i, 'todo', i) for i in range(rows)]
+            )
+            setup.close()
+
+            latencies = []
+            errors = []
+            lock = threading.Lock()
+
+            def writer(seed):
+                conn = self.connect(path, profile)
+                for i in range(writes):
+                    task_id = (seed * writes + i) % rows
+                    started = time.perf_counter()
+                    try:
+                        # Read-then-write, like a drag-and-drop status change
+                        conn.execute(profile['begin'])
+                        position = conn.execute('SELECT position FROM task WHERE id = ?', [task_id]).fetchone()[0]
+                        conn.execute(
+                            'UPDATE task SET status = ?, position = ? WHERE id = ?',
+                            ['in_progress', position + 1, task_id]
+                        )
+                        conn.execute('COMMIT')
+                    except sqlite3.OperationalError as exc:
+                        if conn.in_transaction:
+                            conn.execute('ROLLBACK')
+                        with lock:
+                            errors.append(str(exc))
+                        continue
+                    with lock:
+                        latencies.append(time.perf_counter() - started)
+                conn.close()
+
+            started = time.perf_counter()
+            workers = [threading.Thread(target=writer, args=(n,)) for n in range(threads)]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            elapsed = time.perf_counter() - started
+
+        latencies.sort()
+        return {
+            'transactions': len(latencies),
+            'errors': len(errors),
+            'locked_errors': sum('locked' in error for error in errors),
+            'seconds': round(elapsed, 3),
+            'tx_per_second': round(len(latencies) / elapsed, 1) if elapsed else 0,
+            'p50_ms': round(latencies[len(latencies) // 2] * 1000, 2) if latencies else None,
+            'p95_ms': round(latencies[int(len(latencies) * 0.95)] * 1000, 2) if latencies else None,
+        }
+
+    @staticmethod
+    def connect(path, profile):
+        conn = sqlite3.connect(path, timeout=profile['timeout'], isolation_level=None, check_same_thread=False)
+        for name, value in profile['pragmas'].items():
+            conn.execute(f'PRAGMA {name}={value}')
+        return conn
@@ -0,0 +1,112 @@
+import json
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import resolve, reverse
+
+from project_manager.metrics import percentiles, view_query_budget
+from projects.models import Project
+from projects.permissions import get_project_ids
+from task_management.models import Task, TaskComment
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Time the key pages through the test client and report query counts and latency percentiles as JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='Username to browse as (default: the user with the most projects)')
+        parser.add_argument('--iterations', type=int, default=20, help='Timed requests per page (default: 20)')
+        parser.add_argument('--warmup', type=int, default=2, help='Untimed requests per page first (default: 2)')
+        parser.add_argument('--boards', type=int, default=5, help='Project boards to cycle through (default: 5)')
+        parser.add_argument('--output', help='Write the JSON report to this file instead of stdout')
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1:
+            raise CommandError('--iterations must be at least 1.')
+        user = self.get_user(options['user'])
+        project_ids = sorted(get_project_ids(user), key=str)[:options['boards']]
+        if not project_ids:
+            raise CommandError(f'{user.username} has no projects; run seed_bench first.')
+
+        pages = {
+            'projects:dashboard': [reverse('projects:dashboard')],
+            'projects:project_list': [reverse('projects:project_list')],
+            'projects:project_board': [reverse('projects:project_board', args=[pk]) for pk in project_ids],
+            'tasks:task_list': [reverse('tasks:task_list')],
+            'tasks:my_tasks': [reverse('tasks:my_tasks')],
+            'reports:dashboard': [reverse('reports:dashboard')],
+        }
+        client = Client()
+        client.force_login(user)
+        # The test client sends requests to "testserver"
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            views = {
+                name: self.bench(client, urls, options['iterations'], options['warmup'])
+                for name, urls in pages.items()
+            }
+
+        report = {
+            'database': connection.vendor,
+            'user': user.username,
+            'iterations': options['iterations'],
+            'rows': {
+                'users': User.objects.count(),
+                'projects': Project.objects.count(),
+                'tasks': Task.objects.count(),
+                'comments': TaskComment.objects.count(),
+            },
+            'views': views,
+        }
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + '\n')
+            self.stdout.write(self.style.SUCCESS(f'Wrote {options["output"]}'))
+        else:
+            self.stdout.write(output)
+
+    def get_user(self, username):
+        if username:
+            try:
+                return User.objects.get(username=username)
+            except User.DoesNotExist:
+                raise CommandError(f'No user named {username}.')
+        user = User.objects.annotate(projects_count=Count('projectmembership')).order_by('-projects_count').first()
+        if user is None:
+            raise CommandError('No users; run seed_bench first.')
+        return user
+
+    def bench(self, client, urls, iterations, warmup):
+        """Request ``urls`` in turn; returns the status codes, query counts and latencies seen"""
+        for index in range(warmup):
+            client.get(urls[index % len(urls)])
+
+        latencies = []
+        queries = []
+        statuses = set()
+        for index in range(iterations):
+            url = urls[index % len(urls)]
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = client.get(url)
+                latencies.append((time.perf_counter() - started) * 1000)
+            queries.append(len(captured))
+            statuses.add(response.status_code)
+
+        budget = view_query_budget(resolve(urls[0]).func)
+        return {
+            'requests': iterations,
+            'status_codes': sorted(statuses),
+            'queries': percentiles(queries),
+            'query_budget': budget,
+            'over_budget': budget is not None and max(queries) > budget,
+            'latency_ms': {key: round(value, 2) for key, value in percentiles(latencies).items()},
+        }
@@ -0,0 +1,21 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from projects.tombstones import TOMBSTONE_RETENTION, prune_tombstones
+
+
+class Command(BaseCommand):
+    help = 'Delete the tombstones of deleted rows that board sync cursors can no longer reach'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=TOMBSTONE_RETENTION.days,
+            help=f'Keep tombstones of the last DAYS days (default: {TOMBSTONE_RETENTION.days})',
+        )
+
+    def handle(self, *args, **options):
+        deleted = prune_tombstones(timedelta(days=options['days']))
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} tombstones'))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from projects.rollup import REBUILD_BATCH_SIZE, rebuild_project_stats
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the per-project task rollup (counts, overdue tasks, hours, last activity)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--project',
+            action='append',
+            dest='projects',
+            help='Only rebuild this project id (can be given several times)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=REBUILD_BATCH_SIZE,
+            help=f'Rows written per upsert statement (default: {REBUILD_BATCH_SIZE})',
+        )
+
+    def handle(self, *args, **options):
+        written = rebuild_project_stats(options['projects'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt task stats for {written} projects'))
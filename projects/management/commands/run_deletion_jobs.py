@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from projects.deletion import claim_next_job, execute_deletion_job, requeue_stale_jobs
+
+
+class Command(BaseCommand):
+    help = 'Process queued background project deletions, taking over jobs whose worker died'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep polling for new jobs instead of exiting when the queue is empty',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5.0,
+            help='Seconds to wait between polls in --loop mode (default: 5)',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            for stale in requeue_stale_jobs():
+                self.stdout.write(self.style.WARNING(
+                    f'Requeued the deletion of "{stale.project_name}" (job {stale.pk}), running since {stale.started_at}'
+                ))
+            job = claim_next_job()
+            if job is None:
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
+                continue
+
+            self.stdout.write(f'Deleting project "{job.project_name}" (job {job.pk})...')
+            job = execute_deletion_job(job)
+            if job.status == 'completed':
+                self.stdout.write(self.style.SUCCESS(f'Deleted "{job.project_name}": {job.deleted_tasks} tasks removed'))
+            else:
+                self.stdout.write(self.style.ERROR(f'Failed to delete "{job.project_name}": {job.message}'))
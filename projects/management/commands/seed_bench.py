@@ -0,0 +1,209 @@
+import random
+import time
+from collections import Counter
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from notification_system.models import Notification
+from projects.models import Project, ProjectMembership
+from projects.rollup import rebuild_project_stats
+from projects.search import comment_document, index_documents, project_document, task_document
+from task_management.models import POSITION_GAP, Task, TaskActivity, TaskComment
+
+User = get_user_model()
+Assignment = Task.assigned_to.through
+
+# Relative frequencies of the generated values
+PROJECT_STATUSES = {'planning': 15, 'active': 60, 'on_hold': 10, 'completed': 12, 'cancelled': 3}
+PROJECT_PRIORITIES = {'low': 20, 'medium': 50, 'high': 25, 'critical': 5}
+TASK_STATUSES = {'todo': 30, 'in_progress': 20, 'review': 10, 'completed': 40}
+TASK_PRIORITIES = {'low': 25, 'medium': 45, 'high': 22, 'urgent': 8}
+ASSIGNEES_PER_TASK = {0: 20, 1: 65, 2: 15}
+COMMENTS_PER_TASK = {0: 40, 1: 25, 2: 15, 3: 10, 5: 7, 8: 3}
+READ_NOTIFICATION_SHARE = 0.6
+
+WORDS = (
+    'api auth backend billing board cache checkout dashboard database deploy design docs email '
+    'export frontend import invoice login migration mobile onboarding payment performance '
+    'pipeline profile release report search security settings signup sync upload'
+).split()
+VERBS = 'Add Build Fix Improve Refactor Review Test Update Document Migrate'.split()
+
+
+def _weighted(rng, weights):
+    return rng.choices(list(weights), weights=list(weights.values()))[0]
+
+
+class Command(BaseCommand):
+    help = 'Generate a large synthetic dataset with bulk inserts for benchmarks (see bench_views)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200, help='Users to create (default: 200)')
+        parser.add_argument('--projects', type=int, default=100, help='Projects to create (default: 100)')
+        parser.add_argument('--tasks', type=int, default=20000, help='Tasks to create in total (default: 20000)')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Tasks written per chunk (default: 1000)')
+        parser.add_argument('--prefix', default='bench', help='Username prefix of the generated users (default: bench)')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed, for reproducible datasets (default: 0)')
+
+    def handle(self, *args, **options):
+        if options['users'] < 2 or options['projects'] < 1:
+            raise CommandError('At least 2 users and 1 project are needed.')
+        prefix = options['prefix']
+        if User.objects.filter(username__startswith=f'{prefix}_').exists():
+            raise CommandError(f'Users named {prefix}_* already exist; use another --prefix or a fresh database.')
+
+        self.rng = random.Random(options['seed'])
+        self.now = timezone.now()
+        self.counts = Counter()
+        started = time.perf_counter()
+
+        users = self.create_users(prefix, options['users'])
+        projects, teams = self.create_projects(prefix, users, options['projects'])
+        self.create_tasks(projects, teams, options['tasks'], options['batch_size'])
+        rebuild_project_stats()
+
+        self.counts['seconds'] = round(time.perf_counter() - started, 1)
+        busiest = Counter(user_id for team in teams.values() for user_id in team).most_common(1)[0][0]
+        self.stdout.write(self.style.SUCCESS(
+            ', '.join(f'{count} {name}' for name, count in self.counts.items())
+        ))
+        self.stdout.write(f'Benchmark user: {User.objects.get(pk=busiest).username} (password "bench")')
+
+    def create_users(self, prefix, count):
+        password = make_password('bench')
+        users = User.objects.bulk_create([
+            User(
+                username=f'{prefix}_{index}', email=f'{prefix}_{index}@example.com', password=password,
+                first_name=f'Bench{index}', last_name='User',
+            )
+            for index in range(count)
+        ], batch_size=1000)
+        self.counts['users'] = len(users)
+        return users
+
+    def create_projects(self, prefix, users, count):
+        """Projects with teams drawn so that a few users belong to many projects"""
+        rng = self.rng
+        # Zipf-like popularity: user i is picked with weight 1 / (i + 1)
+        popularity = [1 / (index + 1) for index in range(len(users))]
+        projects = []
+        teams = {}
+        memberships = []
+        for index in range(count):
+            owner = rng.choice(users)
+            project = Project(
+                name=f'{rng.choice(WORDS).title()} {rng.choice(WORDS)} {prefix} {index}',
+                description=' '.join(rng.choices(WORDS, k=12)),
+                owner=owner,
+                status=_weighted(rng, PROJECT_STATUSES),
+                priority=_weighted(rng, PROJECT_PRIORITIES),
+                start_date=(self.now - timedelta(days=rng.randint(0, 365))).date(),
+            )
+            size = rng.randint(3, min(12, len(users)))
+            team = {owner.pk}
+            while len(team) < size:
+                team.update(user.pk for user in rng.choices(users, weights=popularity, k=size - len(team)))
+            projects.append(project)
+            teams[project.pk] = list(team)
+            memberships.extend(
+                ProjectMembership(project=project, user_id=user_id, role='admin' if user_id == owner.pk else 'member')
+                for user_id in team
+            )
+        with transaction.atomic():
+            Project.objects.bulk_create(projects, batch_size=1000)
+            ProjectMembership.objects.bulk_create(memberships, batch_size=1000)
+            index_documents([project_document(project) for project in projects])
+        self.counts['projects'] = len(projects)
+        self.counts['memberships'] = len(memberships)
+        return projects, teams
+
+    def create_tasks(self, projects, teams, count, batch_size):
+        """Tasks spread unevenly over the projects, written in chunks with their related rows"""
+        rng = self.rng
+        sizes = Counter(rng.choices(projects, weights=[rng.lognormvariate(0, 1) for _ in projects], k=count))
+        chunk = []
+        for project in projects:
+            positions = Counter()
+            for _ in range(sizes[project]):
+                status = _weighted(rng, TASK_STATUSES)
+                positions[status] += 1
+                chunk.append(self.build_task(project, teams[project.pk], status, positions[status]))
+                if len(chunk) >= batch_size:
+                    self.write_chunk(chunk, teams)
+                    chunk = []
+        if chunk:
+            self.write_chunk(chunk, teams)
+
+    def build_task(self, project, team, status, position):
+        rng = self.rng
+        task = Task(
+            project=project,
+            title=f'{rng.choice(VERBS)} {rng.choice(WORDS)} {rng.choice(WORDS)}',
+            description=' '.join(rng.choices(WORDS, k=rng.randint(5, 30))),
+            status=status,
+            priority=_weighted(rng, TASK_PRIORITIES),
+            created_by_id=rng.choice(team),
+            position=position * POSITION_GAP,
+            estimated_hours=Decimal(rng.randint(1, 40)),
+        )
+        if rng.random() < 0.8:
+            # Due dates around now, so that some tasks are overdue
+            task.due_date = self.now + timedelta(days=rng.randint(-30, 60), hours=rng.randint(0, 23))
+        if status == 'completed':
+            task.completed_date = self.now - timedelta(days=rng.randint(0, 90))
+            task.actual_hours = Decimal(rng.randint(1, 50))
+        task.assignee_ids = rng.sample(team, min(len(team), _weighted(rng, ASSIGNEES_PER_TASK)))
+        return task
+
+    def write_chunk(self, tasks, teams):
+        rng = self.rng
+        assignments = []
+        comments = []
+        activities = []
+        notifications = []
+        for task in tasks:
+            team = teams[task.project_id]
+            for user_id in task.assignee_ids:
+                assignments.append(Assignment(task_id=task.pk, user_id=user_id))
+                if user_id != task.created_by_id:
+                    notification = Notification.build_task_assignment(user_id, task, None)
+                    notification.sender_id = task.created_by_id
+                    if rng.random() < READ_NOTIFICATION_SHARE:
+                        notification.is_read = True
+                        notification.read_at = self.now
+                    notifications.append(notification)
+            for _ in range(_weighted(rng, COMMENTS_PER_TASK)):
+                comments.append(TaskComment(
+                    task=task, author_id=rng.choice(team), content=' '.join(rng.choices(WORDS, k=rng.randint(3, 20)))
+                ))
+            activities.append(TaskActivity(
+                task=task, user_id=task.created_by_id, activity_type='created', description='Task created'
+            ))
+            if task.status != 'todo':
+                activities.append(TaskActivity(
+                    task=task, user_id=rng.choice(team), activity_type='status_changed',
+                    description=f'Status changed from todo to {task.status}',
+                    old_value='todo', new_value=task.status,
+                ))
+
+        with transaction.atomic():
+            Task.objects.bulk_create(tasks, batch_size=500)
+            Assignment.objects.bulk_create(assignments, batch_size=500)
+            TaskComment.objects.bulk_create(comments, batch_size=500)
+            TaskActivity.objects.bulk_create(activities, batch_size=500)
+            Notification.objects.bulk_create(notifications, batch_size=500)
+            index_documents(
+                [task_document(task) for task in tasks]
+                + [comment_document(comment, comment.task.project_id) for comment in comments]
+            )
+        self.counts['tasks'] += len(tasks)
+        self.counts['comments'] += len(comments)
+        self.counts['activities'] += len(activities)
+        self.counts['notifications'] += len(notifications)
+        self.stdout.write(f'  {self.counts["tasks"]} tasks written')
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0003_project_deletion_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectStats',
+            fields=[
+                ('project', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='projects.project')),
+                ('total_tasks', models.PositiveIntegerField(default=0)),
+                ('todo_tasks', models.PositiveIntegerField(default=0)),
+                ('in_progress_tasks', models.PositiveIntegerField(default=0)),
+                ('review_tasks', models.PositiveIntegerField(default=0)),
+                ('completed_tasks', models.PositiveIntegerField(default=0)),
+                ('low_priority_tasks', models.PositiveIntegerField(default=0)),
+                ('medium_priority_tasks', models.PositiveIntegerField(default=0)),
+                ('high_priority_tasks', models.PositiveIntegerField(default=0)),
+                ('urgent_priority_tasks', models.PositiveIntegerField(default=0)),
+                ('overdue_tasks', models.PositiveIntegerField(default=0)),
+                ('estimated_hours', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('actual_hours', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('last_activity_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'project stats',
+            },
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:21
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0004_project_stats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('project_id', models.UUIDField()),
+                ('kind', models.CharField(choices=[('project', 'Project'), ('task', 'Task'), ('comment', 'Comment'), ('membership', 'Membership')], max_length=20)),
+                ('object_id', models.CharField(max_length=64)),
+                ('deleted_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='projectmembership',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='projectmembership',
+            index=models.Index(fields=['project', 'updated_at'], name='projects_pr_project_4ccf63_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tombstone',
+            index=models.Index(fields=['project_id', 'deleted_at'], name='projects_to_project_0b5371_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tombstone',
+            index=models.Index(fields=['deleted_at'], name='projects_to_deleted_4766b4_idx'),
+        ),
+    ]
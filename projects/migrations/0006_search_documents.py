@@ -0,0 +1,112 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:29
+
+from django.db import migrations, models
+from django.db.models import F
+
+# Full-text index of the search documents: on SQLite an external-content FTS5
+# table fed by triggers, on PostgreSQL a generated tsvector column
+SQLITE_INDEX_SQL = [
+    """CREATE VIRTUAL TABLE projects_searchdocument_fts USING fts5(
+        title, body,
+        content='projects_searchdocument', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    """CREATE TRIGGER projects_searchdocument_ai AFTER INSERT ON projects_searchdocument BEGIN
+        INSERT INTO projects_searchdocument_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END""",
+    """CREATE TRIGGER projects_searchdocument_ad AFTER DELETE ON projects_searchdocument BEGIN
+        INSERT INTO projects_searchdocument_fts(projects_searchdocument_fts, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+    END""",
+    """CREATE TRIGGER projects_searchdocument_au AFTER UPDATE OF title, body ON projects_searchdocument BEGIN
+        INSERT INTO projects_searchdocument_fts(projects_searchdocument_fts, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+        INSERT INTO projects_searchdocument_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END""",
+]
+
+SQLITE_DROP_INDEX_SQL = [
+    'DROP TRIGGER IF EXISTS projects_searchdocument_ai',
+    'DROP TRIGGER IF EXISTS projects_searchdocument_ad',
+    'DROP TRIGGER IF EXISTS projects_searchdocument_au',
+    'DROP TABLE IF EXISTS projects_searchdocument_fts',
+]
+
+# The 'simple' configuration does not stem, like the FTS5 tokenizer
+POSTGRES_INDEX_SQL = [
+    """ALTER TABLE projects_searchdocument ADD COLUMN search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('simple', title), 'A') || setweight(to_tsvector('simple', body), 'B')
+        ) STORED""",
+    'CREATE INDEX projects_searchdocument_vector ON projects_searchdocument USING GIN (search_vector)',
+]
+
+POSTGRES_DROP_INDEX_SQL = [
+    'DROP INDEX IF EXISTS projects_searchdocument_vector',
+    'ALTER TABLE projects_searchdocument DROP COLUMN IF EXISTS search_vector',
+]
+
+INDEX_SQL = {'sqlite': SQLITE_INDEX_SQL, 'postgresql': POSTGRES_INDEX_SQL}
+DROP_INDEX_SQL = {'sqlite': SQLITE_DROP_INDEX_SQL, 'postgresql': POSTGRES_DROP_INDEX_SQL}
+
+
+def create_index(apps, schema_editor):
+    for sql in INDEX_SQL.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql)
+
+
+def drop_index(apps, schema_editor):
+    for sql in DROP_INDEX_SQL.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql)
+
+
+def index_existing_rows(apps, schema_editor):
+    """Create the search documents of the projects, tasks and comments already stored"""
+    SearchDocument = apps.get_model('projects', 'SearchDocument')
+    sources = [
+        (apps.get_model('projects', 'Project').objects.values('id', 'name', 'description'),
+         lambda row: SearchDocument(kind='project', object_id=row['id'], project_id=row['id'],
+                                    title=row['name'], body=row['description'] or '')),
+        (apps.get_model('task_management', 'Task').objects.values('id', 'project_id', 'title', 'description'),
+         lambda row: SearchDocument(kind='task', object_id=row['id'], project_id=row['project_id'],
+                                    task_id=row['id'], title=row['title'], body=row['description'] or '')),
+        (apps.get_model('task_management', 'TaskComment').objects.values(
+            'id', 'task_id', 'content', project_id=F('task__project_id')),
+         lambda row: SearchDocument(kind='comment', object_id=row['id'], project_id=row['project_id'],
+                                    task_id=row['task_id'], body=row['content'])),
+    ]
+    for rows, build in sources:
+        batch = []
+        for row in rows.iterator(chunk_size=2000):
+            batch.append(build(row))
+            if len(batch) >= 500:
+                SearchDocument.objects.bulk_create(batch)
+                batch = []
+        SearchDocument.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0005_tombstones_and_membership_updated_at'),
+        ('task_management', '0004_sparse_task_positions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('project', 'Project'), ('task', 'Task'), ('comment', 'Comment')], max_length=20)),
+                ('object_id', models.UUIDField()),
+                ('project_id', models.UUIDField()),
+                ('task_id', models.UUIDField(blank=True, null=True)),
+                ('title', models.TextField(blank=True)),
+                ('body', models.TextField(blank=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['project_id'], name='projects_se_project_43ce20_idx'), models.Index(fields=['task_id'], name='projects_se_task_id_7ecc8b_idx')],
+                'unique_together': {('kind', 'object_id')},
+            },
+        ),
+        migrations.RunPython(create_index, drop_index),
+        migrations.RunPython(index_existing_rows, migrations.RunPython.noop),
+    ]
@@ -1,9 +1,33 @@
 from django.db import models
+from django.db.models import F
 from django.conf import settings
 from django.core.validators import MinLengthValidator, MinValueValidator, MaxValueValidator
 import uuid
 
 
+TASK_STATUSES = ['todo', 'in_progress', 'review', 'completed']
+
+
+def empty_task_stats():
+    """Task statistics for a project without tasks"""
+    return dict.fromkeys(['total'] + TASK_STATUSES, 0)
+
+
+class ProjectQuerySet(models.QuerySet):
+    """Queryset helpers for projects"""
+
+    def with_stats(self):
+        """
+        Annotate each project with the task counts of its ProjectStats rollup
+        (total_tasks, todo_tasks, ..., completed_tasks) through a single join.
+        The counts are None for projects whose rollup row is missing.
+        """
+        return self.annotate(**{
+            f'{key}_tasks': F(f'stats__{key}_tasks')
+            for key in ['total'] + TASK_STATUSES
+        })
+
+
 class Project(models.Model):
     """Main project model for organizing tasks and teams"""
     PRIORITY_CHOICES = [
@@ -46,9 +70,15 @@ class Project(models.Model):
     )
     color = models.CharField(max_length=7, default='#007bff', help_text="Hex color code")
     is_archived = models.BooleanField(default=False)
+    pending_deletion = models.BooleanField(
+        default=False,
+        help_text="Hidden while a background job deletes the project"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ProjectQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created_at']
         indexes = [
@@ -62,30 +92,92 @@ class Project(models.Model):
     @property
     def completion_percentage(self):
         """Calculate project completion based on tasks"""
-        total_tasks = self.tasks.count()
+        # Prefer counts annotated by ProjectQuerySet.with_stats(), else read the rollup
+        total_tasks = getattr(self, 'total_tasks', None)
+        completed_tasks = getattr(self, 'completed_tasks', None)
+        if total_tasks is None or completed_tasks is None:
+            return self.get_stats().completion_percentage
         if total_tasks == 0:
             return 0
-        completed_tasks = self.tasks.filter(status='completed').count()
         return int((completed_tasks / total_tasks) * 100)
 
+    def get_stats(self):
+        """Task rollup of this project, built on first access if missing"""
+        try:
+            return self.stats
+        except ProjectStats.DoesNotExist:
+            from .rollup import load_project_stats
+            self.stats = load_project_stats([self.pk])[self.pk]
+            return self.stats
+
     @property
     def total_members(self):
         """Get total number of project members"""
         return self.members.count()
 
     def is_member(self, user):
-        """Check if a user is a member of this project"""
-        return self.members.filter(id=user.id).exists()
+        """Check if a user is the owner or a member of this project"""
+        from .permissions import can_view_project
+        return can_view_project(user, self)
 
     def can_edit(self, user):
         """Check if user can edit this project"""
-        return (
-            user == self.owner or
-            self.projectmembership_set.filter(
-                user=user, 
-                role__in=['admin', 'manager']
-            ).exists()
-        )
+        from .permissions import can_edit_project
+        return can_edit_project(user, self)
+
+    def can_delete(self, user):
+        """Check if user can delete this project"""
+        from .permissions import can_delete_project
+        return can_delete_project(user, self)
+
+
+class ProjectStats(models.Model):
+    """
+    Materialized task rollup of a project.
+
+    Kept up to date incrementally by the task signal handlers (see
+    ``projects.rollup``) and rebuilt with ``manage.py rebuild_project_stats``.
+    """
+    project = models.OneToOneField(
+        Project,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats'
+    )
+    total_tasks = models.PositiveIntegerField(default=0)
+    todo_tasks = models.PositiveIntegerField(default=0)
+    in_progress_tasks = models.PositiveIntegerField(default=0)
+    review_tasks = models.PositiveIntegerField(default=0)
+    completed_tasks = models.PositiveIntegerField(default=0)
+    low_priority_tasks = models.PositiveIntegerField(default=0)
+    medium_priority_tasks = models.PositiveIntegerField(default=0)
+    high_priority_tasks = models.PositiveIntegerField(default=0)
+    urgent_priority_tasks = models.PositiveIntegerField(default=0)
+    overdue_tasks = models.PositiveIntegerField(default=0)
+    estimated_hours = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    actual_hours = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    last_activity_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = 'project stats'
+
+    def __str__(self):
+        return f"Stats for {self.project_id}"
+
+    @property
+    def completion_percentage(self):
+        """Share of completed tasks"""
+        if not self.total_tasks:
+            return 0
+        return int((self.completed_tasks / self.total_tasks) * 100)
+
+    def as_task_stats(self):
+        """Total and per-status counts in the shape of ``empty_task_stats()``"""
+        stats = {'total': self.total_tasks}
+        for status in TASK_STATUSES:
+            stats[status] = getattr(self, f'{status}_tasks')
+        return stats
 
 
 class ProjectMembership(models.Model):
@@ -100,12 +192,14 @@ class ProjectMembership(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     role = models.CharField(max_length=20, choices=ROLE_CHOICES, default='member')
     joined_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True)
 
     class Meta:
         unique_together = ('project', 'user')
         indexes = [
             models.Index(fields=['project', 'role']),
+            models.Index(fields=['project', 'updated_at']),
         ]
 
     def __str__(self):
@@ -158,3 +252,117 @@ class ProjectInvitation(models.Model):
         """Check if invitation has expired"""
         from django.utils import timezone
         return timezone.now() > self.expires_at
+
+
+class ProjectDeletionJob(models.Model):
+    """Background deletion of a project, polled by the client for progress"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    # Plain values rather than a foreign key: the job outlives the project
+    project_id = models.UUIDField()
+    project_name = models.CharField(max_length=200)
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='project_deletion_jobs'
+    )
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    total_tasks = models.PositiveIntegerField(default=0)
+    deleted_tasks = models.PositiveIntegerField(default=0)
+    message = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"Deletion of {self.project_name} ({self.status})"
+
+    @property
+    def progress_percentage(self):
+        """Share of the project's tasks deleted so far"""
+        if self.status == 'completed':
+            return 100
+        if not self.total_tasks:
+            return 0
+        # Tasks added while the job was queued are deleted too
+        return min(int((self.deleted_tasks / self.total_tasks) * 100), 100)
+
+
+class Tombstone(models.Model):
+    """
+    Trace of a deleted project, task, comment or membership.
+
+    Project tombstones are recorded per former owner or member, with the
+    user's id as ``object_id``.
+
+    Read by the board delta sync (``task_management.sync``) so that clients
+    can drop rows that no longer exist; see ``projects.tombstones``.
+    """
+    KIND_CHOICES = [
+        ('project', 'Project'),
+        ('task', 'Task'),
+        ('comment', 'Comment'),
+        ('membership', 'Membership'),
+    ]
+
+    # Plain values rather than foreign keys: the rows are gone
+    project_id = models.UUIDField()
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.CharField(max_length=64)
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['project_id', 'deleted_at']),
+            models.Index(fields=['deleted_at']),
+        ]
+
+    def __str__(self):
+        return f"Deleted {self.kind} {self.object_id}"
+
+
+class SearchDocument(models.Model):
+    """
+    Searchable text of a project, task or comment.
+
+    The database keeps a full-text index over ``title`` and ``body``: an FTS5
+    table on SQLite, a ``tsvector`` column on PostgreSQL. See
+    ``projects.search``.
+    """
+    KIND_CHOICES = [
+        ('project', 'Project'),
+        ('task', 'Task'),
+        ('comment', 'Comment'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.UUIDField()
+    # Plain values rather than foreign keys, like Tombstone: the index is
+    # maintained by signals and bulk writes, not by cascades
+    project_id = models.UUIDField()
+    task_id = models.UUIDField(null=True, blank=True)
+    title = models.TextField(blank=True)
+    body = models.TextField(blank=True)
+
+    class Meta:
+        unique_together = ('kind', 'object_id')
+        indexes = [
+            models.Index(fields=['project_id']),
+            models.Index(fields=['task_id']),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id}"
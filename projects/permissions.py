@@ -0,0 +1,154 @@
+"""
+Project access checks backed by a cached role map.
+
+The projects a user owns or belongs to, together with the role held there,
+are loaded as a {project_id: role} map with a single query and kept in
+Django's cache for ``ROLE_CACHE_TIMEOUT``. Entries held in process-local
+memory, whether the configured cache is local or the shared cache is
+unavailable and the fallback is used, expire after ``LOCAL_CACHE_TIMEOUT``
+instead. Projects pending deletion are left out, which hides them from
+every view filtering on these ids. Signal handlers in ``projects.signals``
+invalidate the entry whenever a membership or a project's owner changes. The
+map is additionally memoized on the request user, so every check in a view
+or template after the first is answered from memory.
+"""
+import logging
+from collections import Counter
+
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db.models import CharField, Value
+
+from project_manager.caching import cache_timeout
+
+logger = logging.getLogger(__name__)
+
+OWNER_ROLE = 'owner'
+EDIT_ROLES = (OWNER_ROLE, 'admin', 'manager')
+
+ROLE_CACHE_TIMEOUT = 60 * 60
+
+_ROLES_ATTR = '_project_roles'
+
+# Process-local fallback used when the configured cache backend fails
+_fallback_cache = LocMemCache('project-roles', {})
+
+# Hit/miss counters of the shared role cache for this process
+role_cache_stats = Counter()
+
+
+def _pk(obj):
+    """Primary key of a model instance, or the value itself if already a key"""
+    return getattr(obj, 'pk', obj)
+
+
+def _cache_key(user_id):
+    return f'projects:roles:{user_id}'
+
+
+def _cache_call(method, *args, **kwargs):
+    """Call ``method`` on the shared cache, falling back to local memory
+
+    A ``timeout`` keyword is capped by ``cache_timeout`` for the cache that
+    ends up holding the entry.
+    """
+    try:
+        return getattr(cache, method)(*args, **_capped(kwargs))
+    except Exception:
+        logger.warning('Project role cache unavailable, using local memory', exc_info=True)
+        return getattr(_fallback_cache, method)(*args, **_capped(kwargs, _fallback_cache))
+
+
+def _capped(kwargs, backend=None):
+    if 'timeout' in kwargs:
+        kwargs = {**kwargs, 'timeout': cache_timeout(kwargs['timeout'], backend)}
+    return kwargs
+
+
+def _load_project_roles(user_id):
+    """Query the {project_id: role} map of a user"""
+    from .models import Project, ProjectMembership
+
+    memberships = ProjectMembership.objects.filter(
+        user_id=user_id, project__pending_deletion=False
+    ).order_by().values_list('project_id', 'role')
+    owned = Project.objects.filter(owner_id=user_id, pending_deletion=False).order_by().annotate(
+        role=Value(OWNER_ROLE, output_field=CharField())
+    ).values_list('pk', 'role')
+
+    roles = {}
+    for project_id, role in memberships.union(owned, all=True):
+        if roles.get(project_id) != OWNER_ROLE:
+            roles[project_id] = role
+    return roles
+
+
+def get_project_roles(user):
+    """Return the {project_id: role} map for ``user``"""
+    if not user.is_authenticated:
+        return {}
+
+    roles = getattr(user, _ROLES_ATTR, None)
+    if roles is None:
+        roles = _cache_call('get', _cache_key(user.pk))
+        if roles is None:
+            role_cache_stats['misses'] += 1
+            roles = _load_project_roles(user.pk)
+            _cache_call('set', _cache_key(user.pk), roles, timeout=ROLE_CACHE_TIMEOUT)
+        else:
+            role_cache_stats['hits'] += 1
+        setattr(user, _ROLES_ATTR, roles)
+    return roles
+
+
+def get_project_ids(user):
+    """Ids of every project ``user`` owns or is a member of"""
+    return list(get_project_roles(user))
+
+
+def invalidate_project_roles(*user_ids):
+    """Drop cached role maps after memberships or ownership changed"""
+    for user_id in user_ids:
+        if user_id is not None:
+            _cache_call('delete', _cache_key(user_id))
+            _fallback_cache.delete(_cache_key(user_id))
+
+
+def clear_project_roles(user):
+    """Drop the role map memoized on the request user"""
+    if hasattr(user, _ROLES_ATTR):
+        delattr(user, _ROLES_ATTR)
+
+
+def get_project_role(user, project):
+    """Role of ``user`` in ``project`` ('owner', 'admin', ...) or None"""
+    return get_project_roles(user).get(_pk(project))
+
+
+def can_view_project(user, project):
+    """Owners and members of any role can view a project"""
+    return get_project_role(user, project) is not None
+
+
+def can_edit_project(user, project):
+    """Owners, admins and managers can edit a project and invite members"""
+    return get_project_role(user, project) in EDIT_ROLES
+
+
+def can_delete_project(user, project):
+    """Only the owner can delete a project"""
+    return get_project_role(user, project) == OWNER_ROLE
+
+
+def can_view_task(user, task):
+    """Project members and the task's assignees can view and update a task, unless its project is being deleted"""
+    if can_view_project(user, task.project_id):
+        return True
+    return user.is_authenticated and type(task).objects.filter(
+        pk=task.pk, assigned_to=user, project__pending_deletion=False
+    ).exists()
+
+
+def can_delete_task(user, task):
+    """The project owner and the task's creator can delete a task"""
+    return task.created_by_id == user.pk or can_delete_project(user, task.project_id)
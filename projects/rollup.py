@@ -0,0 +1,161 @@
+"""
+Incremental maintenance of the ProjectStats task rollup.
+
+Every task save or delete becomes a single UPDATE of the project's rollup row
+applying the difference between the task's previous and current state as
+``F()`` deltas, so reading a project's counts never scans its tasks. The
+overdue count also depends on the clock: it is recounted with one indexed
+COUNT subquery whenever a change touches a due date, and refreshed for every
+project by ``manage.py rebuild_project_stats``. Rows that are missing for any
+reason are rebuilt on first read.
+"""
+from decimal import Decimal
+
+from django.db.models import Count, DecimalField, F, Max, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from task_management.models import Task
+
+from .models import TASK_STATUSES, Project, ProjectStats
+
+REBUILD_BATCH_SIZE = 500
+
+STATUS_FIELDS = {status: f'{status}_tasks' for status in TASK_STATUSES}
+PRIORITY_FIELDS = {priority: f'{priority}_priority_tasks' for priority, _ in Task.PRIORITY_CHOICES}
+HOUR_FIELDS = ('estimated_hours', 'actual_hours')
+
+# Task fields the rollup is derived from
+STATE_FIELDS = ('project_id', 'status', 'priority', 'due_date') + HOUR_FIELDS
+
+_HOURS = DecimalField(max_digits=12, decimal_places=2)
+
+
+def task_state(task):
+    """Snapshot of the rollup fields of a task, or None if some are deferred"""
+    deferred = task.get_deferred_fields()
+    if any(field in deferred or field.removesuffix('_id') in deferred for field in STATE_FIELDS):
+        return None
+    return {field: getattr(task, field) for field in STATE_FIELDS}
+
+
+def _add_state(deltas, state, sign):
+    """Accumulate the contribution of one task state into ``deltas``"""
+    if state is None:
+        return
+    project_deltas = deltas.setdefault(state['project_id'], {})
+
+    def add(field, amount):
+        project_deltas[field] = project_deltas.get(field, 0) + amount
+
+    add('total_tasks', sign)
+    if state['status'] in STATUS_FIELDS:
+        add(STATUS_FIELDS[state['status']], sign)
+    if state['priority'] in PRIORITY_FIELDS:
+        add(PRIORITY_FIELDS[state['priority']], sign)
+    for field in HOUR_FIELDS:
+        if state[field]:
+            add(field, sign * Decimal(state[field]))
+
+
+def _overdue_count(project_id, now):
+    """Subquery counting the open tasks of a project past their due date"""
+    overdue = Task.objects.filter(
+        project_id=project_id, due_date__lt=now
+    ).exclude(status='completed').order_by().values('project_id').annotate(count=Count('pk')).values('count')
+    return Coalesce(Subquery(overdue), 0)
+
+
+def apply_task_change(old_state, new_state):
+    """
+    Update the rollup after a task moved from ``old_state`` to ``new_state``.
+
+    Either state is None for created and deleted tasks. Issues one UPDATE per
+    affected project (two if the task moved between projects).
+    """
+    deltas = {}
+    _add_state(deltas, old_state, -1)
+    _add_state(deltas, new_state, 1)
+
+    due_changed = any(
+        state and state['due_date'] is not None for state in (old_state, new_state)
+    )
+    now = timezone.now()
+    for project_id, project_deltas in deltas.items():
+        # Clamp at zero so a drifted row (e.g. after bulk writes that bypass
+        # signals) cannot fail the task save; the next rebuild corrects it
+        updates = {
+            field: Greatest(F(field) + delta, 0) if delta < 0 else F(field) + delta
+            for field, delta in project_deltas.items() if delta
+        }
+        if due_changed:
+            updates['overdue_tasks'] = _overdue_count(project_id, now)
+        updates['last_activity_at'] = now
+        updates['updated_at'] = now
+        ProjectStats.objects.filter(project_id=project_id).update(**updates)
+
+
+def _rollup_annotations(now):
+    """Aggregates computing every rollup field from a project's tasks"""
+    annotations = {'total_tasks': Count('tasks')}
+    for status, field in STATUS_FIELDS.items():
+        annotations[field] = Count('tasks', filter=Q(tasks__status=status))
+    for priority, field in PRIORITY_FIELDS.items():
+        annotations[field] = Count('tasks', filter=Q(tasks__priority=priority))
+    annotations['overdue_tasks'] = Count(
+        'tasks', filter=Q(tasks__due_date__lt=now) & ~Q(tasks__status='completed')
+    )
+    for field in HOUR_FIELDS:
+        annotations[field] = Coalesce(
+            Sum(f'tasks__{field}'), Value(Decimal('0')), output_field=_HOURS
+        )
+    annotations['last_activity_at'] = Coalesce(Max('tasks__updated_at'), F('updated_at'))
+    return annotations
+
+
+def rebuild_project_stats(project_ids=None, batch_size=REBUILD_BATCH_SIZE):
+    """
+    Recompute the rollup of ``project_ids`` (all projects when None).
+
+    Streams one grouped aggregate query over the tasks and upserts the rows
+    in batches. Returns the number of rows written.
+    """
+    projects = Project.objects.all()
+    if project_ids is not None:
+        projects = projects.filter(pk__in=project_ids)
+
+    now = timezone.now()
+    annotations = _rollup_annotations(now)
+    rows = projects.order_by().values('pk').annotate(**annotations)
+    fields = list(annotations)
+
+    written = 0
+    batch = []
+    for row in rows.iterator(chunk_size=batch_size):
+        batch.append(ProjectStats(project_id=row.pop('pk'), updated_at=now, **row))
+        if len(batch) >= batch_size:
+            written += _upsert(batch, fields)
+            batch = []
+    if batch:
+        written += _upsert(batch, fields)
+    return written
+
+
+def _upsert(batch, fields):
+    ProjectStats.objects.bulk_create(
+        batch,
+        update_conflicts=True,
+        unique_fields=['project'],
+        update_fields=fields + ['updated_at'],
+    )
+    return len(batch)
+
+
+def load_project_stats(project_ids):
+    """Return {project_id: ProjectStats}, rebuilding rows that are missing"""
+    stats = ProjectStats.objects.in_bulk(project_ids)
+    missing = [project_id for project_id in project_ids if project_id not in stats]
+    if missing:
+        rebuild_project_stats(missing)
+        stats.update(ProjectStats.objects.in_bulk(missing))
+    return stats
@@ -1,90 +1,175 @@
-def safe_delete_project(project):
+"""
+Set-based project deletion.
+
+Projects are deleted with raw SQL so that legacy tables left behind by the
+old ``tasks`` app are cleaned up as well. Tasks are removed in chunks: every
+chunk runs one ``DELETE ... WHERE task_id IN (SELECT ...)`` per dependent
+table inside its own short transaction, so the SQLite write lock is released
+between chunks instead of being held for the whole deletion. Tables that do
+not exist in the current schema are skipped.
+"""
+import logging
+
+logger = logging.getLogger(__name__)
+
+DELETE_CHUNK_SIZE = 500
+
+# Task tables with the statements removing their dependent rows. ``{tasks}``
+# is replaced by a subquery selecting the ids of the current chunk of tasks.
+TASK_TABLES = [
+    ('tasks_task', [
+        ('tasks_taskcomment', "DELETE FROM tasks_taskcomment WHERE parent_comment_id IN "
+                              "(SELECT id FROM tasks_taskcomment WHERE task_id IN ({tasks}))"),
+        ('tasks_taskcomment', "DELETE FROM tasks_taskcomment WHERE task_id IN ({tasks})"),
+        ('tasks_taskactivity', "DELETE FROM tasks_taskactivity WHERE task_id IN ({tasks})"),
+        ('tasks_taskattachment', "DELETE FROM tasks_taskattachment WHERE task_id IN ({tasks})"),
+        ('tasks_task_assigned_to', "DELETE FROM tasks_task_assigned_to WHERE task_id IN ({tasks})"),
+        ('tasks_task_tags', "DELETE FROM tasks_task_tags WHERE task_id IN ({tasks})"),
+        ('tasks_task', "UPDATE tasks_task SET parent_task_id = NULL WHERE parent_task_id IN ({tasks})"),
+    ]),
+    ('task_management_task', [
+        ('task_management_taskactivity', "DELETE FROM task_management_taskactivity WHERE task_id IN ({tasks})"),
+        ('task_management_taskcomment', "DELETE FROM task_management_taskcomment WHERE task_id IN ({tasks})"),
+        ('task_management_taskattachment', "DELETE FROM task_management_taskattachment WHERE task_id IN ({tasks})"),
+        ('task_management_task_assigned_to', "DELETE FROM task_management_task_assigned_to WHERE task_id IN ({tasks})"),
+        ('notification_system_notification', "DELETE FROM notification_system_notification WHERE task_id IN ({tasks})"),
+    ]),
+]
+
+# Rows referencing the project itself, deleted once all tasks are gone
+PROJECT_TABLES = [
+    'tasks_tasklist',
+    'notification_system_notification',
+    'projects_projectinvitation',
+    'projects_projectmembership',
+    'projects_projectstats',
+    'projects_searchdocument',
+]
+
+
+def _report(progress, **event):
+    """Log a progress event and forward it to the optional callback"""
+    logger.info('Project deletion: %s', event)
+    if progress:
+        progress(event)
+
+
+def _count(cursor, sql, params):
+    cursor.execute(sql, params)
+    return cursor.fetchone()[0]
+
+
+def _delete_tasks(connection, tables, task_table, statements, project_id, chunk_size, progress):
+    """Delete the tasks of one task table chunk by chunk; returns the number deleted"""
+    from django.db import transaction
+
+    with connection.cursor() as cursor:
+        total = _count(cursor, f"SELECT COUNT(*) FROM {task_table} WHERE project_id = %s", [project_id])
+    if not total:
+        return 0
+
+    chunk = f"SELECT id FROM {task_table} WHERE project_id = %s ORDER BY id LIMIT {int(chunk_size)}"
+    statements = [sql.format(tasks=chunk) for table, sql in statements if table in tables]
+    deleted = 0
+
+    while True:
+        # One short write transaction per chunk releases the lock in between
+        with transaction.atomic(), connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql, [project_id])
+            cursor.execute(f"DELETE FROM {task_table} WHERE id IN ({chunk})", [project_id])
+            removed = cursor.rowcount
+        if removed <= 0:
+            break
+        deleted += removed
+        _report(progress, stage='tasks', table=task_table, deleted=deleted, total=total)
+    return deleted
+
+
+def count_project_tasks(project):
+    """Number of tasks of a project across every task table in the schema"""
+    from django.db import connection
+
+    tables = set(connection.introspection.table_names())
+    project_id = project._meta.pk.get_db_prep_value(project.pk, connection)
+    with connection.cursor() as cursor:
+        return sum(
+            _count(cursor, f"SELECT COUNT(*) FROM {task_table} WHERE project_id = %s", [project_id])
+            for task_table, statements in TASK_TABLES if task_table in tables
+        )
+
+
+def safe_delete_project(project, chunk_size=DELETE_CHUNK_SIZE, progress=None):
     """
     Safely delete a project by handling all foreign key constraints manually
+
+    ``progress`` is an optional callable receiving a dict for every completed
+    step. Returns a ``(success, message)`` tuple. A failure part-way through
+    leaves the project row in place, so the deletion can simply be retried.
     """
     from django.db import transaction, connection
-    
+    from .models import Project
+    from .tombstones import record_project_deletion
+
+    affected_user_ids = [project.owner_id, *project.projectmembership_set.values_list('user_id', flat=True)]
+    project_id = Project._meta.pk.get_db_prep_value(project.pk, connection)
+
     try:
+        # Inspect the schema once and skip tables that do not exist
+        tables = set(connection.introspection.table_names())
+        unread_recipient_ids = []
+        if 'notification_system_notification' in tables:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT DISTINCT recipient_id FROM notification_system_notification "
+                    "WHERE project_id = %s AND is_read = %s",
+                    [project_id, False]
+                )
+                unread_recipient_ids = [row[0] for row in cursor.fetchall()]
+
+        deleted_tasks = 0
+        for task_table, statements in TASK_TABLES:
+            if task_table in tables:
+                deleted_tasks += _delete_tasks(
+                    connection, tables, task_table, statements, project_id, chunk_size, progress
+                )
+
         with transaction.atomic():
             with connection.cursor() as cursor:
-                project_id_str = str(project.id).replace('-', '')
-                print(f"Project ID without hyphens: {project_id_str}")
-                
-                # 1. Delete from tasks_task table and all related objects
-                # First, get all task IDs from this project
-                cursor.execute("SELECT id FROM tasks_task WHERE project_id = %s", [project_id_str])
-                task_ids = [row[0] for row in cursor.fetchall()]
-                
-                if task_ids:
-                    print(f"Found {len(task_ids)} tasks in tasks_task")
-                    
-                    # For each task, delete all related objects
-                    for task_id in task_ids:
-                        # Delete task comments (including child comments)
-                        cursor.execute("DELETE FROM tasks_taskcomment WHERE task_id = %s OR parent_comment_id IN (SELECT id FROM tasks_taskcomment WHERE task_id = %s)", [task_id, task_id])
-                        
-                        # Delete task activities
-                        cursor.execute("DELETE FROM tasks_taskactivity WHERE task_id = %s", [task_id])
-                        
-                        # Delete task attachments
-                        cursor.execute("DELETE FROM tasks_taskattachment WHERE task_id = %s", [task_id])
-                        
-                        # Delete task assigned_to relationships (M2M)
-                        cursor.execute("DELETE FROM tasks_task_assigned_to WHERE task_id = %s", [task_id])
-                        
-                        # Delete task tags relationships (M2M)
-                        cursor.execute("DELETE FROM tasks_task_tags WHERE task_id = %s", [task_id])
-                    
-                    # Handle parent_task_id self-referencing foreign keys
-                    # First, update any tasks that have these tasks as parents
-                    for task_id in task_ids:
-                        cursor.execute("UPDATE tasks_task SET parent_task_id = NULL WHERE parent_task_id = %s", [task_id])
-                    
-                    # Now delete all tasks
-                    for task_id in task_ids:
-                        cursor.execute("DELETE FROM tasks_task WHERE id = %s", [task_id])
-                    
-                    print(f"Deleted {len(task_ids)} tasks and related objects from tasks_task")
-                
-                # 2. Delete task lists from tasks_tasklist
-                cursor.execute("DELETE FROM tasks_tasklist WHERE project_id = %s", [project_id_str])
-                print(f"Deleted from tasks_tasklist: {cursor.rowcount} rows")
-                
-                # 3. Delete from task_management_task and related tables
-                # First get all task IDs for this project from task_management
-                cursor.execute("SELECT id FROM task_management_task WHERE project_id = %s", [project_id_str])
-                task_ids = [row[0] for row in cursor.fetchall()]
-                
-                if task_ids:
-                    # For each task, delete related objects
-                    for task_id in task_ids:
-                        cursor.execute("DELETE FROM task_management_taskactivity WHERE task_id = %s", [task_id])
-                        cursor.execute("DELETE FROM task_management_taskcomment WHERE task_id = %s", [task_id])
-                        cursor.execute("DELETE FROM task_management_taskattachment WHERE task_id = %s", [task_id])
-                        cursor.execute("DELETE FROM task_management_task_assigned_to WHERE task_id = %s", [task_id])
-                    print(f"Deleted task_management objects for {len(task_ids)} tasks")
-                
-                # Delete tasks themselves
-                cursor.execute("DELETE FROM task_management_task WHERE project_id = %s", [project_id_str])
-                print(f"Deleted from task_management_task: {cursor.rowcount} rows")
-                
-                # 4. Delete notifications
-                cursor.execute("DELETE FROM notification_system_notification WHERE project_id = %s", [project_id_str])
-                print(f"Deleted notifications: {cursor.rowcount} rows")
-                
-                # 5. Delete project invitations
-                cursor.execute("DELETE FROM projects_projectinvitation WHERE project_id = %s", [project_id_str])
-                print(f"Deleted invitations: {cursor.rowcount} rows")
-                
-                # 6. Delete project memberships
-                cursor.execute("DELETE FROM projects_projectmembership WHERE project_id = %s", [project_id_str])
-                print(f"Deleted memberships: {cursor.rowcount} rows")
-                
-                # 7. Finally delete the project itself
-                cursor.execute("DELETE FROM projects_project WHERE id = %s", [project_id_str])
-                print(f"Deleted project: {cursor.rowcount} rows")
-                
-                return True, f"Project '{project.name}' deleted successfully"
+                for table in PROJECT_TABLES:
+                    if table in tables:
+                        cursor.execute(f"DELETE FROM {table} WHERE project_id = %s", [project_id])
+                        _report(progress, stage='project', table=table, deleted=cursor.rowcount)
+
+                # Finally delete the project itself
+                cursor.execute("DELETE FROM projects_project WHERE id = %s", [project_id])
+                _report(progress, stage='done', table='projects_project', deleted=cursor.rowcount, tasks=deleted_tasks)
+
+            # Let synced boards know the project is gone
+            record_project_deletion(project.pk, affected_user_ids)
+
+            transaction.on_commit(lambda: _after_delete(project.pk, affected_user_ids, unread_recipient_ids))
+
+        return True, f"Project '{project.name}' deleted successfully"
     except Exception as e:
-        print(f"Error during project deletion: {e}")
+        logger.exception('Error during project deletion')
         return False, f"Failed to delete project: {str(e)}"
+
+
+def _after_delete(project_id, affected_user_ids, unread_recipient_ids):
+    """Invalidate caches that raw SQL deletes cannot reach through signals"""
+    from project_manager.caching import bump_version, notification_scope, project_scope, user_scope
+    from .permissions import invalidate_project_roles
+
+    invalidate_project_roles(*affected_user_ids)
+    bump_version(
+        project_scope(project_id),
+        *(user_scope(user_id) for user_id in affected_user_ids),
+        *(notification_scope(user_id) for user_id in unread_recipient_ids),
+    )
+    try:
+        from notification_system.counters import reset_unread_count
+    except ImportError:
+        return
+    for user_id in unread_recipient_ids:
+        reset_unread_count(user_id)
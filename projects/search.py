@@ -0,0 +1,195 @@
+"""
+Full-text search over projects, tasks and task comments.
+
+Every project, task and comment has a ``SearchDocument`` row holding its
+text, kept up to date by signals and by the bulk task writes. The database
+indexes those rows: on SQLite an external-content FTS5 table fed by
+triggers, on PostgreSQL a generated ``tsvector`` column with a GIN index.
+Both are created by the ``projects`` migration ``0006_search_documents``.
+
+Queries are split into words and every word matches as a prefix, so
+``"dep"`` finds "deploy" and "deployment". Results are ranked, the title
+counting more than the body, and limited to ``SEARCH_RESULT_LIMIT`` ids::
+
+    task_ids = search_tasks(request.GET['search'], visible_tasks)
+    tasks = filter_ranked(visible_tasks, task_ids)
+
+``manage.py rebuild_search_index`` rebuilds the documents from scratch.
+"""
+import re
+
+from django.db import connection, transaction
+from django.db.models import Case, F, IntegerField, When
+
+from .models import Project, SearchDocument
+
+SEARCH_RESULT_LIMIT = 500
+REBUILD_BATCH_SIZE = 500
+
+# Words of a query beyond this are ignored
+MAX_QUERY_TERMS = 8
+
+# Relative weight of a title match over a body match
+TITLE_WEIGHT = 10.0
+
+FTS_TABLE = 'projects_searchdocument_fts'
+
+
+def search_terms(query):
+    """Lower-cased words of a search query"""
+    return re.findall(r'[^\W_]+', (query or '').lower())[:MAX_QUERY_TERMS]
+
+
+# Documents
+
+def project_document(project):
+    return SearchDocument(
+        kind='project', object_id=project.pk, project_id=project.pk,
+        title=project.name, body=project.description or '',
+    )
+
+
+def task_document(task):
+    return SearchDocument(
+        kind='task', object_id=task.pk, project_id=task.project_id, task_id=task.pk,
+        title=task.title, body=task.description or '',
+    )
+
+
+def comment_document(comment, project_id):
+    return SearchDocument(
+        kind='comment', object_id=comment.pk, project_id=project_id, task_id=comment.task_id,
+        body=comment.content,
+    )
+
+
+def index_documents(documents):
+    """Insert or replace search documents with a single upsert"""
+    SearchDocument.objects.bulk_create(
+        documents,
+        batch_size=REBUILD_BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=['kind', 'object_id'],
+        update_fields=['project_id', 'task_id', 'title', 'body'],
+    )
+
+
+def move_task_documents(task_id, project_id):
+    """Follow a task moved to another project with its comments' documents"""
+    SearchDocument.objects.filter(task_id=task_id).exclude(project_id=project_id).update(project_id=project_id)
+
+
+def unindex(kind, object_id):
+    SearchDocument.objects.filter(kind=kind, object_id=object_id).delete()
+
+
+def unindex_task(task_id):
+    """Remove the documents of a task and of its comments"""
+    SearchDocument.objects.filter(task_id=task_id).delete()
+
+
+def unindex_project(project_id):
+    """Remove the documents of a project and of everything in it"""
+    SearchDocument.objects.filter(project_id=project_id).delete()
+
+
+# Queries
+
+def _matches_sql(terms):
+    """Query of the (doc_id, score) of the documents matching ``terms``, and its parameter"""
+    if connection.vendor == 'postgresql':
+        return (
+            "SELECT d.id AS doc_id, ts_rank(d.search_vector, q) AS score "
+            "FROM projects_searchdocument d CROSS JOIN to_tsquery('simple', %s) q "
+            "WHERE d.search_vector @@ q",
+            ' & '.join(f'{term}:*' for term in terms),
+        )
+    # bm25 ranks best matches lowest; negated so both databases sort descending
+    return (
+        f'SELECT rowid AS doc_id, -bm25({FTS_TABLE}, {TITLE_WEIGHT}, 1.0) AS score '
+        f'FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+        ' '.join(f'"{term}"*' for term in terms),
+    )
+
+
+def _search(query, kinds, key, within, limit):
+    """Values of ``key`` for the best matches among the rows of ``within``, best first"""
+    terms = search_terms(query)
+    if not terms:
+        return []
+    matches_sql, match = _matches_sql(terms)
+    within_sql, within_params = within.order_by().values('pk').query.sql_with_params()
+    kind_placeholders = ', '.join(['%s'] * len(kinds))
+    # Materialized so that SQLite runs the full-text query on its own:
+    # bm25() is unavailable once the planner merges it into the join
+    sql = (
+        f'WITH matches AS MATERIALIZED ({matches_sql}) '
+        f'SELECT d.{key}, MAX(matches.score) AS best '
+        f'FROM matches JOIN projects_searchdocument d ON d.id = matches.doc_id '
+        f'WHERE d.kind IN ({kind_placeholders}) AND d.{key} IN ({within_sql}) '
+        f'GROUP BY d.{key} ORDER BY best DESC LIMIT {int(limit)}'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [match, *kinds, *within_params])
+        rows = cursor.fetchall()
+    field = SearchDocument._meta.get_field(key)
+    return [field.to_python(row[0]) for row in rows]
+
+
+def search_projects(query, within, limit=SEARCH_RESULT_LIMIT):
+    """Ids of the projects of ``within`` whose name or description match, best first"""
+    return _search(query, ['project'], 'project_id', within, limit)
+
+
+def search_tasks(query, within, limit=SEARCH_RESULT_LIMIT):
+    """Ids of the tasks of ``within`` whose title, description or comments match, best first"""
+    return _search(query, ['task', 'comment'], 'task_id', within, limit)
+
+
+def filter_ranked(queryset, ids):
+    """Restrict ``queryset`` to ``ids`` and order it like them"""
+    if not ids:
+        return queryset.none()
+    rank = Case(*(When(pk=pk, then=index) for index, pk in enumerate(ids)), output_field=IntegerField())
+    return queryset.filter(pk__in=ids).order_by(rank)
+
+
+# Rebuild
+
+def _documents(queryset, build):
+    batch = []
+    for obj in queryset.iterator(chunk_size=REBUILD_BATCH_SIZE):
+        batch.append(build(obj))
+        if len(batch) >= REBUILD_BATCH_SIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def rebuild_search_index():
+    """Recreate the documents of all projects, tasks and comments; returns counts per kind"""
+    from task_management.models import Task, TaskComment
+
+    sources = {
+        'project': (Project.objects.all(), project_document),
+        'task': (Task.objects.all(), task_document),
+        'comment': (
+            TaskComment.objects.annotate(project_id=F('task__project_id')),
+            lambda comment: comment_document(comment, comment.project_id),
+        ),
+    }
+    counts = {}
+    with transaction.atomic():
+        SearchDocument.objects.all().delete()
+        for kind, (queryset, build) in sources.items():
+            counts[kind] = 0
+            for batch in _documents(queryset, build):
+                SearchDocument.objects.bulk_create(batch)
+                counts[kind] += len(batch)
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                # Also repairs an index that drifted from its documents
+                cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+                cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+    return counts
@@ -0,0 +1,92 @@
+from django.contrib.auth import get_user_model
+from rest_framework import serializers
+
+from .models import TASK_STATUSES, Project, ProjectMembership
+
+User = get_user_model()
+
+
+class UserSummarySerializer(serializers.ModelSerializer):
+    """Public identity of a user"""
+    full_name = serializers.CharField(source='get_full_name', read_only=True)
+
+    class Meta:
+        model = User
+        fields = ['id', 'username', 'full_name']
+
+
+class ProjectMemberSerializer(serializers.ModelSerializer):
+    """Membership nested inside a project"""
+    user = UserSummarySerializer(read_only=True)
+
+    class Meta:
+        model = ProjectMembership
+        fields = ['user', 'role', 'joined_at']
+
+
+class ProjectMembershipSerializer(serializers.ModelSerializer):
+    """Membership of a user in a project"""
+    user = UserSummarySerializer(read_only=True)
+    user_id = serializers.PrimaryKeyRelatedField(
+        source='user', queryset=User.objects.all(), write_only=True
+    )
+    project = serializers.PrimaryKeyRelatedField(queryset=Project.objects.filter(pending_deletion=False))
+
+    class Meta:
+        model = ProjectMembership
+        fields = ['id', 'project', 'user', 'user_id', 'role', 'joined_at', 'is_active']
+        read_only_fields = ['joined_at']
+
+    def validate(self, attrs):
+        if self.instance is None and ProjectMembership.objects.filter(
+            project=attrs['project'], user=attrs['user']
+        ).exists():
+            raise serializers.ValidationError('User is already a member of this project.')
+        if self.instance is not None:
+            # Moving a membership to another project or user is not supported
+            attrs.pop('project', None)
+            attrs.pop('user', None)
+        return attrs
+
+
+class ProjectSerializer(serializers.ModelSerializer):
+    """Project with its owner, members and task counts"""
+    owner = UserSummarySerializer(read_only=True)
+    members = ProjectMemberSerializer(source='projectmembership_set', many=True, read_only=True)
+    task_counts = serializers.SerializerMethodField()
+    completion_percentage = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Project
+        fields = [
+            'id', 'name', 'description', 'owner', 'members', 'status', 'priority',
+            'start_date', 'end_date', 'budget', 'progress', 'color', 'is_archived',
+            'task_counts', 'completion_percentage', 'created_at', 'updated_at',
+        ]
+        read_only_fields = ['is_archived', 'created_at', 'updated_at']
+
+    def get_task_counts(self, project):
+        """Task counts annotated by ProjectQuerySet.with_stats(), or the rollup row"""
+        if getattr(project, 'total_tasks', None) is None:
+            return project.get_stats().as_task_stats()
+        counts = {'total': project.total_tasks}
+        for status in TASK_STATUSES:
+            counts[status] = getattr(project, f'{status}_tasks')
+        return counts
+
+    def validate(self, attrs):
+        start_date = attrs.get('start_date', getattr(self.instance, 'start_date', None))
+        end_date = attrs.get('end_date', getattr(self.instance, 'end_date', None))
+        if start_date and end_date and end_date < start_date:
+            raise serializers.ValidationError({'end_date': 'End date must be after the start date.'})
+        return attrs
+
+
+class ProjectListSerializer(ProjectSerializer):
+    """Compact project representation for list endpoints"""
+
+    class Meta(ProjectSerializer.Meta):
+        fields = [
+            'id', 'name', 'owner', 'members', 'status', 'priority', 'end_date',
+            'color', 'task_counts', 'completion_percentage', 'created_at', 'updated_at',
+        ]
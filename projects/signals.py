@@ -0,0 +1,63 @@
+"""
+Signal handlers keeping cached project roles, cached queries and the search
+index in sync with the database, and recording tombstones of deleted
+memberships.
+"""
+from django.db.models.signals import post_delete, post_init, post_save, pre_delete
+from django.dispatch import receiver
+
+from notification_system.realtime import broadcast, membership_removed_message
+from project_manager.caching import bump_version, project_scope, user_scope
+from .models import Project, ProjectMembership, ProjectStats
+from .permissions import invalidate_project_roles
+from .search import index_documents, project_document, unindex_project
+from .tombstones import is_project_deletion, record_deletion, record_project_deletion
+
+
+@receiver(post_init, sender=Project)
+def remember_project_owner(sender, instance, **kwargs):
+    """Remember the loaded owner so an ownership transfer can invalidate both users"""
+    instance._loaded_owner_id = instance.owner_id
+
+
+SEARCHED_PROJECT_FIELDS = {'name', 'description'}
+
+
+@receiver(post_save, sender=Project)
+def project_saved(sender, instance, created, update_fields=None, **kwargs):
+    previous_owner_id = getattr(instance, '_loaded_owner_id', None)
+    if created or previous_owner_id != instance.owner_id:
+        invalidate_project_roles(previous_owner_id, instance.owner_id)
+        if previous_owner_id is not None:
+            bump_version(user_scope(previous_owner_id))
+    instance._loaded_owner_id = instance.owner_id
+    if created:
+        ProjectStats.objects.create(project=instance, last_activity_at=instance.created_at)
+    if update_fields is None or SEARCHED_PROJECT_FIELDS & set(update_fields):
+        index_documents([project_document(instance)])
+    bump_version(project_scope(instance.pk), user_scope(instance.owner_id))
+
+
+@receiver(pre_delete, sender=Project)
+def remember_project_members(sender, instance, **kwargs):
+    """Remember the members before the cascade removes them, for the tombstones"""
+    instance._member_ids = list(instance.projectmembership_set.values_list('user_id', flat=True))
+
+
+@receiver(post_delete, sender=Project)
+def project_deleted(sender, instance, **kwargs):
+    invalidate_project_roles(instance.owner_id)
+    bump_version(project_scope(instance.pk), user_scope(instance.owner_id))
+    record_project_deletion(instance.pk, [instance.owner_id, *getattr(instance, '_member_ids', [])])
+    unindex_project(instance.pk)
+
+
+@receiver(post_save, sender=ProjectMembership)
+@receiver(post_delete, sender=ProjectMembership)
+def membership_changed(sender, instance, signal, origin=None, **kwargs):
+    invalidate_project_roles(instance.user_id)
+    bump_version(project_scope(instance.project_id), user_scope(instance.user_id))
+    if signal is post_delete:
+        if not is_project_deletion(origin):
+            record_deletion('membership', instance.project_id, instance.pk)
+        broadcast([membership_removed_message(instance.user_id, instance.project_id)])
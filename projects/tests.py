@@ -1,3 +1,151 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db.models import Count
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import User
+from project_manager.testing import QueryBudgetMixin, budgeted_views
+from projects.models import Project, ProjectStats
+from projects.permissions import get_project_ids
+from projects.rollup import rebuild_project_stats
+from task_management.models import Task
+
+
+class QueryBudgetTests(QueryBudgetMixin, TestCase):
+    """Every page declaring a query budget stays within it on a seeded dataset"""
+
+    @classmethod
+    def setUpTestData(cls):
+        # Enough rows per page for an N+1 query to show
+        call_command('seed_bench', users=20, projects=6, tasks=600, stdout=StringIO())
+        cls.user = User.objects.annotate(
+            projects_count=Count('projectmembership')
+        ).order_by('-projects_count').first()
+        project_ids = get_project_ids(cls.user)
+        cls.project = cls.user.projectmembership_set.filter(
+            project_id__in=project_ids
+        ).annotate(tasks_count=Count('project__tasks')).order_by('-tasks_count').first().project
+        cls.task = Task.objects.filter(project=cls.project).annotate(
+            comments_count=Count('comments')
+        ).order_by('-comments_count').first()
+
+    def setUp(self):
+        # Budgets are for cold caches
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def budgeted_urls(self):
+        project_args = [self.project.pk]
+        return {
+            'projects:dashboard': reverse('projects:dashboard'),
+            'projects:project_list': reverse('projects:project_list'),
+            'projects:project_detail': reverse('projects:project_detail', args=project_args),
+            'projects:project_members': reverse('projects:project_members', args=project_args),
+            'projects:project_board': reverse('projects:project_board', args=project_args),
+            'tasks:task_list': reverse('tasks:task_list'),
+            'tasks:task_detail': reverse('tasks:task_detail', args=[self.task.pk]),
+            'tasks:project_tasks': reverse('tasks:project_tasks', args=project_args),
+            'tasks:my_tasks': reverse('tasks:my_tasks'),
+            'reports:dashboard': reverse('reports:dashboard'),
+            'reports:project_flow': reverse('reports:project_flow', args=project_args),
+        }
+
+    def test_every_budgeted_view_is_covered(self):
+        self.assertEqual(set(self.budgeted_urls()), set(budgeted_views()))
+
+    def test_views_within_query_budget(self):
+        for name, url in self.budgeted_urls().items():
+            with self.subTest(view=name):
+                cache.clear()
+                response = self.assertWithinQueryBudget(url)
+                self.assertEqual(response.status_code, 200)
+
+
+class ProjectStatsRollupTests(TestCase):
+    """The rollup maintained by task signals matches a rebuild from the tasks"""
+
+    # Fields compared; the timestamps differ by construction
+    FIELDS = [
+        field.name for field in ProjectStats._meta.get_fields()
+        if field.name not in ('project', 'last_activity_at', 'updated_at')
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('alice', 'alice@example.com', 'password')
+        cls.project = Project.objects.create(name='One', owner=cls.user)
+        cls.other = Project.objects.create(name='Two', owner=cls.user)
+
+    def create(self, project=None, **fields):
+        defaults = {'title': 'Task', 'estimated_hours': Decimal('2.50'), 'actual_hours': Decimal('1.25')}
+        return Task.objects.create(project=project or self.project, created_by=self.user, **{**defaults, **fields})
+
+    def stats(self, project):
+        return ProjectStats.objects.filter(project=project).values(*self.FIELDS).get()
+
+    def assertRollupMatchesRebuild(self):
+        maintained = {project.pk: self.stats(project) for project in (self.project, self.other)}
+        rebuild_project_stats([self.project.pk, self.other.pk])
+        for project in (self.project, self.other):
+            with self.subTest(project=project.name):
+                self.assertEqual(maintained[project.pk], self.stats(project))
+
+    def setUp(self):
+        past = timezone.now() - timedelta(days=2)
+        self.tasks = [
+            self.create(status='todo', priority='high', due_date=past),
+            self.create(status='in_progress', priority='low'),
+            self.create(status='review', priority='urgent', due_date=past),
+            self.create(status='completed', due_date=past),
+        ]
+
+    def test_create(self):
+        self.assertEqual(self.stats(self.project)['total_tasks'], 4)
+        self.assertEqual(self.stats(self.project)['overdue_tasks'], 2)
+        self.assertRollupMatchesRebuild()
+
+    def test_status_priority_and_hours_change(self):
+        task = self.tasks[0]
+        task.status = 'completed'
+        task.priority = 'medium'
+        task.actual_hours = Decimal('4.00')
+        task.save()
+        task = self.tasks[3]
+        task.status = 'todo'
+        task.save()
+        self.assertRollupMatchesRebuild()
+
+    def test_due_date_change(self):
+        task = self.tasks[1]
+        task.due_date = timezone.now() - timedelta(hours=1)
+        task.save()
+        self.assertEqual(self.stats(self.project)['overdue_tasks'], 3)
+        self.assertRollupMatchesRebuild()
+
+    def test_project_move(self):
+        task = self.tasks[2]
+        task.project = self.other
+        task.save()
+        self.assertEqual(self.stats(self.other)['total_tasks'], 1)
+        self.assertRollupMatchesRebuild()
+
+    def test_delete(self):
+        self.tasks[0].delete()
+        self.tasks[3].delete()
+        self.assertEqual(self.stats(self.project)['total_tasks'], 2)
+        self.assertRollupMatchesRebuild()
 
-# Create your tests here.
+    def test_drifted_row_is_clamped_at_zero(self):
+        ProjectStats.objects.filter(project=self.project).update(total_tasks=0, todo_tasks=0)
+        self.tasks[0].delete()
+        self.assertEqual(self.stats(self.project)['total_tasks'], 0)
+        self.assertEqual(self.stats(self.project)['todo_tasks'], 0)
+        # The rebuild repairs the drift
+        rebuild_project_stats([self.project.pk])
+        self.assertEqual(self.stats(self.project)['total_tasks'], 3)
@@ -0,0 +1,61 @@
+"""
+Tombstones of deleted rows for the board delta sync.
+
+Deleting a task, comment or membership records a Tombstone with the project
+it belonged to, so ``task_management.sync`` can report deletions the same
+way it reports changed rows. Rows deleted along with their parent are not
+recorded: the tombstone of the task covers its comments and the tombstones
+of a project cover everything in it. A deleted project leaves one tombstone
+per former owner or member, holding the user's id, so only they are told the
+project was deleted (``was_deleted_for``). Tombstones older than
+``TOMBSTONE_RETENTION`` are removed by ``manage.py prune_tombstones``; sync
+cursors older than that are told to reload instead.
+"""
+from datetime import timedelta
+
+from django.db.models import Q, QuerySet
+from django.utils import timezone
+
+from .models import Project, Tombstone
+
+TOMBSTONE_RETENTION = timedelta(days=30)
+
+
+def is_deletion_of(origin, *models):
+    """Whether a post_delete ``origin`` is an instance or queryset of ``models``"""
+    if isinstance(origin, QuerySet):
+        return issubclass(origin.model, models)
+    return isinstance(origin, models)
+
+
+def is_project_deletion(origin):
+    return is_deletion_of(origin, Project)
+
+
+def record_deletion(kind, project_id, object_id):
+    """Record the deletion of one task, comment or membership"""
+    Tombstone.objects.create(project_id=project_id, kind=kind, object_id=str(object_id))
+
+
+def record_project_deletion(project_id, user_ids):
+    """Replace the tombstones of a deleted project by one per former owner or member"""
+    Tombstone.objects.filter(project_id=project_id).delete()
+    Tombstone.objects.bulk_create([
+        Tombstone(project_id=project_id, kind='project', object_id=str(user_id))
+        for user_id in set(user_ids)
+    ])
+
+
+def was_deleted_for(user, project_id):
+    """Whether ``user`` owned or belonged to a project that is deleted or being deleted"""
+    if Tombstone.objects.filter(project_id=project_id, kind='project', object_id=str(user.pk)).exists():
+        return True
+    return Project.objects.filter(
+        Q(owner=user) | Q(projectmembership__user=user), pk=project_id, pending_deletion=True
+    ).exists()
+
+
+def prune_tombstones(older_than=TOMBSTONE_RETENTION):
+    """Delete tombstones recorded more than ``older_than`` ago; returns the count"""
+    deleted, _ = Tombstone.objects.filter(deleted_at__lt=timezone.now() - older_than).delete()
+    return deleted
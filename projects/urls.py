@@ -14,4 +14,5 @@ urlpatterns = [
     path('<uuid:project_id>/members/', views.project_members, name='project_members'),
     path('<uuid:project_id>/invite/', views.invite_member, name='invite_member'),
     path('<uuid:project_id>/board/', views.project_board, name='project_board'),
+    path('deletions/<uuid:job_id>/', views.deletion_status, name='deletion_status'),
 ]
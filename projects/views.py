@@ -3,15 +3,23 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.http import JsonResponse
 from django.core.paginator import Paginator
-from django.db.models import Q
+from django.db.models import Count, Q
+from django.urls import reverse
 from django.utils import timezone
-from .models import Project, ProjectMembership
+from .models import Project, ProjectDeletionJob, ProjectMembership, empty_task_stats
+from .permissions import get_project_ids
+from .search import filter_ranked, search_projects
+from project_manager.caching import project_scope
+from project_manager.conditional import conditional_on_scopes
+from project_manager.metrics import query_budget
 from .forms import ProjectForm, InviteTeamMemberForm
-from .safe_delete import safe_delete_project
+from .deletion import schedule_project_deletion
 
 # Safe imports for optional apps
 try:
     from task_management.models import Task
+    from task_management.board import build_board, is_load_more_request, load_more_response
+    from .rollup import load_project_stats
 except ImportError:
     Task = None
 
@@ -21,34 +29,22 @@ except ImportError:
     Notification = None
 
 
-# Helper: calculate project task stats
-def get_task_stats(tasks_queryset):
-    return {
-        'total': tasks_queryset.count(),
-        'completed': tasks_queryset.filter(status='completed').count(),
-        'in_progress': tasks_queryset.filter(status='in_progress').count(),
-        'todo': tasks_queryset.filter(status='todo').count(),
-        'review': tasks_queryset.filter(status='review').count() if hasattr(tasks_queryset, 'filter') else 0,
-    }
-
-
+@query_budget(16)
 @login_required
 def dashboard(request):
     """Main dashboard view"""
-    user_projects = Project.objects.filter(
-        Q(owner=request.user) | Q(members=request.user)
-    ).distinct().order_by('-updated_at')[:5]
+    project_ids = get_project_ids(request.user)
+    user_projects = Project.objects.filter(id__in=project_ids).order_by('-updated_at')[:5]
     
-    total_projects = user_projects.count()
+    total_projects = len(project_ids)
     user_tasks = []
     pending_tasks = overdue_tasks = active_tasks = 0
 
     if Task:
         user_tasks_queryset = Task.objects.filter(
-            Q(assigned_to=request.user) | 
-            Q(project__owner=request.user) | 
-            Q(project__members=request.user)
-        ).distinct()
+            Q(project_id__in=project_ids) |
+            Q(pk__in=Task.objects.filter(assigned_to=request.user, project__pending_deletion=False).values('pk'))
+        )
 
         pending_tasks = user_tasks_queryset.filter(status='todo').count()
         active_tasks = user_tasks_queryset.filter(status__in=['todo', 'in_progress']).count()
@@ -71,43 +67,49 @@ def dashboard(request):
     return render(request, 'projects/dashboard.html', context)
 
 
+@query_budget(8)
 @login_required
 def project_list(request):
     """View for listing all user's projects"""
-    projects = Project.objects.filter(
-        Q(owner=request.user) | Q(members=request.user)
-    ).distinct()
+    projects = Project.objects.filter(id__in=get_project_ids(request.user))
 
     # Search & filter
-    search = request.GET.get('search')
-    if search:
-        projects = projects.filter(Q(name__icontains=search) | Q(description__icontains=search))
-
     status = request.GET.get('status')
     if status:
         projects = projects.filter(status=status)
 
-    projects = projects.order_by('-updated_at')
-
-    # Add progress stats
-    if Task:
-        for project in projects:
-            tasks = Task.objects.filter(project=project)
-            stats = get_task_stats(tasks)
-            project.total_tasks = stats['total']
-            project.completed_tasks = stats['completed']
-            project.progress_percentage = int((stats['completed'] / stats['total']) * 100) if stats['total'] > 0 else 0
+    # Matches are listed best first, through the full-text index
+    search = request.GET.get('search')
+    if search:
+        projects = filter_ranked(projects, search_projects(search, projects))
     else:
-        for project in projects:
-            project.total_tasks = 0
-            project.completed_tasks = 0
-            project.progress_percentage = 0
+        projects = projects.order_by('-updated_at')
 
     # Pagination
     paginator = Paginator(projects, 12)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
 
+    # Add progress stats for the current page only, read from the task rollup
+    page_projects = list(page_obj.object_list)
+    stats_by_project = {}
+    if Task:
+        stats_by_project = load_project_stats([project.pk for project in page_projects])
+
+    member_counts = dict(
+        ProjectMembership.objects.filter(project__in=page_projects)
+        .values('project_id').annotate(count=Count('pk')).values_list('project_id', 'count')
+    )
+
+    for project in page_projects:
+        stats = stats_by_project.get(project.pk)
+        stats = stats.as_task_stats() if stats else empty_task_stats()
+        project.member_count = member_counts.get(project.pk, 0)
+        project.total_tasks = stats['total']
+        project.completed_tasks = stats['completed']
+        project.progress_percentage = int((stats['completed'] / stats['total']) * 100) if stats['total'] > 0 else 0
+    page_obj.object_list = page_projects
+
     return render(request, 'projects/project_list.html', {
         'projects': page_obj,
         'page_obj': page_obj,
@@ -115,21 +117,23 @@ def project_list(request):
     })
 
 
+@query_budget(13)
 @login_required
 def project_detail(request, project_id):
     """View for project details and team management"""
     project = get_object_or_404(Project, id=project_id)
 
-    if not (project.owner == request.user or request.user in project.members.all()):
+    if not project.is_member(request.user):
         messages.error(request, "You don't have access to this project.")
         return redirect('projects:project_list')
 
     memberships = ProjectMembership.objects.filter(project=project)
-    task_stats = {'total': 0, 'completed': 0, 'in_progress': 0, 'todo': 0}
+    task_stats = empty_task_stats()
 
     if Task:
-        tasks = Task.objects.filter(project=project)
-        task_stats = get_task_stats(tasks)
+        task_stats = project.get_stats().as_task_stats()
+        project.total_tasks = task_stats['total']
+        project.completed_tasks = task_stats['completed']
 
     if request.method == 'POST':
         form = InviteTeamMemberForm(request.POST)
@@ -194,8 +198,7 @@ def edit_project(request, project_id):
     project = get_object_or_404(Project, id=project_id)
     
     # Check if user has permission to edit this project
-    if not (project.owner == request.user or 
-            ProjectMembership.objects.filter(project=project, user=request.user, role__in=['admin', 'manager']).exists()):
+    if not project.can_edit(request.user):
         messages.error(request, "You don't have permission to edit this project.")
         return redirect('projects:project_detail', project_id=project.id)
     
@@ -223,7 +226,7 @@ def delete_project(request, project_id):
     project = get_object_or_404(Project, id=project_id)
     
     # Only project owner can delete
-    if project.owner != request.user:
+    if not project.can_delete(request.user):
         if request.headers.get('Content-Type') == 'application/json':
             return JsonResponse({'success': False, 'error': 'Only the project owner can delete this project.'})
         messages.error(request, "Only the project owner can delete this project.")
@@ -231,35 +234,29 @@ def delete_project(request, project_id):
     
     if request.method == 'POST':
         project_name = project.name
-        try:
-            success, message = safe_delete_project(project)
-            if success:
-                if request.headers.get('Content-Type') == 'application/json':
-                    return JsonResponse({'success': True, 'message': message})
-                messages.success(request, f'Project "{project_name}" has been deleted successfully.')
-                return redirect('projects:project_list')
-            else:
-                if request.headers.get('Content-Type') == 'application/json':
-                    return JsonResponse({'success': False, 'error': message})
-                messages.error(request, f'Error deleting project: {message}')
-                return redirect('projects:project_detail', project_id=project.id)
-        except Exception as e:
-            if request.headers.get('Content-Type') == 'application/json':
-                return JsonResponse({'success': False, 'error': str(e)})
-            messages.error(request, f'Error deleting project: {str(e)}. Please try again.')
-            return redirect('projects:project_detail', project_id=project.id)
+        job = schedule_project_deletion(project, request.user)
+        if request.headers.get('Content-Type') == 'application/json':
+            return JsonResponse({
+                'success': True,
+                'message': f'Project "{project_name}" is being deleted.',
+                'job_id': str(job.id),
+                'status_url': reverse('projects:deletion_status', args=[job.id]),
+            })
+        messages.success(request, f'Project "{project_name}" is being deleted.')
+        return redirect('projects:project_list')
     
     context = {'project': project}
     return render(request, 'projects/delete_project.html', context)
 
 
+@query_budget(11)
 @login_required
 def project_members(request, project_id):
     """Project members management view"""
     project = get_object_or_404(Project, id=project_id)
     
     # Check if user has access to this project
-    if not (project.owner == request.user or request.user in project.members.all()):
+    if not project.is_member(request.user):
         messages.error(request, "You don't have access to this project.")
         return redirect('projects:project_list')
     
@@ -279,8 +276,7 @@ def invite_member(request, project_id):
     project = get_object_or_404(Project, id=project_id)
     
     # Check if user has permission to invite members
-    if not (project.owner == request.user or 
-            ProjectMembership.objects.filter(project=project, user=request.user, role__in=['admin', 'manager']).exists()):
+    if not project.can_edit(request.user):
         return JsonResponse({'status': 'error', 'message': 'Permission denied'})
     
     if request.method == 'POST':
@@ -326,37 +322,54 @@ def invite_member(request, project_id):
     return JsonResponse({'status': 'error', 'message': 'Invalid request method'})
 
 
+def project_page_scopes(request, project_id):
+    """Cache scopes the pages of a project depend on, None without access"""
+    if project_id not in get_project_ids(request.user):
+        return None
+    return [project_scope(project_id)]
+
+
+@query_budget(8)
 @login_required
+@conditional_on_scopes(project_page_scopes)
 def project_board(request, project_id):
     """View for project Kanban board"""
     project = get_object_or_404(Project, id=project_id)
     
     # Check if user has access to this project
-    if not (project.owner == request.user or request.user in project.members.all()):
+    if not project.is_member(request.user):
         messages.error(request, "You don't have access to this project.")
         return redirect('projects:project_list')
     
-    # Initialize empty task lists
-    todo_tasks = []
-    in_progress_tasks = []
-    review_tasks = []
-    completed_tasks = []
+    board = None
     
     # Get tasks organized by status if Task model is available
     if Task:
-        tasks = Task.objects.filter(project=project).select_related('assigned_to', 'project')
-        
-        todo_tasks = tasks.filter(status='todo')
-        in_progress_tasks = tasks.filter(status='in_progress')
-        review_tasks = tasks.filter(status='review')
-        completed_tasks = tasks.filter(status='completed')
+        tasks = Task.objects.filter(project=project)
+        if is_load_more_request(request):
+            return load_more_response(request, tasks, card_template='projects/board_card.html')
+        board = build_board(tasks)
     
     context = {
         'project': project,
-        'todo_tasks': todo_tasks,
-        'in_progress_tasks': in_progress_tasks,
-        'review_tasks': review_tasks,
-        'completed_tasks': completed_tasks,
+        'board': board,
     }
     
     return render(request, 'projects/project_board.html', context)
+
+
+@login_required
+def deletion_status(request, job_id):
+    """AJAX view for polling the progress of a background project deletion"""
+    job = get_object_or_404(ProjectDeletionJob, id=job_id, requested_by=request.user)
+    
+    return JsonResponse({
+        'job_id': str(job.id),
+        'project_name': job.project_name,
+        'status': job.status,
+        'total_tasks': job.total_tasks,
+        'deleted_tasks': job.deleted_tasks,
+        'progress': job.progress_percentage,
+        'message': job.message,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+    })
@@ -0,0 +1,68 @@
+// Kanban boards: loading further cards of a column, keeping column totals
+// and moving cards changed elsewhere. Columns carry data-status and hold
+// their cards, which carry data-task-id, in a .task-list element.
+
+// Load the next cards of a board column
+function loadMoreTasks(button) {
+    const params = new URLSearchParams(window.location.search);
+    params.set('column', button.dataset.column);
+    params.set('cursor', button.dataset.cursor);
+    fetch(`${window.location.pathname}?${params}`)
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            button.insertAdjacentHTML('beforebegin', data.html);
+            if (data.has_more) {
+                button.dataset.cursor = data.next_cursor;
+            } else {
+                button.remove();
+            }
+        } else {
+            alert('Error: ' + data.error);
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        alert('An error occurred while loading tasks.');
+    });
+}
+
+// Change the total shown in a column's header by delta cards
+function adjustTaskCount(column, delta) {
+    const badge = column.querySelector('.task-count');
+    if (badge) {
+        badge.textContent = Math.max(0, parseInt(badge.textContent, 10) + delta);
+    }
+}
+
+// 'live-update' listener moving the cards of task.status and task.moved events
+function applyBoardUpdate(e) {
+    const {event, data} = e.detail;
+    if (event !== 'task.status' && event !== 'task.moved') {
+        return;
+    }
+    const card = document.querySelector(`.task-card[data-task-id="${data.task_id}"]`);
+    const column = document.querySelector(`[data-status="${data.status}"]`);
+    const list = column && column.querySelector('.task-list');
+    if (!card || !list) {
+        return;
+    }
+    const source = card.closest('[data-status]');
+    if (event === 'task.moved') {
+        const after = data.after_id && list.querySelector(`.task-card[data-task-id="${data.after_id}"]`);
+        const before = data.before_id && list.querySelector(`.task-card[data-task-id="${data.before_id}"]`);
+        if (before) {
+            list.insertBefore(card, before);
+        } else if (after) {
+            after.after(card);
+        } else {
+            list.insertBefore(card, list.querySelector('.load-more-btn'));
+        }
+    } else if (source !== column) {
+        list.insertBefore(card, list.querySelector('.load-more-btn'));
+    }
+    if (source !== column) {
+        adjustTaskCount(source, -1);
+        adjustTaskCount(column, 1);
+    }
+}
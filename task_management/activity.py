@@ -0,0 +1,35 @@
+"""
+Recording task status changes.
+
+Every path that changes the status of a task (the status view, a board move
+and the bulk API) logs the same ``status_changed`` activity and tells the
+other assignees with the same notification.
+"""
+from notification_system.models import Notification
+from .models import TaskActivity
+
+
+def build_status_change(task, user, old_status, recipient_ids):
+    """Unsaved activity and notifications of a status change, see record_status_change"""
+    activity = TaskActivity(
+        task=task,
+        user=user,
+        activity_type='status_changed',
+        description=f'Status changed from {old_status} to {task.status}',
+        old_value=old_status,
+        new_value=task.status
+    )
+    notifications = [
+        Notification.build_task_status_update(recipient_id, task, user)
+        for recipient_id in recipient_ids
+    ]
+    return activity, notifications
+
+
+def record_status_change(task, user, old_status):
+    """Log that ``user`` changed the status of ``task`` and notify its other assignees"""
+    activity, notifications = build_status_change(
+        task, user, old_status, task.assigned_to.exclude(pk=user.pk).values_list('pk', flat=True)
+    )
+    activity.save()
+    return Notification.bulk_deliver(notifications)
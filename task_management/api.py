@@ -2,18 +2,31 @@ from django.http import JsonResponse
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import get_object_or_404
 from projects.models import Project
+from projects.permissions import get_project_ids
+from projects.tombstones import was_deleted_for
+from project_manager.caching import cached_query, project_scope
 from django.db.models import Q
 
+from .sync import InvalidCursor, project_changes
+
 @login_required
 def get_project_members(request, project_id):
     """Get members of a specific project via AJAX"""
     project = get_object_or_404(Project, id=project_id)
     
     # Check if user has access to this project
-    if not (project.owner == request.user or request.user in project.members.all()):
+    if not project.is_member(request.user):
         return JsonResponse({'error': 'Permission denied'}, status=403)
     
-    # Get project members
+    members = cached_query(
+        'project_members', lambda: _project_members(project),
+        scopes=[project_scope(project.pk)], args=[project.pk],
+    )
+    return JsonResponse({'members': members})
+
+
+def _project_members(project):
+    """Owner and members of a project as JSON-ready dicts"""
     members = []
     
     # Add project owner
@@ -34,4 +47,21 @@ def get_project_members(request, project_id):
                 'is_owner': False
             })
     
-    return JsonResponse({'members': members})
+    return members
+
+
+@login_required
+def get_project_changes(request, project_id):
+    """Changes of a project's board since ?since=<cursor> via AJAX"""
+    if project_id not in get_project_ids(request.user):
+        # Tell former members whose board was deleted to stop syncing; anyone
+        # else gets the same answer as for a project that never existed
+        if was_deleted_for(request.user, project_id):
+            return JsonResponse({'error': 'Project deleted'}, status=410)
+        return JsonResponse({'error': 'Permission denied'}, status=403)
+    
+    try:
+        changes = project_changes(project_id, request.GET.get('since'))
+    except InvalidCursor:
+        return JsonResponse({'error': 'Invalid cursor'}, status=400)
+    return JsonResponse(changes)
@@ -0,0 +1,157 @@
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Prefetch, Q
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.response import Response
+
+from project_manager.caching import project_scope
+from project_manager.conditional import ConditionalGetMixin
+from project_manager.pagination import CreatedAtCursorPagination
+from projects.permissions import can_delete_task, get_project_ids
+from .activity import record_status_change
+from .bulk import BulkValidationError, create_tasks, update_tasks
+from .models import Task
+from .ordering import InvalidMove, move_task
+from .serializers import (
+    BulkTaskCreateSerializer, BulkTaskStatusSerializer, BulkTaskUpdateSerializer,
+    TaskCreateSerializer, TaskMoveSerializer, TaskSerializer, TaskWriteSerializer,
+)
+
+User = get_user_model()
+
+
+class TaskViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
+    """
+    Tasks of the user's projects and tasks assigned to the user.
+
+    Single writes go through the same batch code as the bulk endpoints, so
+    they record activities and notifications the same way.
+    """
+    serializer_class = TaskSerializer
+    pagination_class = CreatedAtCursorPagination
+    http_method_names = ['get', 'post', 'patch', 'delete', 'head', 'options']
+
+    def get_queryset(self):
+        user = self.request.user
+        tasks = Task.objects.filter(
+            Q(project_id__in=get_project_ids(user)) |
+            Q(pk__in=Task.objects.filter(assigned_to=user, project__pending_deletion=False).values('pk'))
+        ).prefetch_related(Prefetch('assigned_to', queryset=User.objects.only('id')))
+
+        project_id = self.request.query_params.get('project')
+        if project_id:
+            try:
+                tasks = tasks.filter(project_id=uuid.UUID(project_id))
+            except ValueError:
+                return tasks.none()
+        status_filter = self.request.query_params.get('status')
+        if status_filter:
+            tasks = tasks.filter(status=status_filter)
+        return tasks
+
+    def get_etag_scopes(self):
+        if self.action == 'retrieve':
+            try:
+                task_id = uuid.UUID(self.kwargs['pk'])
+            except ValueError:
+                return None
+            project_ids = Task.objects.filter(pk=task_id).values_list('project_id', flat=True)[:1]
+            if not project_ids:
+                return None
+        else:
+            project_ids = set(get_project_ids(self.request.user))
+            project_ids.update(
+                Task.objects.filter(
+                    assigned_to=self.request.user, project__pending_deletion=False
+                ).values_list('project_id', flat=True).distinct()
+            )
+        return [project_scope(project_id) for project_id in sorted(project_ids, key=str)]
+
+    def _respond(self, tasks, status_code=status.HTTP_200_OK):
+        task = self.get_queryset().get(pk=tasks[0].pk)
+        return Response(TaskSerializer(task).data, status=status_code)
+
+    def create(self, request, *args, **kwargs):
+        serializer = TaskCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            tasks = create_tasks(request.user, [serializer.validated_data])
+        except BulkValidationError as e:
+            return Response(e.errors[0], status=status.HTTP_400_BAD_REQUEST)
+        return self._respond(tasks, status.HTTP_201_CREATED)
+
+    def partial_update(self, request, *args, **kwargs):
+        task = self.get_object()
+        serializer = TaskWriteSerializer(data=request.data, partial=True)
+        serializer.is_valid(raise_exception=True)
+        try:
+            update_tasks(request.user, [{'id': task.pk, **serializer.validated_data}])
+        except BulkValidationError as e:
+            return Response(e.errors[0], status=status.HTTP_400_BAD_REQUEST)
+        return self._respond([task])
+
+    def perform_destroy(self, instance):
+        if not can_delete_task(self.request.user, instance):
+            raise PermissionDenied('Only the task creator or project owner can delete this task.')
+        instance.delete()
+
+    @action(detail=False, methods=['post'], url_path='bulk-create')
+    def bulk_create(self, request):
+        """Create up to MAX_BATCH_SIZE tasks: {"tasks": [{...}, ...]}"""
+        serializer = BulkTaskCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            tasks = create_tasks(request.user, serializer.validated_data['tasks'])
+        except BulkValidationError as e:
+            return Response({'tasks': e.errors}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            'created': len(tasks),
+            'ids': [task.pk for task in tasks],
+        }, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['post'], url_path='bulk-update')
+    def bulk_update(self, request):
+        """Patch up to MAX_BATCH_SIZE tasks: {"tasks": [{"id": ..., ...}, ...]}"""
+        serializer = BulkTaskUpdateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            tasks = update_tasks(request.user, serializer.validated_data['tasks'])
+        except BulkValidationError as e:
+            return Response({'tasks': e.errors}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'updated': len(tasks), 'ids': [task.pk for task in tasks]})
+
+    @action(detail=False, methods=['post'], url_path='bulk-status')
+    def bulk_status(self, request):
+        """Move up to MAX_BATCH_SIZE tasks: {"transitions": [{"id": ..., "status": ...}, ...]}"""
+        serializer = BulkTaskStatusSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            tasks = update_tasks(request.user, serializer.validated_data['transitions'], status_only=True)
+        except BulkValidationError as e:
+            return Response({'transitions': e.errors}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'updated': len(tasks), 'ids': [task.pk for task in tasks]})
+
+    @action(detail=True, methods=['post'])
+    def move(self, request, pk=None):
+        """Drop a card on the board: {"status": ..., "after": <id or null>, "before": <id or null>}"""
+        task = self.get_object()
+        serializer = TaskMoveSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        new_status = serializer.validated_data['status']
+        old_status = task.status
+        try:
+            with transaction.atomic():
+                move_task(
+                    task, new_status,
+                    after_id=serializer.validated_data.get('after'),
+                    before_id=serializer.validated_data.get('before'),
+                )
+                if new_status != old_status:
+                    record_status_change(task, request.user, old_status)
+        except InvalidMove as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return self._respond([task])
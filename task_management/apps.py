@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class TaskManagementConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'task_management'
+
+    def ready(self):
+        from . import signals  # noqa: F401
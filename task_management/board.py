@@ -0,0 +1,173 @@
+"""
+Kanban board loading shared by the board and task list views.
+
+A board is built from a single windowed query: every row carries its rank
+within its status column and the total size of that column, so the first
+``limit`` cards of each column and all column counts come from the same
+result set. Further cards are fetched one column at a time with a keyset
+cursor ("load more").
+"""
+import base64
+import json
+
+from django.db.models import Count, F, Q, Window
+from django.db.models.functions import RowNumber
+from django.http import JsonResponse
+from django.template.loader import render_to_string
+from django.utils.dateparse import parse_datetime
+
+from .models import Task
+
+BOARD_COLUMN_LIMIT = 50
+
+# Task.Meta.ordering with the primary key as a tie breaker for stable cursors
+BOARD_ORDERING = ('position', '-created_at', 'id')
+
+
+class BoardColumn:
+    """Cards loaded for one status column plus the column's total size"""
+
+    def __init__(self, status, label, tasks, count, has_more=False):
+        self.status = status
+        self.label = label
+        self.tasks = tasks
+        self.count = count
+        self.has_more = has_more
+
+    def __iter__(self):
+        return iter(self.tasks)
+
+    def __len__(self):
+        return len(self.tasks)
+
+    @property
+    def next_cursor(self):
+        """Cursor for the cards after the last loaded one"""
+        if not self.has_more or not self.tasks:
+            return ''
+        return encode_cursor(self.tasks[-1])
+
+
+class Board:
+    """Status columns of a Kanban board keyed by task status"""
+
+    def __init__(self, columns):
+        self.columns = columns
+
+    def __getitem__(self, status):
+        return self.columns[status]
+
+    def __iter__(self):
+        return iter(self.columns.values())
+
+    def items(self):
+        return self.columns.items()
+
+    @property
+    def stats(self):
+        """Total and per-status task counts"""
+        stats = {status: column.count for status, column in self.columns.items()}
+        stats['total'] = sum(stats.values())
+        return stats
+
+
+def encode_cursor(task):
+    """Encode the ordering key of a task as an opaque cursor string"""
+    key = [task.position, task.created_at.isoformat(), str(task.id)]
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Decode a cursor into (position, created_at, id), or None if invalid"""
+    try:
+        position, created_at, task_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        created_at = parse_datetime(created_at)
+    except (ValueError, TypeError):
+        return None
+    if created_at is None:
+        return None
+    return int(position), created_at, task_id
+
+
+def _board_queryset(tasks):
+    """Apply the joins every task card needs"""
+    return tasks.select_related('project', 'created_by').prefetch_related('assigned_to')
+
+
+def build_board(tasks, limit=BOARD_COLUMN_LIMIT):
+    """
+    Split ``tasks`` into status columns with a single query.
+
+    ``tasks`` must not use ``distinct()``; filter on subqueries instead of
+    multi-valued joins. Each column holds at most ``limit`` cards (all of them
+    when ``limit`` is None) while its ``count`` reflects the whole column.
+    """
+    queryset = _board_queryset(tasks).order_by('status', *BOARD_ORDERING)
+    if limit is not None:
+        queryset = queryset.annotate(
+            column_rank=Window(RowNumber(), partition_by=[F('status')], order_by=list(BOARD_ORDERING)),
+            column_count=Window(Count('pk'), partition_by=[F('status')]),
+        ).filter(column_rank__lte=limit)
+
+    rows = {status: [] for status, _ in Task.STATUS_CHOICES}
+    counts = {}
+    for task in queryset:
+        rows.setdefault(task.status, []).append(task)
+        if limit is not None:
+            counts[task.status] = task.column_count
+    if limit is None:
+        counts = {status: len(column_tasks) for status, column_tasks in rows.items()}
+
+    labels = dict(Task.STATUS_CHOICES)
+    return Board({
+        status: BoardColumn(
+            status,
+            labels.get(status, status),
+            column_tasks,
+            counts.get(status, 0),
+            has_more=counts.get(status, 0) > len(column_tasks),
+        )
+        for status, column_tasks in rows.items()
+    })
+
+
+def load_column(tasks, status, cursor=None, limit=BOARD_COLUMN_LIMIT):
+    """Load the next ``limit`` cards of one column after ``cursor``"""
+    queryset = _board_queryset(tasks).filter(status=status).order_by(*BOARD_ORDERING)
+    key = decode_cursor(cursor) if cursor else None
+    if key:
+        position, created_at, task_id = key
+        queryset = queryset.filter(
+            Q(position__gt=position) |
+            Q(position=position, created_at__lt=created_at) |
+            Q(position=position, created_at=created_at, id__gt=task_id)
+        )
+    column_tasks = list(queryset[:limit + 1])
+    has_more = len(column_tasks) > limit
+    column_tasks = column_tasks[:limit]
+    return BoardColumn(status, dict(Task.STATUS_CHOICES).get(status, status), column_tasks, len(column_tasks), has_more)
+
+
+def is_load_more_request(request):
+    """Whether the request asks for the next cards of a single column"""
+    return 'column' in request.GET and 'cursor' in request.GET
+
+
+def load_more_response(request, tasks, card_template='tasks/task_card.html'):
+    """JSON response with the next cards of the requested column rendered with ``card_template``"""
+    status = request.GET.get('column')
+    if status not in dict(Task.STATUS_CHOICES):
+        return JsonResponse({'success': False, 'error': 'Invalid status'}, status=400)
+
+    column = load_column(tasks, status, request.GET.get('cursor'))
+    html = ''.join(
+        render_to_string(card_template, {'task': task}, request=request)
+        for task in column
+    )
+    return JsonResponse({
+        'success': True,
+        'status': status,
+        'html': html,
+        'has_more': column.has_more,
+        'next_cursor': column.next_cursor,
+    })
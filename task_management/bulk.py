@@ -0,0 +1,263 @@
+"""
+Batched task writes behind the task API.
+
+A batch is validated in one pass against data loaded up front with a fixed
+number of queries - the caller's project roles, the members of the projects
+involved and the tasks being changed - and then applied in one transaction:
+tasks with ``bulk_create``/``bulk_update``, and assignments, activities and
+notifications with one ``bulk_create`` each. Model signals do not fire for
+bulk writes, so the project rollups, cache scopes and search documents they
+would maintain are refreshed, and status changes pushed to open pages, once
+per batch.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.utils import timezone
+
+from notification_system.models import Notification
+from notification_system.realtime import broadcast, task_status_message
+from project_manager.caching import bump_version, project_scope
+from projects.models import Project, ProjectMembership
+from projects.permissions import get_project_roles
+from projects.rollup import rebuild_project_stats
+from projects.search import index_documents, task_document
+from .activity import build_status_change
+from .models import Task, TaskActivity
+from .ordering import assign_top_positions
+
+MAX_BATCH_SIZE = 1000
+WRITE_BATCH_SIZE = 500
+
+# Fields a patch may change, in the order changes are described
+EDITABLE_FIELDS = [
+    'title', 'description', 'status', 'priority', 'due_date', 'start_date',
+    'estimated_hours', 'actual_hours', 'position',
+]
+
+# Fields whose changes are written to the search index
+SEARCHED_FIELDS = {'title', 'description'}
+
+Assignment = Task.assigned_to.through
+
+
+class BulkValidationError(Exception):
+    """A batch failed validation; ``errors`` maps item indexes to field errors"""
+
+    def __init__(self, errors):
+        super().__init__(errors)
+        self.errors = errors
+
+
+def _project_members(project_ids):
+    """{project_id: user ids} of the owners and members of projects, in one query"""
+    owners = Project.objects.filter(pk__in=project_ids).order_by().values_list('pk', 'owner_id')
+    memberships = ProjectMembership.objects.filter(
+        project_id__in=project_ids
+    ).order_by().values_list('project_id', 'user_id')
+    members = defaultdict(set)
+    for project_id, user_id in owners.union(memberships, all=True):
+        members[project_id].add(user_id)
+    return members
+
+
+def _check_assignees(item_errors, assignees, members):
+    unknown = set(assignees) - members
+    if unknown:
+        item_errors['assigned_to'] = [f'Users {sorted(unknown)} are not members of this project.']
+
+
+def _refresh_projects(project_ids):
+    """Do what the task signals would have done for a batch of writes"""
+    if not project_ids:
+        return
+    rebuild_project_stats(project_ids)
+    bump_version(*(project_scope(project_id) for project_id in project_ids))
+
+
+def _describe_change(field, old, new):
+    if field == 'title':
+        return f"Title: '{old}' → '{new}'"
+    if field in ('priority', 'status'):
+        return f"{field.title()}: {old} → {new}"
+    return f"{field.replace('_', ' ').capitalize()} changed"
+
+
+def create_tasks(user, items):
+    """
+    Create tasks from validated ``TaskCreateSerializer`` data.
+
+    Raises BulkValidationError if any item targets a project the user does
+    not belong to or assigns users outside the project. Returns the tasks.
+    """
+    roles = get_project_roles(user)
+    project_ids = {item['project'] for item in items if item['project'] in roles}
+    members = _project_members(project_ids)
+
+    errors = {}
+    for index, item in enumerate(items):
+        item_errors = {}
+        if item['project'] not in roles:
+            item_errors['project'] = ['You do not have access to this project.']
+        else:
+            _check_assignees(item_errors, item.get('assigned_to', []), members[item['project']])
+        if item_errors:
+            errors[index] = item_errors
+    if errors:
+        raise BulkValidationError(errors)
+
+    projects = Project.objects.in_bulk(project_ids)
+    tasks = []
+    assignees = []
+    for item in items:
+        data = dict(item)
+        task_assignees = list(dict.fromkeys(data.pop('assigned_to', [])))
+        task = Task(project=projects[data.pop('project')], created_by=user, **data)
+        task.sync_completed_date()
+        tasks.append(task)
+        assignees.append(task_assignees)
+    assign_top_positions(tasks)
+
+    with transaction.atomic():
+        Task.objects.bulk_create(tasks, batch_size=WRITE_BATCH_SIZE)
+        index_documents([task_document(task) for task in tasks])
+        Assignment.objects.bulk_create([
+            Assignment(task_id=task.pk, user_id=user_id)
+            for task, task_assignees in zip(tasks, assignees)
+            for user_id in task_assignees
+        ], batch_size=WRITE_BATCH_SIZE)
+        TaskActivity.objects.bulk_create([
+            TaskActivity(task=task, user=user, activity_type='created', description='Task created')
+            for task in tasks
+        ], batch_size=WRITE_BATCH_SIZE)
+        Notification.bulk_deliver([
+            Notification.build_task_assignment(user_id, task, user)
+            for task, task_assignees in zip(tasks, assignees)
+            for user_id in task_assignees if user_id != user.pk
+        ])
+        _refresh_projects(project_ids)
+    return tasks
+
+
+def update_tasks(user, items, status_only=False):
+    """
+    Apply validated ``TaskUpdateSerializer`` (or ``TaskStatusSerializer``) data.
+
+    Project members may patch any field; assignees who are not members of
+    the project may only change the status, as in the board views. Raises
+    BulkValidationError for unknown or inaccessible tasks and invalid
+    assignees. Returns the tasks that changed.
+    """
+    task_ids = [item['id'] for item in items]
+    tasks = Task.objects.select_related('project').in_bulk(task_ids)
+    roles = get_project_roles(user)
+
+    assignments = defaultdict(set)
+    for task_id, user_id in Assignment.objects.filter(task_id__in=task_ids).values_list('task_id', 'user_id'):
+        assignments[task_id].add(user_id)
+    reassigned_projects = {
+        tasks[item['id']].project_id for item in items
+        if 'assigned_to' in item and item['id'] in tasks
+    }
+    members = _project_members(reassigned_projects) if reassigned_projects else {}
+
+    errors = {}
+    seen = set()
+    for index, item in enumerate(items):
+        item_errors = {}
+        task = tasks.get(item['id'])
+        is_member = task is not None and task.project_id in roles
+        if item['id'] in seen:
+            item_errors['id'] = ['Task appears more than once in the batch.']
+        elif task is None or not (is_member or (user.pk in assignments[task.pk] and not task.project.pending_deletion)):
+            item_errors['id'] = ['Task not found.']
+        elif not is_member and set(item) - {'id', 'status'}:
+            item_errors['id'] = ['Only project members can edit this task.']
+        elif 'assigned_to' in item:
+            _check_assignees(item_errors, item['assigned_to'], members[task.project_id])
+        seen.add(item['id'])
+        if item_errors:
+            errors[index] = item_errors
+    if errors:
+        raise BulkValidationError(errors)
+
+    now = timezone.now()
+    changed_tasks = []
+    changed_fields = set()
+    reassigned = {}
+    replaced = []
+    activities = []
+    notifications = []
+    for item in items:
+        task = tasks[item['id']]
+        old_values = {field: getattr(task, field) for field in EDITABLE_FIELDS}
+        for field in EDITABLE_FIELDS:
+            if field in item:
+                setattr(task, field, item[field])
+        task.sync_completed_date()
+        changes = [field for field in EDITABLE_FIELDS if getattr(task, field) != old_values[field]]
+
+        current = assignments[task.pk]
+        added = set()
+        if 'assigned_to' in item and set(item['assigned_to']) != current:
+            added = set(item['assigned_to']) - current
+            reassigned[task.pk] = set(item['assigned_to'])
+        if not changes and task.pk not in reassigned:
+            continue
+
+        task.updated_at = now
+        changed_tasks.append(task)
+        changed_fields.update(changes)
+        if 'status' in changes and 'position' not in item:
+            replaced.append(task)
+
+        descriptions = [_describe_change(field, old_values[field], getattr(task, field)) for field in changes]
+        if descriptions and not status_only:
+            activities.append(TaskActivity(
+                task=task, user=user, activity_type='updated',
+                description=f'Task updated: {", ".join(descriptions)}'
+            ))
+        # Assignees hear about the change, newly added ones about the assignment
+        recipients = reassigned.get(task.pk, current) - {user.pk}
+        if 'status' in changes:
+            activity, status_notifications = build_status_change(
+                task, user, old_values['status'], recipients - added if status_only else ()
+            )
+            activities.append(activity)
+            notifications.extend(status_notifications)
+        for user_id in recipients:
+            if user_id in added:
+                notifications.append(Notification.build_task_assignment(user_id, task, user))
+            elif changes and not status_only:
+                notifications.append(Notification.build_task_update(user_id, task, user, changes))
+
+    with transaction.atomic():
+        if replaced:
+            # Tasks changing column without a position go on top of the new one
+            for task in replaced:
+                task.position = 0
+            assign_top_positions(replaced)
+            changed_fields.add('position')
+        if changed_tasks:
+            Task.objects.bulk_update(
+                changed_tasks,
+                sorted(changed_fields | {'completed_date', 'updated_at'}),
+                batch_size=WRITE_BATCH_SIZE,
+            )
+            if changed_fields & SEARCHED_FIELDS:
+                index_documents([task_document(task) for task in changed_tasks])
+        if reassigned:
+            Assignment.objects.filter(task_id__in=reassigned).delete()
+            Assignment.objects.bulk_create([
+                Assignment(task_id=task_id, user_id=user_id)
+                for task_id, user_ids in reassigned.items()
+                for user_id in user_ids
+            ], batch_size=WRITE_BATCH_SIZE)
+        TaskActivity.objects.bulk_create(activities, batch_size=WRITE_BATCH_SIZE)
+        Notification.bulk_deliver(notifications)
+        _refresh_projects({task.project_id for task in changed_tasks})
+        broadcast(
+            task_status_message(activity, activity.task.project_id)
+            for activity in activities if activity.activity_type == 'status_changed'
+        )
+    return changed_tasks
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:10
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('task_management', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='taskactivity',
+            index=models.Index(fields=['task', 'activity_type', 'created_at'], name='task_manage_task_id_817d76_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:22
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0005_tombstones_and_membership_updated_at'),
+        ('task_management', '0002_task_activity_history_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['project', 'updated_at'], name='task_manage_project_6a0ab9_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='taskcomment',
+            index=models.Index(fields=['updated_at'], name='task_manage_updated_245872_idx'),
+        ),
+    ]
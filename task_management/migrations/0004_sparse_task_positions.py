@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:25
+
+from django.conf import settings
+from django.db import migrations, models
+
+POSITION_GAP = 1 << 20
+
+
+def spread_positions(apps, schema_editor):
+    """Respace every column in its current order, leaving gaps between cards"""
+    Task = apps.get_model('task_management', 'Task')
+    column = None
+    changed = []
+    rows = Task.objects.order_by('project_id', 'status', 'position', '-created_at', 'id').values_list(
+        'pk', 'project_id', 'status'
+    )
+    for pk, project_id, status in rows.iterator(chunk_size=2000):
+        if column != (project_id, status):
+            column, index = (project_id, status), 0
+        index += 1
+        changed.append(Task(pk=pk, position=index * POSITION_GAP))
+        if len(changed) >= 500:
+            Task.objects.bulk_update(changed, ['position'])
+            changed = []
+    Task.objects.bulk_update(changed, ['position'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0005_tombstones_and_membership_updated_at'),
+        ('task_management', '0003_sync_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='task',
+            name='task_manage_project_90918d_idx',
+        ),
+        migrations.AlterField(
+            model_name='task',
+            name='position',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['project', 'status', 'position'], name='task_manage_project_8da127_idx'),
+        ),
+        migrations.RunPython(spread_positions, migrations.RunPython.noop),
+    ]
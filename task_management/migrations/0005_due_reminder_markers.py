@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('task_management', '0004_sparse_task_positions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='due_soon_reminded_for',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='overdue_reminded_for',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
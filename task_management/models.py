@@ -5,6 +5,9 @@ from django.utils import timezone
 
 User = get_user_model()
 
+# Distance between neighbouring cards of a board column
+POSITION_GAP = 1 << 20
+
 
 class Task(models.Model):
     PRIORITY_CHOICES = [
@@ -38,30 +41,73 @@ class Task(models.Model):
     completed_date = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Due dates the assignees were last reminded of, see notification_system.reminders
+    due_soon_reminded_for = models.DateTimeField(null=True, blank=True, editable=False)
+    overdue_reminded_for = models.DateTimeField(null=True, blank=True, editable=False)
     
     # Additional fields
     estimated_hours = models.DecimalField(max_digits=8, decimal_places=2, null=True, blank=True)
     actual_hours = models.DecimalField(max_digits=8, decimal_places=2, null=True, blank=True)
-    position = models.PositiveIntegerField(default=0)  # For ordering within status
+    # Sparse order within the status column, see task_management.ordering
+    position = models.BigIntegerField(default=0)
     
     class Meta:
         ordering = ['position', '-created_at']
         indexes = [
-            models.Index(fields=['project', 'status']),
+            models.Index(fields=['project', 'status', 'position']),
+            models.Index(fields=['project', 'updated_at']),
             models.Index(fields=['due_date']),
         ]
     
     def __str__(self):
         return f"{self.title} ({self.project.name})"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        task = super().from_db(db, field_names, values)
+        # Column and position as loaded, see needs_top_position()
+        if {'project_id', 'status', 'position'} <= set(field_names):
+            task._loaded_place = (task.project_id, task.status, task.position)
+        return task
+    
     def save(self, *args, **kwargs):
-        # Automatically set completed_date when status changes to completed
+        self.sync_completed_date()
+        if self.needs_top_position():
+            from .ordering import assign_top_positions
+            self.position = 0
+            assign_top_positions([self])
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'position'}
+        super().save(*args, **kwargs)
+        self._loaded_place = (self.project_id, self.status, self.position)
+    
+    def needs_top_position(self):
+        """
+        Whether the task goes on top of its column when saved: new tasks
+        without a position, and tasks moved to another column (status or
+        project) without being given a position there
+        """
+        if self._state.adding:
+            return not self.position
+        loaded = getattr(self, '_loaded_place', None)
+        if loaded is None:
+            return False
+        project_id, status, position = loaded
+        return (project_id, status) != (self.project_id, self.status) and self.position == position
+    
+    def place(self, status, position):
+        """Put the task at ``position`` of column ``status``, to be saved by the caller"""
+        self.status = status
+        self.position = position
+        # Kept even if it happens to equal the position in the old column
+        self._loaded_place = None
+    
+    def sync_completed_date(self):
+        """Set completed_date when the task is completed and clear it otherwise"""
         if self.status == 'completed' and not self.completed_date:
             self.completed_date = timezone.now()
         elif self.status != 'completed':
             self.completed_date = None
-        
-        super().save(*args, **kwargs)
     
     @property
     def is_overdue(self):
@@ -98,6 +144,9 @@ class TaskComment(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['updated_at']),
+        ]
     
     def __str__(self):
         return f"Comment by {self.author.username} on {self.task.title}"
@@ -157,6 +206,9 @@ class TaskActivity(models.Model):
     class Meta:
         ordering = ['-created_at']
         verbose_name_plural = 'Task Activities'
+        indexes = [
+            models.Index(fields=['task', 'activity_type', 'created_at']),
+        ]
     
     def __str__(self):
         return f"{self.get_activity_type_display()} - {self.task.title}"
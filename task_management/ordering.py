@@ -0,0 +1,193 @@
+"""
+Card order within board columns using sparse positions.
+
+Cards of a column are ordered by ``Task.position`` with gaps of
+``POSITION_GAP`` between neighbours. Moving a card gives it a position
+between its new neighbours, so a drag and drop writes only the moved row.
+New cards, and cards changing column other than by a move (a status change
+from a form or the bulk API), go on top of their column, ahead of its current
+first card (``Task.needs_top_position``).
+
+Every move halves the gap it lands in. When a gap gets narrower than
+``REBALANCE_THRESHOLD`` the column is respaced on a background thread (or
+inline with ``TASK_REBALANCE_WORKER = 'sync'``); only a move into a gap that
+is already exhausted respaces the column before returning.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from notification_system.realtime import broadcast, project_group
+from project_manager.caching import bump_version, project_scope
+from .board import BOARD_ORDERING
+from .models import POSITION_GAP, Task
+
+logger = logging.getLogger(__name__)
+
+REBALANCE_THRESHOLD = POSITION_GAP >> 12
+REBALANCE_BATCH_SIZE = 500
+
+_executor = None
+_scheduled = set()
+
+
+class InvalidMove(ValueError):
+    """The neighbours of a move are not cards of the target column"""
+
+
+def assign_top_positions(tasks):
+    """Give unplaced new tasks positions on top of their columns, in list order"""
+    tasks = [task for task in tasks if not task.position]
+    if not tasks:
+        return
+    columns = {(task.project_id, task.status) for task in tasks}
+    tops = {
+        (row['project_id'], row['status']): row['top']
+        for row in Task.objects.filter(
+            project_id__in={project_id for project_id, _ in columns}
+        ).values('project_id', 'status').annotate(top=Min('position')).order_by()
+    }
+    for task in reversed(tasks):
+        key = (task.project_id, task.status)
+        top = tops.get(key)
+        task.position = POSITION_GAP if top is None else top - POSITION_GAP
+        tops[key] = task.position
+
+
+def _position_between(after, before, column):
+    """Position strictly between two neighbours, or None if there is no room"""
+    if after is None and before is None:
+        bottom = column.aggregate(bottom=Max('position'))['bottom']
+        return POSITION_GAP if bottom is None else bottom + POSITION_GAP
+    if after is None:
+        return before.position - POSITION_GAP
+    if before is None:
+        return after.position + POSITION_GAP
+    if before.position - after.position < 2:
+        return None
+    return (after.position + before.position) // 2
+
+
+def _adjacent_card(column, card, below):
+    """
+    Closest card of ``column`` below (or above) ``card``, or None.
+
+    A card sharing the position of ``card`` counts as adjacent, leaving no
+    room in between, so the column is respaced before the move.
+    """
+    others = column.exclude(pk=card.pk).only('id', 'position')
+    if below:
+        return others.filter(position__gte=card.position).order_by('position').first()
+    return others.filter(position__lte=card.position).order_by('-position').first()
+
+
+def _drop_neighbours(column, after_id, before_id):
+    """
+    Cards of ``column`` right above and below the drop point, as (after, before).
+
+    The card named by the client (``after_id``, else ``before_id``) is the
+    anchor; the card on its other side is read from the column, so a stale
+    or partial view of the board never leads to two cards sharing a
+    position. Raises InvalidMove.
+    """
+    neighbour_ids = [pk for pk in (after_id, before_id) if pk is not None]
+    neighbours = column.only('id', 'position').in_bulk(neighbour_ids)
+    if len(neighbours) != len(set(neighbour_ids)):
+        raise InvalidMove('Neighbouring cards must be other tasks of the target column.')
+    if after_id is not None:
+        after = neighbours[after_id]
+        return after, _adjacent_card(column, after, below=True)
+    if before_id is not None:
+        before = neighbours[before_id]
+        return _adjacent_card(column, before, below=False), before
+    return None, None
+
+
+def move_task(task, status, after_id=None, before_id=None):
+    """
+    Move ``task`` into column ``status`` between two cards of that column.
+
+    ``after_id`` is the card displayed above the drop point and ``before_id``
+    the card below it; either is None at the ends of the column (see
+    ``_drop_neighbours``). Saves only the moved task, unless the gap is
+    exhausted and the column has to be respaced first. Raises InvalidMove.
+
+    The cards of the column are locked first, so concurrent drops into the
+    same gap take turns and the later one sees the earlier card.
+    """
+    column = Task.objects.filter(project_id=task.project_id, status=status).exclude(pk=task.pk)
+    with transaction.atomic():
+        list(column.select_for_update().order_by('pk').values_list('pk', flat=True))
+        after, before = _drop_neighbours(column, after_id, before_id)
+        position = _position_between(after, before, column)
+        if position is None:
+            rebalance_column(task.project_id, status)
+            after, before = _drop_neighbours(column, after_id, before_id)
+            position = _position_between(after, before, column)
+
+        task.place(status, position)
+        task.save(update_fields=['status', 'position', 'completed_date', 'updated_at'])
+
+    gaps = [abs(position - neighbour.position) for neighbour in (after, before) if neighbour is not None]
+    if gaps and min(gaps) < REBALANCE_THRESHOLD:
+        schedule_rebalance(task.project_id, status)
+
+    broadcast([(project_group(task.project_id), 'task.moved', {
+        'task_id': str(task.pk),
+        'status': status,
+        'position': position,
+        'after_id': str(after.pk) if after else None,
+        'before_id': str(before.pk) if before else None,
+    })])
+    return task
+
+
+def rebalance_column(project_id, status):
+    """Respace the positions of a column by POSITION_GAP; returns the rows changed"""
+    now = timezone.now()
+    with transaction.atomic():
+        rows = Task.objects.select_for_update().filter(
+            project_id=project_id, status=status
+        ).order_by(*BOARD_ORDERING).values_list('pk', 'position')
+        changed = [
+            Task(pk=pk, position=index * POSITION_GAP, updated_at=now)
+            for index, (pk, position) in enumerate(rows, start=1)
+            if position != index * POSITION_GAP
+        ]
+        Task.objects.bulk_update(changed, ['position', 'updated_at'], batch_size=REBALANCE_BATCH_SIZE)
+        if changed:
+            bump_version(project_scope(project_id))
+    return len(changed)
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='task-rebalance')
+    return _executor
+
+
+def _rebalance_in_thread(key):
+    """Thread pool entry point; worker threads manage their own connections"""
+    _scheduled.discard(key)
+    close_old_connections()
+    try:
+        rebalance_column(*key)
+    except Exception:
+        logger.exception('Rebalancing column %s of project %s failed', key[1], key[0])
+    finally:
+        close_old_connections()
+
+
+def schedule_rebalance(project_id, status):
+    """Respace a column once the current transaction commits"""
+    key = (project_id, status)
+    if getattr(settings, 'TASK_REBALANCE_WORKER', 'thread') == 'sync':
+        transaction.on_commit(lambda: rebalance_column(*key))
+    elif key not in _scheduled:
+        _scheduled.add(key)
+        transaction.on_commit(lambda: _get_executor().submit(_rebalance_in_thread, key))
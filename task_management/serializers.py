@@ -0,0 +1,77 @@
+from rest_framework import serializers
+
+from .bulk import MAX_BATCH_SIZE
+from .models import Task
+
+
+class TaskSerializer(serializers.ModelSerializer):
+    """Task as returned by the task API"""
+    assigned_to = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Task
+        fields = [
+            'id', 'project', 'title', 'description', 'status', 'priority',
+            'created_by', 'assigned_to', 'due_date', 'start_date', 'completed_date',
+            'estimated_hours', 'actual_hours', 'position', 'created_at', 'updated_at',
+        ]
+        read_only_fields = fields
+
+    def get_assigned_to(self, task):
+        # Reads the prefetched assignees
+        return [user.pk for user in task.assigned_to.all()]
+
+
+class TaskWriteSerializer(serializers.Serializer):
+    """
+    Fields accepted when creating or patching a task.
+
+    Only validates the values themselves; access to projects and assignees
+    is checked for a whole batch at once by ``task_management.bulk``.
+    """
+    title = serializers.CharField(max_length=200)
+    description = serializers.CharField(allow_blank=True, required=False)
+    status = serializers.ChoiceField(choices=Task.STATUS_CHOICES, required=False)
+    priority = serializers.ChoiceField(choices=Task.PRIORITY_CHOICES, required=False)
+    due_date = serializers.DateTimeField(allow_null=True, required=False)
+    start_date = serializers.DateTimeField(allow_null=True, required=False)
+    estimated_hours = serializers.DecimalField(max_digits=8, decimal_places=2, allow_null=True, required=False)
+    actual_hours = serializers.DecimalField(max_digits=8, decimal_places=2, allow_null=True, required=False)
+    position = serializers.IntegerField(required=False)
+    assigned_to = serializers.ListField(child=serializers.IntegerField(), required=False)
+
+
+class TaskCreateSerializer(TaskWriteSerializer):
+    """A task to create"""
+    project = serializers.UUIDField()
+
+
+class TaskUpdateSerializer(TaskWriteSerializer):
+    """A patch of an existing task"""
+    id = serializers.UUIDField()
+    title = serializers.CharField(max_length=200, required=False)
+
+
+class TaskStatusSerializer(serializers.Serializer):
+    """A status transition of an existing task"""
+    id = serializers.UUIDField()
+    status = serializers.ChoiceField(choices=Task.STATUS_CHOICES)
+
+
+class BulkTaskCreateSerializer(serializers.Serializer):
+    tasks = TaskCreateSerializer(many=True, allow_empty=False, max_length=MAX_BATCH_SIZE)
+
+
+class BulkTaskUpdateSerializer(serializers.Serializer):
+    tasks = TaskUpdateSerializer(many=True, allow_empty=False, max_length=MAX_BATCH_SIZE)
+
+
+class BulkTaskStatusSerializer(serializers.Serializer):
+    transitions = TaskStatusSerializer(many=True, allow_empty=False, max_length=MAX_BATCH_SIZE)
+
+
+class TaskMoveSerializer(serializers.Serializer):
+    """A drag and drop of a card between two cards of a column"""
+    status = serializers.ChoiceField(choices=Task.STATUS_CHOICES)
+    after = serializers.UUIDField(allow_null=True, required=False)
+    before = serializers.UUIDField(allow_null=True, required=False)
@@ -0,0 +1,109 @@
+"""
+Signal handlers keeping the project task rollup, cached queries derived
+from tasks and the search index in sync, recording tombstones of deleted
+tasks and comments, and pushing task changes to open project pages.
+"""
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from notification_system.realtime import broadcast, comment_message, task_status_message
+from project_manager.caching import bump_version, project_scope
+from project_reports.timeseries import reset_flow_state
+from projects.models import Project
+from projects.rollup import apply_task_change, rebuild_project_stats, task_state
+from projects.search import (
+    comment_document, index_documents, move_task_documents, task_document, unindex, unindex_task,
+)
+from projects.tombstones import is_deletion_of, is_project_deletion, record_deletion
+from .models import Task, TaskActivity, TaskComment
+
+_STATE_ATTR = '_rollup_state'
+
+SEARCHED_TASK_FIELDS = {'title', 'description', 'project'}
+
+
+@receiver(post_init, sender=Task)
+def task_loaded(sender, instance, **kwargs):
+    """Remember the stored state so that saves can apply deltas to the rollup"""
+    setattr(instance, _STATE_ATTR, task_state(instance))
+
+
+@receiver(post_save, sender=Task)
+def task_saved(sender, instance, created, update_fields=None, **kwargs):
+    new_state = task_state(instance)
+    old_state = None
+    if created:
+        apply_task_change(None, new_state)
+    else:
+        old_state = getattr(instance, _STATE_ATTR, None)
+        if old_state is None or new_state is None:
+            rebuild_project_stats({instance.project_id, (old_state or {}).get('project_id')} - {None})
+        elif old_state != new_state:
+            apply_task_change(old_state, new_state)
+    setattr(instance, _STATE_ATTR, new_state)
+    # Moves on the board save only the status and position
+    if update_fields is None or SEARCHED_TASK_FIELDS & set(update_fields):
+        index_documents([task_document(instance)])
+        if old_state and old_state.get('project_id') != instance.project_id:
+            move_task_documents(instance.pk, instance.project_id)
+    if old_state and old_state.get('project_id') != instance.project_id:
+        # The old project's flow history loses the task
+        reset_flow_state(old_state['project_id'], instance.project_id)
+        bump_version(project_scope(old_state['project_id']))
+    bump_version(project_scope(instance.project_id))
+
+
+@receiver(post_delete, sender=Task)
+def task_deleted(sender, instance, origin=None, **kwargs):
+    # Deleting the project removes its rollup row and tombstones as well
+    if not is_project_deletion(origin):
+        apply_task_change(getattr(instance, _STATE_ATTR, None) or task_state(instance), None)
+        record_deletion('task', instance.project_id, instance.pk)
+        unindex_task(instance.pk)
+        # The flow reports' fold state only ever adds history
+        reset_flow_state(instance.project_id)
+    bump_version(project_scope(instance.project_id))
+
+
+@receiver(m2m_changed, sender=Task.assigned_to.through)
+def task_assignees_changed(sender, instance, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear') and isinstance(instance, Task):
+        # Assignees are part of the task for the board delta sync
+        Task.objects.filter(pk=instance.pk).update(updated_at=timezone.now())
+        bump_version(project_scope(instance.project_id))
+
+
+def _task_project_id(instance):
+    """Project id of the task a comment or activity belongs to"""
+    if type(instance).task.is_cached(instance):
+        return instance.task.project_id
+    return Task.objects.filter(pk=instance.task_id).values_list('project_id', flat=True).first()
+
+
+@receiver(post_save, sender=TaskComment)
+@receiver(post_delete, sender=TaskComment)
+def comment_changed(sender, instance, signal, created=False, origin=None, **kwargs):
+    project_id = _task_project_id(instance)
+    if project_id is not None:
+        bump_version(project_scope(project_id))
+        if signal is post_delete:
+            event = 'comment.deleted'
+            # Comments deleted with their task are covered by its tombstone
+            if not is_deletion_of(origin, Project, Task):
+                record_deletion('comment', project_id, instance.pk)
+                unindex('comment', instance.pk)
+        else:
+            event = 'comment.created' if created else 'comment.updated'
+            index_documents([comment_document(instance, project_id)])
+        broadcast([comment_message(instance, project_id, event)])
+
+
+@receiver(post_save, sender=TaskActivity)
+def activity_recorded(sender, instance, created, **kwargs):
+    # Status history feeds the project flow reports
+    if created and instance.activity_type == 'status_changed':
+        project_id = _task_project_id(instance)
+        if project_id is not None:
+            bump_version(project_scope(project_id))
+            broadcast([task_status_message(instance, project_id)])
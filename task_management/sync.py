@@ -0,0 +1,139 @@
+"""
+Delta sync of a project board: the changes since a cursor.
+
+A cursor is an opaque timestamp. The tasks, comments and memberships of the
+project whose ``updated_at`` is past the cursor are returned together with
+the tombstones recorded since (see ``projects.tombstones``), so a response
+is proportional to the volume of changes rather than to the board. Every
+query is a range scan on an ``updated_at``/``deleted_at`` index.
+
+Rows are stamped before their transaction commits, so a row can become
+visible with a timestamp slightly behind a cursor already handed out. The
+next cursor therefore trails the time of the request by ``SETTLE_WINDOW``:
+recent changes may be returned twice, which clients absorb since applying a
+row is idempotent, but none are skipped.
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db.models import Q
+from django.utils import timezone
+
+from projects.models import ProjectMembership, Tombstone
+from projects.tombstones import TOMBSTONE_RETENTION
+from .models import Task, TaskComment
+
+SETTLE_WINDOW = timedelta(seconds=10)
+
+# Beyond this many changed rows of one kind the client should reload
+MAX_CHANGES = 500
+
+TASK_FIELDS = [
+    'id', 'title', 'description', 'status', 'priority', 'position',
+    'due_date', 'start_date', 'completed_date', 'updated_at',
+]
+
+
+class InvalidCursor(ValueError):
+    """The cursor was not issued by ``encode_cursor``"""
+
+
+def encode_cursor(moment):
+    return str(int(moment.timestamp() * 1_000_000))
+
+
+def decode_cursor(cursor):
+    try:
+        return datetime(1970, 1, 1, tzinfo=dt_timezone.utc) + timedelta(microseconds=int(cursor))
+    except (TypeError, ValueError, OverflowError):
+        raise InvalidCursor(cursor)
+
+
+def _tasks(project_id, since):
+    tasks = list(
+        Task.objects.filter(project_id=project_id, updated_at__gte=since)
+        .order_by('updated_at').values(*TASK_FIELDS)[:MAX_CHANGES + 1]
+    )
+    assignees = defaultdict(list)
+    for task_id, user_id in Task.assigned_to.through.objects.filter(
+        task_id__in=[task['id'] for task in tasks]
+    ).values_list('task_id', 'user_id'):
+        assignees[task_id].append(user_id)
+    for task in tasks:
+        task['assigned_to'] = assignees[task['id']]
+    return tasks
+
+
+def _comments(project_id, since):
+    comments = TaskComment.objects.filter(
+        task__project_id=project_id, updated_at__gte=since
+    ).select_related('author').order_by('updated_at')[:MAX_CHANGES + 1]
+    return [{
+        'id': comment.pk,
+        'task_id': comment.task_id,
+        'author_id': comment.author_id,
+        'author_name': comment.author.get_full_name() or comment.author.username,
+        'content': comment.content,
+        'created_at': comment.created_at,
+        'updated_at': comment.updated_at,
+    } for comment in comments]
+
+
+def _memberships(project_id, since):
+    memberships = ProjectMembership.objects.filter(
+        project_id=project_id, updated_at__gte=since
+    ).select_related('user').order_by('updated_at')[:MAX_CHANGES + 1]
+    return [{
+        'id': membership.pk,
+        'user_id': membership.user_id,
+        'username': membership.user.username,
+        'full_name': membership.user.get_full_name(),
+        'role': membership.role,
+        'is_active': membership.is_active,
+        'joined_at': membership.joined_at,
+        'updated_at': membership.updated_at,
+    } for membership in memberships]
+
+
+def _deleted(project_id, since):
+    deleted = {'tasks': [], 'comments': [], 'memberships': []}
+    tombstones = Tombstone.objects.filter(
+        ~Q(kind='project'), project_id=project_id, deleted_at__gte=since
+    ).order_by('deleted_at').values_list('kind', 'object_id')[:MAX_CHANGES + 1]
+    for kind, object_id in tombstones:
+        deleted[f'{kind}s'].append(object_id)
+    return deleted
+
+
+def _reset(now):
+    return {'cursor': encode_cursor(now - SETTLE_WINDOW), 'reset': True}
+
+
+def project_changes(project_id, cursor=None):
+    """
+    Changes of a project's board since ``cursor``.
+
+    Returns ``{'cursor', 'reset', 'tasks', 'comments', 'memberships',
+    'deleted'}``. Without a cursor, with one older than the tombstones kept,
+    or when there are more than MAX_CHANGES changes of a kind, only
+    ``{'cursor', 'reset': True}`` is returned: the client should reload the
+    board and continue from the new cursor. Raises InvalidCursor.
+    """
+    now = timezone.now()
+    if cursor is None:
+        return _reset(now)
+    since = decode_cursor(cursor)
+    if since < now - TOMBSTONE_RETENTION:
+        return _reset(now)
+
+    changes = {
+        'tasks': _tasks(project_id, since),
+        'comments': _comments(project_id, since),
+        'memberships': _memberships(project_id, since),
+        'deleted': _deleted(project_id, since),
+    }
+    rows = [changes['tasks'], changes['comments'], changes['memberships'], *changes['deleted'].values()]
+    if any(len(changed) > MAX_CHANGES for changed in rows):
+        return _reset(now)
+    next_cursor = encode_cursor(max(since, now - SETTLE_WINDOW))
+    return {'cursor': next_cursor, 'reset': False, **changes}
@@ -1,3 +1,218 @@
+import uuid
+from datetime import timedelta
+
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import User
+from projects.models import Project, ProjectMembership
+from projects.tombstones import TOMBSTONE_RETENTION
+from .board import BOARD_ORDERING
+from .models import POSITION_GAP, Task, TaskComment
+from .ordering import InvalidMove, assign_top_positions, move_task
+from .sync import encode_cursor
+
+
+class OrderingTests(TestCase):
+    """Card moves and placement within board columns"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('alice', 'alice@example.com', 'password')
+        cls.project = Project.objects.create(name='Board', owner=cls.user)
+
+    def create(self, title, status='todo'):
+        return Task.objects.create(project=self.project, title=title, status=status, created_by=self.user)
+
+    def column(self, status='todo'):
+        return list(
+            Task.objects.filter(project=self.project, status=status)
+            .order_by(*BOARD_ORDERING).values_list('title', flat=True)
+        )
+
+    def positions(self, status='todo'):
+        return list(Task.objects.filter(project=self.project, status=status).values_list('position', flat=True))
+
+    def setUp(self):
+        # Created in reverse: new cards go on top
+        self.c, self.b, self.a = self.create('c'), self.create('b'), self.create('a')
+        self.task = self.create('moved', status='review')
+
+    def test_new_tasks_go_on_top(self):
+        self.assertEqual(self.column(), ['a', 'b', 'c'])
+
+    def test_move_to_top(self):
+        move_task(self.task, 'todo', before_id=self.a.pk)
+        self.assertEqual(self.column(), ['moved', 'a', 'b', 'c'])
+
+    def test_move_to_bottom(self):
+        move_task(self.task, 'todo', after_id=self.c.pk)
+        self.assertEqual(self.column(), ['a', 'b', 'c', 'moved'])
+
+    def test_move_into_column_without_neighbours_goes_to_bottom(self):
+        move_task(self.task, 'todo')
+        self.assertEqual(self.column(), ['a', 'b', 'c', 'moved'])
+
+    def test_move_between_two_cards(self):
+        move_task(self.task, 'todo', after_id=self.a.pk, before_id=self.b.pk)
+        self.assertEqual(self.column(), ['a', 'moved', 'b', 'c'])
+        self.assertEqual(self.column('review'), [])
+
+    def test_move_with_one_neighbour_reads_the_other_from_the_column(self):
+        # A client that only names the card above still lands between a and b
+        move_task(self.task, 'todo', after_id=self.a.pk)
+        self.assertEqual(self.column(), ['a', 'moved', 'b', 'c'])
+        self.assertEqual(len(set(self.positions())), 4)
+
+    def test_repeated_moves_into_one_gap_keep_positions_distinct(self):
+        for index in range(40):
+            task = self.create(f'extra {index}', status='review')
+            move_task(task, 'todo', after_id=self.a.pk)
+        positions = self.positions()
+        self.assertEqual(len(set(positions)), len(positions))
+        self.assertEqual(self.column()[0], 'a')
+        self.assertEqual(self.column()[-2:], ['b', 'c'])
+
+    def test_move_into_exhausted_gap_rebalances_the_column(self):
+        Task.objects.filter(pk=self.b.pk).update(position=self.a.position + 1)
+        move_task(self.task, 'todo', after_id=self.a.pk, before_id=self.b.pk)
+        self.assertEqual(self.column(), ['a', 'moved', 'b', 'c'])
+        positions = sorted(self.positions())
+        self.assertGreater(min(high - low for low, high in zip(positions, positions[1:])), 1)
+
+    def test_move_next_to_a_tied_card_rebalances_the_column(self):
+        Task.objects.filter(pk=self.b.pk).update(position=self.a.position)
+        move_task(self.task, 'todo', after_id=self.a.pk)
+        column = self.column()
+        self.assertEqual(column.index('moved'), column.index('a') + 1)
+        self.assertEqual(len(set(self.positions())), 4)
+
+    def test_move_within_the_same_column(self):
+        move_task(self.a, 'todo', after_id=self.c.pk)
+        self.assertEqual(self.column(), ['b', 'c', 'a'])
+
+    def test_neighbour_in_another_column_is_invalid(self):
+        other = self.create('other', status='completed')
+        with self.assertRaises(InvalidMove):
+            move_task(self.task, 'todo', after_id=other.pk)
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.status, 'review')
+
+    def test_task_as_its_own_neighbour_is_invalid(self):
+        with self.assertRaises(InvalidMove):
+            move_task(self.a, 'todo', after_id=self.a.pk)
+
+    def test_unknown_neighbour_is_invalid(self):
+        with self.assertRaises(InvalidMove):
+            move_task(self.a, 'todo', before_id=uuid.uuid4())
+
+    def test_assign_top_positions_keeps_list_order_and_placed_tasks(self):
+        tasks = [
+            Task(project=self.project, title='x', created_by=self.user),
+            Task(project=self.project, title='y', created_by=self.user, position=self.c.position + POSITION_GAP),
+            Task(project=self.project, title='z', created_by=self.user),
+        ]
+        assign_top_positions(tasks)
+        Task.objects.bulk_create(tasks)
+        self.assertEqual(self.column(), ['x', 'z', 'a', 'b', 'c', 'y'])
+
+    def test_status_change_without_a_position_goes_on_top(self):
+        self.c.status = 'review'
+        self.c.save()
+        self.assertEqual(self.column('review'), ['c', 'moved'])
+        self.assertEqual(len(set(self.positions('review'))), 2)
+
+
+class ProjectChangesTests(TestCase):
+    """The board delta sync endpoint, ``get_project_changes``"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('alice', 'alice@example.com', 'password')
+        cls.member = User.objects.create_user('bob', 'bob@example.com', 'password')
+        cls.outsider = User.objects.create_user('carol', 'carol@example.com', 'password')
+        cls.project = Project.objects.create(name='Board', owner=cls.owner)
+        cls.membership = ProjectMembership.objects.create(project=cls.project, user=cls.member)
+        cls.task = Task.objects.create(project=cls.project, title='Existing', created_by=cls.owner)
+        cls.comment = TaskComment.objects.create(task=cls.task, author=cls.owner, content='Hello')
+
+    def setUp(self):
+        # Everything set up so far happened before the cursor
+        past = timezone.now() - timedelta(hours=1)
+        Task.objects.filter(pk=self.task.pk).update(updated_at=past)
+        TaskComment.objects.filter(pk=self.comment.pk).update(updated_at=past)
+        ProjectMembership.objects.filter(pk=self.membership.pk).update(updated_at=past)
+        self.cursor = encode_cursor(timezone.now() - timedelta(minutes=1))
+        self.client.force_login(self.member)
+        # Deleting the project clears its pk
+        self.project_id = self.project.pk
+
+    def changes(self, cursor=None, project_id=None, user=None):
+        if user is not None:
+            self.client.force_login(user)
+        url = reverse('tasks:api_project_changes', args=[project_id or self.project_id])
+        return self.client.get(url, {'since': cursor} if cursor is not None else {})
+
+    def test_without_cursor_the_client_reloads(self):
+        data = self.changes().json()
+        self.assertTrue(data['reset'])
+        self.assertIn('cursor', data)
+
+    def test_cursor_older_than_the_tombstones_resets(self):
+        old = encode_cursor(timezone.now() - TOMBSTONE_RETENTION - timedelta(days=1))
+        self.assertTrue(self.changes(old).json()['reset'])
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self.changes('not-a-cursor').status_code, 400)
+
+    def test_only_rows_changed_since_the_cursor_in_update_order(self):
+        first = Task.objects.create(project=self.project, title='First', created_by=self.owner)
+        second = Task.objects.create(project=self.project, title='Second', created_by=self.owner)
+        first.title = 'First, edited'
+        first.save()
+        data = self.changes(self.cursor).json()
+        self.assertFalse(data['reset'])
+        self.assertEqual([task['id'] for task in data['tasks']], [str(second.pk), str(first.pk)])
+        self.assertEqual(data['comments'], [])
+        self.assertEqual(data['memberships'], [])
+
+    def test_next_cursor_does_not_move_backwards(self):
+        data = self.changes(self.cursor).json()
+        self.assertGreaterEqual(int(data['cursor']), int(self.cursor))
+
+    def test_deleted_rows_are_reported(self):
+        other = Task.objects.create(project=self.project, title='Other', created_by=self.owner)
+        comment = TaskComment.objects.create(task=other, author=self.owner, content='Bye')
+        comment_id = comment.pk
+        comment.delete()
+        task_id = self.task.pk
+        self.task.delete()
+        membership_id = self.membership.pk
+        self.membership.delete()
+        data = self.changes(self.cursor, user=self.owner).json()
+        self.assertEqual(data['deleted'], {
+            'tasks': [str(task_id)],
+            'comments': [str(comment_id)],
+            'memberships': [str(membership_id)],
+        })
+
+    def test_comments_of_a_deleted_task_are_covered_by_its_tombstone(self):
+        task_id = self.task.pk
+        self.task.delete()
+        data = self.changes(self.cursor).json()
+        self.assertEqual(data['deleted']['tasks'], [str(task_id)])
+        self.assertEqual(data['deleted']['comments'], [])
+
+    def test_non_member(self):
+        self.assertEqual(self.changes(self.cursor, user=self.outsider).status_code, 403)
+
+    def test_deleted_project_for_former_members(self):
+        self.project.delete()
+        self.assertEqual(self.changes(self.cursor, user=self.member).status_code, 410)
+        self.assertEqual(self.changes(self.cursor, user=self.owner).status_code, 410)
 
-# Create your tests here.
+    def test_deleted_project_looks_unknown_to_others(self):
+        self.project.delete()
+        self.assertEqual(self.changes(self.cursor, user=self.outsider).status_code, 403)
+        self.assertEqual(self.changes(self.cursor, project_id=uuid.uuid4(), user=self.outsider).status_code, 403)
@@ -17,4 +17,5 @@ urlpatterns = [
     
     # API endpoints
     path('api/project/<uuid:project_id>/members/', api.get_project_members, name='api_project_members'),
+    path('api/project/<uuid:project_id>/changes/', api.get_project_changes, name='api_project_changes'),
 ]
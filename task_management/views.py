@@ -9,41 +9,39 @@ from django.core.paginator import Paginator
 from django.contrib.auth import get_user_model
 
 from .models import Task, TaskComment, TaskActivity
-from projects.models import Project
+from .activity import record_status_change
+from .board import build_board, is_load_more_request, load_more_response
+from projects.models import Project, ProjectMembership
+from projects.permissions import can_delete_task, can_view_task, get_project_ids
+from projects.search import filter_ranked, search_tasks
+from projects.views import project_page_scopes
+from project_manager.caching import project_scope
+from project_manager.conditional import conditional_on_scopes
+from project_manager.metrics import query_budget
 from notification_system.models import Notification
 
 User = get_user_model()
 
 
+@query_budget(6)
 @login_required
 def task_list(request):
     """Display all tasks for the current user in a Kanban board format"""
     # Get user's projects
-    user_projects = Project.objects.filter(
-        Q(owner=request.user) | Q(members=request.user)
-    ).distinct()
+    project_ids = get_project_ids(request.user)
+    user_projects = Project.objects.filter(id__in=project_ids)
     
-    # Get tasks from user's projects
+    # Get tasks from user's projects; subqueries avoid a DISTINCT over the joins
     tasks = Task.objects.filter(
-        Q(project__in=user_projects) | Q(assigned_to=request.user)
-    ).distinct().select_related('project', 'created_by').prefetch_related('assigned_to')
-    
-    # Organize tasks by status
-    task_columns = {
-        'todo': tasks.filter(status='todo'),
-        'in_progress': tasks.filter(status='in_progress'),
-        'review': tasks.filter(status='review'),
-        'completed': tasks.filter(status='completed'),
-    }
+        Q(project_id__in=project_ids) |
+        Q(pk__in=Task.objects.filter(assigned_to=request.user, project__pending_deletion=False).values('pk'))
+    )
+    if is_load_more_request(request):
+        return load_more_response(request, tasks)
     
-    # Get task statistics
-    task_stats = {
-        'total': tasks.count(),
-        'todo': task_columns['todo'].count(),
-        'in_progress': task_columns['in_progress'].count(),
-        'review': task_columns['review'].count(),
-        'completed': task_columns['completed'].count(),
-    }
+    # Organize tasks by status and count them from the same query
+    task_columns = build_board(tasks)
+    task_stats = task_columns.stats
     
     context = {
         'task_columns': task_columns,
@@ -54,12 +52,13 @@ def task_list(request):
     return render(request, 'tasks/task_list.html', context)
 
 
+@query_budget(10)
 @login_required
 def my_tasks(request):
     """Display tasks assigned to the current user"""
     # Get tasks assigned to the current user
     my_tasks = Task.objects.filter(
-        assigned_to=request.user
+        assigned_to=request.user, project__pending_deletion=False
     ).select_related('project', 'created_by').prefetch_related('assigned_to')
     
     # Filter by status if requested
@@ -80,23 +79,17 @@ def my_tasks(request):
     # Search functionality
     search_query = request.GET.get('search')
     if search_query:
-        my_tasks = my_tasks.filter(
-            Q(title__icontains=search_query) |
-            Q(description__icontains=search_query)
-        )
+        # Titles, descriptions and comments, best matches first
+        my_tasks = filter_ranked(my_tasks, search_tasks(search_query, my_tasks))
+    
+    if is_load_more_request(request):
+        return load_more_response(request, my_tasks)
     
     # Organize tasks by status for Kanban view
-    task_columns = {
-        'todo': my_tasks.filter(status='todo'),
-        'in_progress': my_tasks.filter(status='in_progress'),
-        'review': my_tasks.filter(status='review'),
-        'completed': my_tasks.filter(status='completed'),
-    }
+    task_columns = build_board(my_tasks)
     
     # Get user's projects for filtering
-    user_projects = Project.objects.filter(
-        Q(owner=request.user) | Q(members=request.user)
-    ).distinct()
+    user_projects = Project.objects.filter(id__in=get_project_ids(request.user))
     
     # Pagination for list view
     paginator = Paginator(my_tasks, 20)
@@ -117,32 +110,32 @@ def my_tasks(request):
     return render(request, 'tasks/my_tasks.html', context)
 
 
+@query_budget(7)
 @login_required
+@conditional_on_scopes(project_page_scopes)
 def project_tasks(request, project_id):
     """Display tasks for a specific project"""
     project = get_object_or_404(Project, id=project_id)
     
     # Check if user has access to this project
-    if not (project.owner == request.user or request.user in project.members.all()):
+    if not project.is_member(request.user):
         messages.error(request, 'You do not have access to this project.')
         return redirect('projects:project_list')
     
     # Get tasks for this project
-    tasks = Task.objects.filter(project=project).select_related('created_by').prefetch_related('assigned_to')
+    tasks = Task.objects.filter(project=project)
+    if is_load_more_request(request):
+        return load_more_response(request, tasks)
     
     # Organize tasks by status
-    task_columns = {
-        'todo': tasks.filter(status='todo'),
-        'in_progress': tasks.filter(status='in_progress'),
-        'review': tasks.filter(status='review'),
-        'completed': tasks.filter(status='completed'),
-    }
+    task_columns = build_board(tasks)
     
     # Get project statistics
+    stats = task_columns.stats
     project_stats = {
-        'total_tasks': tasks.count(),
-        'completed_tasks': task_columns['completed'].count(),
-        'progress_percentage': (task_columns['completed'].count() / tasks.count() * 100) if tasks.count() > 0 else 0,
+        'total_tasks': stats['total'],
+        'completed_tasks': stats['completed'],
+        'progress_percentage': (stats['completed'] / stats['total'] * 100) if stats['total'] > 0 else 0,
     }
     
     context = {
@@ -154,14 +147,23 @@ def project_tasks(request, project_id):
     return render(request, 'tasks/project_tasks.html', context)
 
 
+def _task_page_scopes(request, task_id):
+    """Cache scopes the task detail page depends on, None if the task is missing"""
+    project_id = Task.objects.filter(pk=task_id).values_list('project_id', flat=True).first()
+    if project_id is None:
+        return None
+    return [project_scope(project_id)]
+
+
+@query_budget(6)
 @login_required
+@conditional_on_scopes(_task_page_scopes)
 def task_detail(request, task_id):
     """Display detailed view of a task"""
-    task = get_object_or_404(Task, id=task_id)
+    task = get_object_or_404(Task.objects.select_related('project'), id=task_id)
     
     # Check if user has access to this task
-    project = task.project
-    if not (project.owner == request.user or request.user in project.members.all() or request.user in task.assigned_to.all()):
+    if not can_view_task(request.user, task):
         messages.error(request, 'You do not have access to this task.')
         return redirect('tasks:task_list')
     
@@ -182,11 +184,10 @@ def task_detail(request, task_id):
 @require_POST
 def toggle_task_completion(request, task_id):
     """Toggle task completion status"""
-    task = get_object_or_404(Task, id=task_id)
+    task = get_object_or_404(Task.objects.select_related('project'), id=task_id)
     
     # Check if user has permission to update this task
-    project = task.project
-    if not (project.owner == request.user or request.user in project.members.all() or request.user in task.assigned_to.all()):
+    if not can_view_task(request.user, task):
         return JsonResponse({'success': False, 'error': 'Permission denied'})
     
     # Toggle between completed and the previous status
@@ -216,17 +217,15 @@ def toggle_task_completion(request, task_id):
     )
     
     # Create notification for assigned users
-    for user in task.assigned_to.all():
-        if user != request.user:
-            Notification.objects.create(
-                recipient=user,
-                sender=request.user,
-                title=f'Task {action}',
-                message=f'Task "{task.title}" has been {action} by {request.user.get_full_name() or request.user.username}',
-                notification_type='task_updated',
-                task=task,
-                project=task.project
-            )
+    Notification.bulk_notify(
+        task.assigned_to.exclude(pk=request.user.pk).values_list('pk', flat=True),
+        sender=request.user,
+        title=f'Task {action}',
+        message=f'Task "{task.title}" has been {action} by {request.user.get_full_name() or request.user.username}',
+        notification_type='task_updated',
+        task=task,
+        project=task.project
+    )
     
     return JsonResponse({
         'success': True,
@@ -240,7 +239,7 @@ def toggle_task_completion(request, task_id):
 @require_POST
 def update_task_status(request, task_id):
     """Update task status via AJAX"""
-    task = get_object_or_404(Task, id=task_id)
+    task = get_object_or_404(Task.objects.select_related('project'), id=task_id)
     new_status = request.POST.get('status')
     
     # Validate new status
@@ -249,8 +248,7 @@ def update_task_status(request, task_id):
         return JsonResponse({'success': False, 'error': 'Invalid status'})
     
     # Check if user has permission to update this task
-    project = task.project
-    if not (project.owner == request.user or request.user in project.members.all() or request.user in task.assigned_to.all()):
+    if not can_view_task(request.user, task):
         return JsonResponse({'success': False, 'error': 'Permission denied'})
     
     old_status = task.status
@@ -264,28 +262,8 @@ def update_task_status(request, task_id):
     
     task.save()
     
-    # Log activity
-    TaskActivity.objects.create(
-        task=task,
-        user=request.user,
-        activity_type='status_changed',
-        description=f'Status changed from {old_status} to {new_status}',
-        old_value=old_status,
-        new_value=new_status
-    )
-    
-    # Create notification for assigned users
-    for user in task.assigned_to.all():
-        if user != request.user:
-            Notification.objects.create(
-                recipient=user,
-                sender=request.user,
-                title='Task Status Updated',
-                message=f'Task "{task.title}" status changed to {new_status.replace("_", " ").title()}',
-                notification_type='task_updated',
-                task=task,
-                project=task.project
-            )
+    # Log activity and notify assigned users
+    record_status_change(task, request.user, old_status)
     
     return JsonResponse({
         'success': True,
@@ -299,15 +277,14 @@ def update_task_status(request, task_id):
 def create_task(request):
     """Create a new task"""
     # Get user's projects with their members
-    user_projects = Project.objects.filter(
-        Q(owner=request.user) | Q(members=request.user)
-    ).distinct().prefetch_related('members')
+    project_ids = get_project_ids(request.user)
+    user_projects = Project.objects.filter(id__in=project_ids).prefetch_related('members')
     
     # Get all users who are part of user's projects for assignment
     project_members = User.objects.filter(
-        Q(owned_projects__in=user_projects) |
-        Q(projects__in=user_projects)
-    ).distinct()
+        Q(pk__in=Project.objects.filter(id__in=project_ids).values('owner_id')) |
+        Q(pk__in=ProjectMembership.objects.filter(project_id__in=project_ids).values('user_id'))
+    )
     
     if request.method == 'POST':
         # Handle task creation
@@ -330,7 +307,7 @@ def create_task(request):
         # Get project and validate access
         try:
             project = Project.objects.get(id=project_id)
-            if not (project.owner == request.user or request.user in project.members.all()):
+            if not project.is_member(request.user):
                 messages.error(request, 'You do not have access to this project.')
                 return redirect('tasks:task_list')
         except Project.DoesNotExist:
@@ -364,21 +341,12 @@ def create_task(request):
         )
         
         # Create notifications for assigned users
-        for user_id in assigned_to_ids:
-            try:
-                user = User.objects.get(id=user_id)
-                if user != request.user:
-                    Notification.objects.create(
-                        recipient=user,
-                        sender=request.user,
-                        title='New Task Assigned',
-                        message=f'You have been assigned to task "{task.title}"',
-                        notification_type='task_assigned',
-                        task=task,
-                        project=project
-                    )
-            except User.DoesNotExist:
-                pass
+        if assigned_to_ids:
+            Notification.create_task_assignments(
+                task.assigned_to.exclude(pk=request.user.pk).values_list('pk', flat=True),
+                task,
+                request.user
+            )
         
         messages.success(request, 'Task created successfully!')
         return redirect('tasks:task_detail', task_id=task.id)
@@ -393,18 +361,16 @@ def create_task(request):
 @login_required
 def edit_task(request, task_id):
     """Edit an existing task"""
-    task = get_object_or_404(Task, id=task_id)
+    task = get_object_or_404(Task.objects.select_related('project'), id=task_id)
     
     # Check if user has permission to edit this task
     project = task.project
-    if not (project.owner == request.user or request.user in project.members.all()):
+    if not project.is_member(request.user):
         messages.error(request, 'You do not have permission to edit this task.')
         return redirect('tasks:task_detail', task_id=task.id)
     
     # Get user's projects
-    user_projects = Project.objects.filter(
-        Q(owner=request.user) | Q(members=request.user)
-    ).distinct()
+    user_projects = Project.objects.filter(id__in=get_project_ids(request.user))
     
     if request.method == 'POST':
         # Handle task update
@@ -459,6 +425,17 @@ def edit_task(request, task_id):
                 description=f'Task updated: {", ".join(changes)}'
             )
         
+        # Record status transitions in the history the flow reports read
+        if old_values['status'] != task.status:
+            TaskActivity.objects.create(
+                task=task,
+                user=request.user,
+                activity_type='status_changed',
+                description=f'Status changed from {old_values["status"]} to {task.status}',
+                old_value=old_values['status'],
+                new_value=task.status
+            )
+        
         messages.success(request, 'Task updated successfully!')
         return redirect('tasks:task_detail', task_id=task.id)
     
@@ -473,11 +450,10 @@ def edit_task(request, task_id):
 @require_POST
 def delete_task(request, task_id):
     """Delete a task"""
-    task = get_object_or_404(Task, id=task_id)
+    task = get_object_or_404(Task.objects.select_related('project'), id=task_id)
     
     # Check if user has permission to delete this task
-    project = task.project
-    if not (project.owner == request.user or task.created_by == request.user):
+    if not can_delete_task(request.user, task):
         return JsonResponse({'success': False, 'error': 'Permission denied'})
     
     task_title = task.title